@@ -1,8 +1,18 @@
 import logging
-from fastapi import FastAPI
+from functools import partial
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from routes import social_router, article_router, image_router
+from routes import social_router, article_router, image_router, jobs_router, batch_router
+from routes.social.router import run_social_job
+from routes.dependencies import init_controllers
+from core.executor import worker_pools
+from core.jobs import job_queue
+from core.metrics import metrics
+from core.usage import usage_meter
+from core.security import verify_api_key
+from core.config import WARM_UP_ON_STARTUP
 
 # Configure logging
 logging.basicConfig(
@@ -10,11 +20,24 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop shared resources"""
+    init_controllers(app.state)
+    if WARM_UP_ON_STARTUP:
+        await worker_pools.run('article', app.state.groq.warm_up)
+    job_queue.register('social', partial(run_social_job, app.state.social_controller))
+    job_queue.start()
+    yield
+    await job_queue.stop()
+    worker_pools.shutdown(wait=False)
+
 # Create FastAPI app
 app = FastAPI(
     title="Recipe Scraper API",
     description="Extract recipes from social media, articles, and images",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -30,6 +53,8 @@ app.add_middleware(
 app.include_router(social_router)
 app.include_router(article_router)
 app.include_router(image_router)
+app.include_router(jobs_router)
+app.include_router(batch_router)
 
 @app.get("/")
 async def root():
@@ -40,7 +65,10 @@ async def root():
         "endpoints": {
             "social": "/scrape/social",
             "article": "/scrape/article",
-            "image": "/scrape/image"
+            "image": "/scrape/image",
+            "batch": "/extract-recipe/batch",
+            "jobs": "/jobs/{job_id}",
+            "usage": "/usage"
         }
     }
 
@@ -49,6 +77,22 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics(api_key: str = Depends(verify_api_key)):
+    """In-process counters (coalesced requests, cache hits, ...)"""
+    return metrics.snapshot()
+
+@app.get("/usage")
+async def get_usage(api_key: str = Depends(verify_api_key)):
+    """Resources used by this API key in the current quota window, with budgets"""
+    return await worker_pools.run('lookups', usage_meter.usage, api_key)
+
+@app.post("/warmup")
+async def warmup(request: Request, api_key: str = Depends(verify_api_key)):
+    """Re-open the Groq connection pool (e.g. after a long idle period)"""
+    warmed = await worker_pools.run('article', request.app.state.groq.warm_up)
+    return {"warmed_up": warmed}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,210 @@
+import math
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Optional
+from fastapi import HTTPException
+
+from core.metrics import metrics
+from core.config import ADMISSION_LIMITS, ADMISSION_MAX_QUEUE, ADMISSION_DEADLINE
+
+logger = logging.getLogger(__name__)
+
+# Longest the current request may wait for any one stage. Worker pools copy
+# the context, so stage calls in pool threads see the limit of the request
+# that started them. None (background jobs) waits as long as it takes.
+_max_wait: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('admission_max_wait', default=None)
+
+# Innermost stage slot held by the current call, so it can be given up
+# while the call is blocked on something else (see AdmissionControl.released)
+_held: contextvars.ContextVar[Optional['_Hold']] = contextvars.ContextVar('admission_held', default=None)
+
+class Overloaded(HTTPException):
+    """A stage is saturated; the request is refused with 503 and Retry-After"""
+    
+    def __init__(self, stage: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy ({stage}), retry later",
+            headers={'Retry-After': str(max(1, math.ceil(retry_after)))}
+        )
+        self.stage = stage
+
+class StageGate:
+    """
+    Concurrency limit with a bounded wait queue for one pipeline stage
+    
+    Service time is tracked as a moving average, so the wait for a new
+    arrival can be estimated from the queue ahead of it. Callers with a
+    deadline are refused immediately when the queue is full or the
+    estimate runs past the deadline, instead of waiting and timing out.
+    """
+    
+    SMOOTHING = 0.2
+    
+    def __init__(self, stage: str, limit: int, max_queue: int):
+        self.stage = stage
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.service_time: Optional[float] = None
+        self._cond = threading.Condition()
+        
+        metrics.register_gauge(f"admission.{stage}.active", lambda: self.active)
+        metrics.register_gauge(f"admission.{stage}.waiting", lambda: self.waiting)
+        metrics.register_gauge(f"admission.{stage}.estimated_wait", lambda: round(self.estimated_wait(), 3))
+    
+    def estimated_wait(self, ahead: Optional[int] = None) -> float:
+        """Seconds a new arrival would wait, with `ahead` callers queued before it"""
+        ahead = self.waiting if ahead is None else ahead
+        if self.active + ahead < self.limit or not self.service_time:
+            return 0.0
+        # With every slot busy, one frees up about every service_time / limit seconds
+        return (ahead + 1) * self.service_time / self.limit
+    
+    def check(self, deadline: Optional[float], backlog: int = 0) -> None:
+        """Raise Overloaded if a caller arriving now would not be admitted in time"""
+        if deadline is None:
+            return
+        ahead = self.waiting + backlog
+        estimate = self.estimated_wait(ahead)
+        if ahead >= self.max_queue:
+            self._shed('queue full', estimate)
+        if time.monotonic() + estimate > deadline:
+            self._shed('estimated wait past deadline', estimate)
+    
+    @contextmanager
+    def slot(self, deadline: Optional[float] = None):
+        """Hold one of the stage's slots for the duration of the block"""
+        self._acquire(deadline)
+        hold = _Hold(self)
+        token = _held.set(hold)
+        try:
+            yield
+        finally:
+            _held.reset(token)
+            if hold.held:
+                self._release(hold.busy + time.monotonic() - hold.start)
+    
+    def _acquire(self, deadline: Optional[float]) -> None:
+        start = time.monotonic()
+        with self._cond:
+            if self.active >= self.limit or self.waiting:
+                self.check(deadline)
+                self.waiting += 1
+                try:
+                    while self.active >= self.limit:
+                        timeout = None if deadline is None else deadline - time.monotonic()
+                        if timeout is not None and timeout <= 0:
+                            self._shed('deadline passed while queued', self.estimated_wait())
+                        self._cond.wait(timeout)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+        metrics.observe(f"admission.{self.stage}.wait", time.monotonic() - start)
+    
+    def _release(self, seconds: Optional[float]) -> None:
+        """Free a slot; seconds is the time it was in use (None: not a finished call)"""
+        with self._cond:
+            self.active -= 1
+            if seconds is not None:
+                self.service_time = (seconds if self.service_time is None
+                                     else self.service_time + self.SMOOTHING * (seconds - self.service_time))
+            self._cond.notify()
+    
+    def _shed(self, reason: str, estimate: float) -> None:
+        metrics.incr(f"admission.{self.stage}.shed")
+        logger.warning(
+            f"Shedding {self.stage} call: {reason} "
+            f"({self.active} active, {self.waiting} waiting, ~{estimate:.1f}s wait)"
+        )
+        raise Overloaded(self.stage, estimate)
+
+class _Hold:
+    """One slot held by a call; time spent released does not count as service time"""
+    
+    def __init__(self, gate: StageGate):
+        self.gate = gate
+        self.thread = threading.get_ident()
+        self.start = time.monotonic()
+        self.busy = 0.0
+        self.held = True
+
+class AdmissionControl:
+    """Per-stage gates (metadata, download, transcription, llm, ocr) and request deadlines"""
+    
+    def __init__(self, limits: Dict[str, int] = ADMISSION_LIMITS,
+                 max_queue: int = ADMISSION_MAX_QUEUE, deadline: float = ADMISSION_DEADLINE):
+        self.timeout = deadline
+        self.gates = {
+            stage: StageGate(stage, limit, max_queue)
+            for stage, limit in limits.items() if limit > 0
+        }
+    
+    @contextmanager
+    def deadline(self, seconds: Optional[float] = None):
+        """Stage calls started inside this block wait at most `seconds` to be admitted"""
+        token = _max_wait.set(seconds or self.timeout)
+        try:
+            yield
+        finally:
+            _max_wait.reset(token)
+    
+    def wait_deadline(self) -> Optional[float]:
+        """Monotonic deadline for a wait starting now (None without a limit)"""
+        max_wait = _max_wait.get()
+        return None if max_wait is None else time.monotonic() + max_wait
+    
+    def slot(self, stage: str) -> ContextManager:
+        """Hold a slot of `stage`, waiting at most the current request's limit"""
+        gate = self.gates.get(stage)
+        return gate.slot(self.wait_deadline()) if gate else nullcontext()
+    
+    @contextmanager
+    def released(self):
+        """
+        Give up the current stage slot for the duration of the block
+        
+        For waits on something other than the stage itself (Groq rate limits,
+        retry backoff), so queued callers, interactive ones included, can use
+        the slot meanwhile. The slot is taken back, within the request's wait
+        limit, at the end of the block.
+        """
+        hold = _held.get()
+        if hold is None or not hold.held or hold.thread != threading.get_ident():
+            yield
+            return
+        
+        hold.busy += time.monotonic() - hold.start
+        hold.held = False
+        hold.gate._release(None)
+        try:
+            yield
+        finally:
+            hold.gate._acquire(self.wait_deadline())
+            hold.held = True
+            hold.start = time.monotonic()
+    
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        """Return func run inside a slot of `stage`"""
+        def admitted(*args, **kwargs):
+            with self.slot(stage):
+                return func(*args, **kwargs)
+        return admitted
+    
+    def check(self, stage: str, backlog: int = 0) -> None:
+        """
+        Fail fast before starting work whose first stage is saturated
+        
+        Call it after the cache lookup, so hits are never shed. backlog
+        counts calls already queued for the stage elsewhere (e.g. waiting
+        for a worker pool thread). Without a request limit nothing is shed.
+        """
+        gate = self.gates.get(stage)
+        if gate:
+            gate.check(self.wait_deadline(), backlog)
+
+admission = AdmissionControl()
\ No newline at end of file
@@ -0,0 +1,312 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from core.metrics import metrics
+from core.config import (
+    CACHE_DB_PATH, CACHE_MEMORY_TTL,
+    RESULT_CACHE_TTL, RESULT_CACHE_MEMORY_ENTRIES, RESULT_CACHE_DISK_ENTRIES,
+    IMAGE_CACHE_TTL, IMAGE_CACHE_MEMORY_ENTRIES, IMAGE_CACHE_DISK_ENTRIES, IMAGE_CACHE_DISK_BYTES,
+    TRANSCRIPT_CACHE_TTL, TRANSCRIPT_CACHE_MEMORY_ENTRIES, TRANSCRIPT_CACHE_DISK_ENTRIES,
+    LLM_CACHE_TTL, LLM_CACHE_MEMORY_ENTRIES, LLM_CACHE_DISK_ENTRIES
+)
+
+logger = logging.getLogger(__name__)
+
+class CachePolicy:
+    """Per-request cache behaviour derived from a Cache-Control header"""
+
+    def __init__(self, read: bool = True, write: bool = True):
+        self.read = read
+        self.write = write
+
+    @classmethod
+    def from_header(cls, value: Optional[str]) -> 'CachePolicy':
+        """
+        Parse Cache-Control directives
+
+        no-store: bypass the cache entirely (no read, no write)
+        no-cache: ignore cached entries but store the fresh result (refresh)
+        """
+        directives = {d.strip().lower() for d in (value or '').split(',')}
+        if 'no-store' in directives:
+            return cls(read=False, write=False)
+        if 'no-cache' in directives:
+            return cls(read=False, write=True)
+        return cls()
+
+class TieredCache:
+    """
+    Two-tier JSON cache with TTL and LRU eviction
+
+    The memory tier is a per-process LRU. The disk tier is a SQLite table
+    that survives restarts and is shared by every uvicorn worker using the
+    same database file. Entries are looked up in memory first, then on disk
+    (promoting disk hits back into memory). A memory entry is served for at
+    most memory_ttl seconds before it is read from disk again, so a refresh
+    written by another worker replaces stale copies within that time.
+
+    The database is opened on first use, not at import. Disk limits are
+    enforced every EVICT_EVERY writes, so the disk tier may briefly run
+    that many entries over them.
+    """
+
+    EVICT_EVERY = 100
+
+    def __init__(self, namespace: str, ttl: float, memory_entries: int,
+                 disk_entries: int, disk_bytes: Optional[int] = None,
+                 db_path: Path = CACHE_DB_PATH, memory_ttl: float = CACHE_MEMORY_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.memory_ttl = memory_ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.disk_bytes = disk_bytes
+        self.db_path = db_path
+
+        self._memory: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._opened = False
+        self._writes = 0
+
+    @property
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Disk tier connection, opened on first use (None if unavailable)"""
+        if not self._opened:
+            with self._open_lock:
+                if not self._opened:
+                    self._conn = self._init_db()
+                    self._opened = True
+        return self._conn
+
+    def _init_db(self) -> Optional[sqlite3.Connection]:
+        """Open the shared SQLite database (disk tier)"""
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)")
+            db.commit()
+            return db
+        except Exception as e:
+            logger.error(f"Cache database unavailable, using memory only: {e}")
+            return None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value or None if missing or expired"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    metrics.incr(f"cache.{self.namespace}.memory_hits")
+                    logger.debug(f"Cache [{self.namespace}] memory hit: {key}")
+                    return value
+                del self._memory[key]
+
+        value, expires_at = self._disk_get(key, now)
+        if value is None:
+            metrics.incr(f"cache.{self.namespace}.misses")
+            return None
+
+        metrics.incr(f"cache.{self.namespace}.disk_hits")
+        logger.debug(f"Cache [{self.namespace}] disk hit: {key}")
+        self._memory_set(key, value, expires_at)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serializable value in both tiers"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        self._memory_set(key, value, expires_at)
+        self._disk_set(key, value, expires_at)
+
+    def delete(self, key: str) -> None:
+        """Remove a key from both tiers"""
+        with self._lock:
+            self._memory.pop(key, None)
+
+        if not self._db:
+            return
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Cache delete failed: {e}")
+
+    def clear(self) -> None:
+        """Drop every entry in this namespace"""
+        with self._lock:
+            self._memory.clear()
+
+        if not self._db:
+            return
+        with self._db_lock:
+            try:
+                self._db.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Cache clear failed: {e}")
+
+    def _memory_set(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        # Without a disk tier memory is the only copy, so it keeps the full TTL
+        if self._db and self.memory_ttl:
+            refresh_at = time.time() + self.memory_ttl
+            expires_at = refresh_at if expires_at is None else min(expires_at, refresh_at)
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Tuple[Optional[Any], Optional[float]]:
+        if not self._db:
+            return None, None
+
+        with self._db_lock:
+            try:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+                if not row:
+                    return None, None
+
+                value, expires_at = row
+                if expires_at is not None and expires_at <= now:
+                    self._db.execute(
+                        "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                        (self.namespace, key)
+                    )
+                    self._db.commit()
+                    return None, None
+
+                self._db.execute(
+                    "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key)
+                )
+                self._db.commit()
+                return json.loads(value), expires_at
+            except Exception as e:
+                logger.warning(f"Cache read failed: {e}")
+                return None, None
+
+    def _disk_set(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        if not self._db:
+            return
+
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Value not cacheable: {e}")
+            return
+
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.namespace, key, payload, len(payload), expires_at, time.time())
+                )
+                self._writes += 1
+                if self._writes % self.EVICT_EVERY == 0:
+                    self._evict()
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Cache write failed: {e}")
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones over the limits"""
+        self._db.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (self.namespace, time.time())
+        )
+
+        count, total = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()
+
+        excess = max(0, count - self.disk_entries)
+        if excess:
+            self._db.execute("""
+                DELETE FROM cache WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache WHERE namespace = ?
+                    ORDER BY accessed_at LIMIT ?
+                )
+            """, (self.namespace, self.namespace, excess))
+
+        if self.disk_bytes and total > self.disk_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at",
+                (self.namespace,)
+            )
+            victims = []
+            for key, size in rows:
+                if total <= self.disk_bytes:
+                    break
+                victims.append((self.namespace, key))
+                total -= size
+            self._db.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", victims)
+
+result_cache = TieredCache(
+    'social_result',
+    ttl=RESULT_CACHE_TTL,
+    memory_entries=RESULT_CACHE_MEMORY_ENTRIES,
+    disk_entries=RESULT_CACHE_DISK_ENTRIES
+)
+
+ocr_cache = TieredCache(
+    'ocr',
+    ttl=IMAGE_CACHE_TTL,
+    memory_entries=IMAGE_CACHE_MEMORY_ENTRIES,
+    disk_entries=IMAGE_CACHE_DISK_ENTRIES,
+    disk_bytes=IMAGE_CACHE_DISK_BYTES
+)
+
+image_result_cache = TieredCache(
+    'image_result',
+    ttl=IMAGE_CACHE_TTL,
+    memory_entries=IMAGE_CACHE_MEMORY_ENTRIES,
+    disk_entries=IMAGE_CACHE_DISK_ENTRIES,
+    disk_bytes=IMAGE_CACHE_DISK_BYTES
+)
+
+transcript_cache = TieredCache(
+    'transcript',
+    ttl=TRANSCRIPT_CACHE_TTL,
+    memory_entries=TRANSCRIPT_CACHE_MEMORY_ENTRIES,
+    disk_entries=TRANSCRIPT_CACHE_DISK_ENTRIES
+)
+
+llm_cache = TieredCache(
+    'llm',
+    ttl=LLM_CACHE_TTL,
+    memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+    disk_entries=LLM_CACHE_DISK_ENTRIES
+)
@@ -1,5 +1,6 @@
 # ===== core/config.py =====
 import os
+import json
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -19,5 +20,136 @@ MAX_OCR_TEXT_LENGTH = 15000
 DOWNLOAD_DIR = Path("downloads")
 DOWNLOAD_DIR.mkdir(exist_ok=True)
 
-RATE_LIMIT_REQUESTS = 100
-RATE_LIMIT_WINDOW = 3600
\ No newline at end of file
+RATE_LIMIT_REQUESTS = int(os.getenv('RATE_LIMIT_REQUESTS', 100))
+RATE_LIMIT_WINDOW = int(os.getenv('RATE_LIMIT_WINDOW', 3600))
+
+# Worker pools for the blocking extraction pipelines
+SOCIAL_WORKERS = int(os.getenv('SOCIAL_WORKERS', 8))
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 4))
+ARTICLE_WORKERS = int(os.getenv('ARTICLE_WORKERS', 4))
+# Cache lookups and other short blocking I/O (SQLite stores, DNS) kept off the event loop
+LOOKUP_WORKERS = int(os.getenv('LOOKUP_WORKERS', 8))
+
+
+# Shared Groq connection pool
+GROQ_MAX_CONNECTIONS = int(os.getenv('GROQ_MAX_CONNECTIONS', 20))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv('GROQ_KEEPALIVE_EXPIRY', 300))
+WARM_UP_ON_STARTUP = os.getenv('WARM_UP_ON_STARTUP', 'true').lower() == 'true'
+
+# Groq throughput scheduler: retries on 429/5xx with jittered exponential
+# backoff, and optional local requests-per-minute pacing per model (0 = off)
+GROQ_MAX_RETRIES = int(os.getenv('GROQ_MAX_RETRIES', 4))
+GROQ_BACKOFF_BASE = float(os.getenv('GROQ_BACKOFF_BASE', 0.5))
+GROQ_BACKOFF_MAX = float(os.getenv('GROQ_BACKOFF_MAX', 30))
+GROQ_RPM = int(os.getenv('GROQ_RPM', 0))
+
+# Result cache (memory LRU + shared SQLite tier)
+CACHE_DIR = Path(os.getenv('CACHE_DIR', 'cache'))
+CACHE_DB_PATH = CACHE_DIR / 'cache.db'
+# Seconds a memory-tier entry is served before it is checked against the shared tier
+CACHE_MEMORY_TTL = float(os.getenv('CACHE_MEMORY_TTL', 60))
+RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', 7 * 24 * 3600))
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv('RESULT_CACHE_MEMORY_ENTRIES', 1000))
+RESULT_CACHE_DISK_ENTRIES = int(os.getenv('RESULT_CACHE_DISK_ENTRIES', 50000))
+
+
+# Image OCR / extraction cache
+IMAGE_CACHE_TTL = int(os.getenv('IMAGE_CACHE_TTL', 30 * 24 * 3600))
+IMAGE_CACHE_MEMORY_ENTRIES = int(os.getenv('IMAGE_CACHE_MEMORY_ENTRIES', 1000))
+IMAGE_CACHE_DISK_ENTRIES = int(os.getenv('IMAGE_CACHE_DISK_ENTRIES', 100000))
+IMAGE_CACHE_DISK_BYTES = int(os.getenv('IMAGE_CACHE_DISK_BYTES', 256 * 1024 * 1024))
+IMAGE_PERCEPTUAL_HASH = os.getenv('IMAGE_PERCEPTUAL_HASH', 'false').lower() == 'true'
+
+# Transcript cache, keyed by (platform, media_id)
+TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', 90 * 24 * 3600))
+TRANSCRIPT_CACHE_MEMORY_ENTRIES = int(os.getenv('TRANSCRIPT_CACHE_MEMORY_ENTRIES', 2000))
+TRANSCRIPT_CACHE_DISK_ENTRIES = int(os.getenv('TRANSCRIPT_CACHE_DISK_ENTRIES', 200000))
+
+# LLM recipe extraction memo
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 30 * 24 * 3600))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', 1000))
+LLM_CACHE_DISK_ENTRIES = int(os.getenv('LLM_CACHE_DISK_ENTRIES', 50000))
+
+# Audio buffering: keep downloads in memory, spilling to disk above the threshold
+AUDIO_IN_MEMORY = os.getenv('AUDIO_IN_MEMORY', 'true').lower() == 'true'
+AUDIO_SPOOL_MAX_BYTES = int(os.getenv('AUDIO_SPOOL_MAX_BYTES', 32 * 1024 * 1024))
+
+# Audio preprocessing before Whisper upload (requires ffmpeg)
+AUDIO_PREPROCESS = os.getenv('AUDIO_PREPROCESS', 'true').lower() == 'true'
+AUDIO_PREPROCESS_BITRATE = os.getenv('AUDIO_PREPROCESS_BITRATE', '24k')
+AUDIO_TRIM_SILENCE_DB = int(os.getenv('AUDIO_TRIM_SILENCE_DB', -50))
+AUDIO_TRIM_TAIL_MAX_SECONDS = int(os.getenv('AUDIO_TRIM_TAIL_MAX_SECONDS', 900))
+AUDIO_UPLOAD_BYTES_PER_SEC = int(os.getenv('AUDIO_UPLOAD_BYTES_PER_SEC', 1_500_000))
+
+# Chunked transcription for long audio
+WHISPER_MAX_UPLOAD_BYTES = int(os.getenv('WHISPER_MAX_UPLOAD_BYTES', 25 * 1024 * 1024))
+TRANSCRIBE_CHUNK_SECONDS = int(os.getenv('TRANSCRIBE_CHUNK_SECONDS', 300))
+TRANSCRIBE_CHUNK_OVERLAP = int(os.getenv('TRANSCRIBE_CHUNK_OVERLAP', 5))
+TRANSCRIBE_MAX_PARALLEL = int(os.getenv('TRANSCRIBE_MAX_PARALLEL', 6))
+TRANSCRIBE_WORKERS = int(os.getenv('TRANSCRIBE_WORKERS', 16))
+
+# Carousel items processed concurrently (per request / process-wide)
+CAROUSEL_MAX_PARALLEL = int(os.getenv('CAROUSEL_MAX_PARALLEL', 4))
+CAROUSEL_WORKERS = int(os.getenv('CAROUSEL_WORKERS', 16))
+
+# Overlapping pipeline stages inside one social extraction
+STAGE_WORKERS = int(os.getenv('STAGE_WORKERS', 32))
+# Start instaloader alongside yt-dlp for Instagram (off: only when yt-dlp's result is missing data)
+SPECULATIVE_INSTALOADER = os.getenv('SPECULATIVE_INSTALOADER', 'false').lower() == 'true'
+
+# YouTube caption downloads (tracks fetched at once / shared connection pool)
+CAPTION_MAX_PARALLEL = int(os.getenv('CAPTION_MAX_PARALLEL', 4))
+CAPTION_WORKERS = int(os.getenv('CAPTION_WORKERS', 16))
+CAPTION_MAX_CONNECTIONS = int(os.getenv('CAPTION_MAX_CONNECTIONS', 16))
+CAPTION_TIMEOUT = float(os.getenv('CAPTION_TIMEOUT', 8))
+
+# Async jobs (persistent queue) and completion webhooks
+JOBS_DB_PATH = CACHE_DIR / 'jobs.db'
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 7 * 24 * 3600))
+WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', 10))
+WEBHOOK_RETRIES = int(os.getenv('WEBHOOK_RETRIES', 3))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+# Allow webhooks to private, loopback and link-local addresses (local development only)
+WEBHOOK_ALLOW_PRIVATE = os.getenv('WEBHOOK_ALLOW_PRIVATE', 'false').lower() == 'true'
+
+# Batch endpoint (items per request / default and maximum fan-out); every
+# item counts against the rate limit, so a batch can't exceed RATE_LIMIT_REQUESTS
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', RATE_LIMIT_REQUESTS))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 4))
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 16))
+
+# Server-Sent Events (comment line sent when no event for this long)
+SSE_KEEPALIVE_SECONDS = float(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+
+# Rate limiter state: memory (per process), sqlite (shared by local workers) or redis
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'sqlite').lower()
+RATE_LIMIT_DB_PATH = CACHE_DIR / 'rate_limit.db'
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))
+
+# Cost-based quotas per API key and window (0 = unlimited). QUOTA_KEY_BUDGETS
+# overrides them per key: {"<api key>": {"audio_seconds": 36000, ...}}
+USAGE_DB_PATH = CACHE_DIR / 'usage.db'
+QUOTA_WINDOW = int(os.getenv('QUOTA_WINDOW', 24 * 3600))
+QUOTA_BUDGETS = {
+    'audio_seconds': float(os.getenv('QUOTA_AUDIO_SECONDS', 0)),
+    'prompt_tokens': float(os.getenv('QUOTA_PROMPT_TOKENS', 0)),
+    'completion_tokens': float(os.getenv('QUOTA_COMPLETION_TOKENS', 0)),
+    'vision_calls': float(os.getenv('QUOTA_VISION_CALLS', 0)),
+}
+QUOTA_KEY_BUDGETS = json.loads(os.getenv('QUOTA_KEY_BUDGETS', '{}'))
+
+# Admission control: concurrent calls per pipeline stage (0 = unlimited), callers
+# allowed to wait per stage, and how long a request may wait for any one stage
+ADMISSION_LIMITS = {
+    'metadata': int(os.getenv('ADMISSION_METADATA', 8)),
+    'download': int(os.getenv('ADMISSION_DOWNLOAD', 6)),
+    'transcription': int(os.getenv('ADMISSION_TRANSCRIPTION', 8)),
+    'llm': int(os.getenv('ADMISSION_LLM', 8)),
+    'ocr': int(os.getenv('ADMISSION_OCR', 4)),
+}
+ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 32))
+ADMISSION_DEADLINE = float(os.getenv('ADMISSION_DEADLINE', 60))
\ No newline at end of file
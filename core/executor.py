@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List
+
+from core.metrics import metrics
+from core.config import (
+    SOCIAL_WORKERS, IMAGE_WORKERS, ARTICLE_WORKERS, TRANSCRIBE_WORKERS, CAROUSEL_WORKERS,
+    STAGE_WORKERS, CAPTION_WORKERS, LOOKUP_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+class WorkerPools:
+    """Named, bounded thread pools for the blocking extraction pipelines"""
+    
+    def __init__(self, sizes: Dict[str, int]):
+        self.sizes = sizes
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+    
+    def get(self, name: str) -> ThreadPoolExecutor:
+        """Return the pool for a pipeline, creating it on first use"""
+        with self._lock:
+            pool = self._pools.get(name)
+            if pool is None:
+                workers = self.sizes.get(name, 4)
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+                self._pools[name] = pool
+                metrics.register_gauge(f"pool.{name}.queued", lambda: self.queued(name))
+                logger.info(f"Started '{name}' worker pool with {workers} threads")
+            return pool
+    
+    def queued(self, name: str) -> int:
+        """Calls submitted to the named pool that are still waiting for a thread"""
+        with self._lock:
+            return self._pending[name]
+    
+    async def run(self, name: str, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the named pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(name, func, *args, **kwargs))
+    
+    def submit(self, name: str, func: Callable, *args, **kwargs) -> Future:
+        """Start a blocking call on the named pool (in the caller's context)"""
+        pool = self.get(name)
+        ctx = contextvars.copy_context()
+        waiting = [True]
+        
+        def started() -> None:
+            # Once per call: when a thread picks it up, or when it is cancelled before that
+            with self._lock:
+                if waiting[0]:
+                    waiting[0] = False
+                    self._pending[name] -= 1
+        
+        def call():
+            started()
+            return ctx.run(func, *args, **kwargs)
+        
+        with self._lock:
+            self._pending[name] += 1
+        future = pool.submit(call)
+        future.add_done_callback(lambda _: started())
+        return future
+    
+    def map_bounded(self, name: str, func: Callable, items: Iterable, limit: int) -> List[Any]:
+        """
+        Run func over items on the named pool from a worker thread
+        
+        At most `limit` calls from this invocation run at once, on top of the
+        pool's own global size. Results keep the input order; a call that
+        raised is returned as its exception so one failure doesn't affect
+        the others.
+        """
+        slots = threading.Semaphore(max(1, limit))
+        
+        def call(item):
+            try:
+                return func(item)
+            finally:
+                slots.release()
+        
+        futures = []
+        for item in items:
+            slots.acquire()
+            futures.append(self.submit(name, call, item))
+        
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down every pool that has been started"""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for name, pool in pools.items():
+            logger.info(f"Stopping '{name}' worker pool")
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+worker_pools = WorkerPools({
+    'social': SOCIAL_WORKERS,
+    'image': IMAGE_WORKERS,
+    'article': ARTICLE_WORKERS,
+    'stages': STAGE_WORKERS,
+    'carousel': CAROUSEL_WORKERS,
+    'transcription': TRANSCRIBE_WORKERS,
+    'captions': CAPTION_WORKERS,
+    'lookups': LOOKUP_WORKERS,
+})
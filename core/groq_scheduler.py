@@ -0,0 +1,284 @@
+import re
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+try:
+    from groq import APIConnectionError
+    GROQ_AVAILABLE = True
+except ImportError:
+    GROQ_AVAILABLE = False
+
+from core.metrics import metrics
+from core.admission import admission, Overloaded
+from core.config import GROQ_MAX_RETRIES, GROQ_BACKOFF_BASE, GROQ_BACKOFF_MAX, GROQ_RPM
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE, BACKGROUND = 0, 1
+
+# Priority of Groq calls made by the current request; batch items and queued
+# jobs run as BACKGROUND so interactive requests go first when budget is short
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar('groq_priority', default=INTERACTIVE)
+
+class ModelBudget:
+    """
+    What is left of one model's Groq rate limits
+    
+    Filled from the x-ratelimit-* response headers; until the first
+    response nothing is known and calls are not held back. Each call
+    reserves its share locally until its response arrives. A response's
+    numbers are applied minus the calls still in flight that started
+    after it (the server had not seen those yet), and responses older
+    than the last one applied are ignored.
+    """
+    
+    def __init__(self, model: str, rpm: int = GROQ_RPM):
+        self.model = model
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self.next_start = 0.0
+        self.requests_limit: Optional[float] = None
+        self.requests_remaining: Optional[float] = None
+        self.requests_reset = 0.0
+        self.tokens_limit: Optional[float] = None
+        self.tokens_remaining: Optional[float] = None
+        self.tokens_reset = 0.0
+        self.blocked_until = 0.0
+        self.waiters: List[Tuple[int, int]] = []
+        self.in_flight: Dict[int, int] = {}
+        self.applied = -1
+        self._seq = itertools.count()
+    
+    def wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a call needing `tokens` fits the budget (0 = now)"""
+        if self.requests_remaining is not None and now >= self.requests_reset:
+            self.requests_remaining = self.requests_limit
+        if self.tokens_remaining is not None and now >= self.tokens_reset:
+            self.tokens_remaining = self.tokens_limit
+        
+        waits = [self.blocked_until - now, self.next_start - now]
+        if self.requests_remaining is not None and self.requests_remaining < 1:
+            waits.append(self.requests_reset - now)
+        if self.tokens_remaining is not None and self.tokens_remaining < min(tokens, self.tokens_limit or tokens):
+            waits.append(self.tokens_reset - now)
+        return max(0.0, *waits)
+    
+    def reserve(self, tokens: int, now: float) -> int:
+        """Charge a call starting now; returns its reservation for update()"""
+        self.next_start = max(now, self.next_start) + self.interval
+        if self.requests_remaining is not None:
+            self.requests_remaining -= 1
+        if self.tokens_remaining is not None:
+            self.tokens_remaining -= tokens
+        reservation = next(self._seq)
+        self.in_flight[reservation] = tokens
+        return reservation
+    
+    def update(self, reservation: int, headers: Optional[Mapping[str, str]], now: float) -> None:
+        """Settle a finished call, taking the server's view of the budget from its headers"""
+        self.in_flight.pop(reservation, None)
+        if not headers or reservation < self.applied:
+            return
+        
+        # Calls started after this one were not counted by the server yet
+        later = [tokens for started, tokens in self.in_flight.items() if started > reservation]
+        applied = False
+        limit = _number(headers.get('x-ratelimit-limit-requests'))
+        remaining = _number(headers.get('x-ratelimit-remaining-requests'))
+        if limit is not None and remaining is not None:
+            self.requests_limit = limit
+            self.requests_remaining = remaining - len(later)
+            self.requests_reset = now + _duration(headers.get('x-ratelimit-reset-requests'))
+            applied = True
+        limit = _number(headers.get('x-ratelimit-limit-tokens'))
+        remaining = _number(headers.get('x-ratelimit-remaining-tokens'))
+        if limit is not None and remaining is not None:
+            self.tokens_limit = limit
+            self.tokens_remaining = remaining - sum(later)
+            self.tokens_reset = now + _duration(headers.get('x-ratelimit-reset-tokens'))
+            applied = True
+        if applied:
+            self.applied = reservation
+
+class GroqScheduler:
+    """
+    Shared pacing, retries and priorities for Groq API calls
+    
+    Calls wait until the model's request and token budget (as reported by
+    Groq) has room for them; while they wait, interactive calls are let
+    through before background ones. 429 and 5xx responses and connection
+    errors are retried with jittered exponential backoff, honoring
+    retry-after; a 429 pauses every caller of that model, not just the one
+    that got it.
+    """
+    
+    # Rough prompt size estimate before the call; the response headers correct it
+    CHARS_PER_TOKEN = 4
+    
+    def __init__(self, max_retries: int = GROQ_MAX_RETRIES,
+                 backoff_base: float = GROQ_BACKOFF_BASE, backoff_max: float = GROQ_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._budgets: Dict[str, ModelBudget] = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        
+        metrics.register_gauge('groq.waiting', lambda: sum(len(b.waiters) for b in self._budgets.values()))
+    
+    @contextmanager
+    def background(self):
+        """Run Groq calls started inside this block at background priority"""
+        token = _priority.set(BACKGROUND)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+    
+    @classmethod
+    def estimate_tokens(cls, text: str, max_tokens: int = 0) -> int:
+        """Tokens a call is charged up front: the prompt plus its completion cap"""
+        return len(text) // cls.CHARS_PER_TOKEN + max_tokens
+    
+    def call(self, create: Callable, tokens: int = 0, **kwargs) -> Any:
+        """
+        Make one Groq API call through the scheduler
+        
+        `create` is a `with_raw_response.create` method, so the rate-limit
+        headers can be read before the parsed result is returned; kwargs
+        (including `model`, which selects the budget) are passed on. Raises
+        Overloaded if it is still throttled after the last retry, or if
+        waiting for budget or a retry would exceed the request's wait limit.
+        Without a wait limit (queued jobs) a 429 is retried until it clears.
+        """
+        model = kwargs['model']
+        for attempt in itertools.count():
+            reservation = self.acquire(model, tokens)
+            start = time.monotonic()
+            try:
+                raw = create(**kwargs)
+            except Exception as e:
+                delay = self._retry_delay(model, reservation, e, attempt)
+                if delay is None:
+                    raise
+                throttled = getattr(e, 'status_code', None) == 429
+                deadline = admission.wait_deadline()
+                if deadline is None:
+                    give_up = attempt >= self.max_retries and not throttled
+                else:
+                    give_up = attempt >= self.max_retries or time.monotonic() + delay > deadline
+                if give_up:
+                    if throttled:
+                        raise Overloaded('groq', delay) from e
+                    raise
+                metrics.incr(f"groq.{model}.retries")
+                logger.warning(f"Groq {model} call failed ({e}), retry {attempt + 1} in {delay:.1f}s")
+                with admission.released():
+                    time.sleep(delay)
+                continue
+            
+            metrics.observe(f"groq.{model}", time.monotonic() - start)
+            self._update(model, reservation, raw.headers)
+            return raw.parse()
+    
+    def acquire(self, model: str, tokens: int = 0) -> int:
+        """
+        Wait until the model's budget has room, higher priority callers first
+        
+        A caller that has to wait gives up its stage slot meanwhile, so the
+        slot goes to whoever can use it instead of being held idle. Returns
+        the budget reservation, to be settled with the call's response.
+        """
+        start = time.monotonic()
+        with self._cond:
+            budget = self._budget(model)
+            now = time.monotonic()
+            if not budget.waiters and budget.wait_time(tokens, now) == 0:
+                metrics.observe(f"groq.{model}.wait", 0.0)
+                return budget.reserve(tokens, now)
+        
+        with admission.released():
+            reservation = self._wait(model, tokens)
+        metrics.observe(f"groq.{model}.wait", time.monotonic() - start)
+        return reservation
+    
+    def _wait(self, model: str, tokens: int) -> int:
+        ticket = (_priority.get(), next(self._seq))
+        deadline = admission.wait_deadline()
+        with self._cond:
+            budget = self._budget(model)
+            heapq.heappush(budget.waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = budget.wait_time(tokens, now)
+                    if wait == 0 and budget.waiters[0] == ticket:
+                        break
+                    if deadline is not None and now + wait > deadline:
+                        # Would wait longer than the request allows: shed it now
+                        metrics.incr(f"groq.{model}.shed")
+                        raise Overloaded('groq', wait)
+                    self._cond.wait(wait or None)
+                return budget.reserve(tokens, now)
+            finally:
+                budget.waiters.remove(ticket)
+                heapq.heapify(budget.waiters)
+                self._cond.notify_all()
+    
+    def _budget(self, model: str) -> ModelBudget:
+        budget = self._budgets.get(model)
+        if budget is None:
+            budget = self._budgets[model] = ModelBudget(model)
+        return budget
+    
+    def _update(self, model: str, reservation: int, headers: Optional[Mapping[str, str]]) -> None:
+        with self._cond:
+            self._budget(model).update(reservation, headers, time.monotonic())
+            self._cond.notify_all()
+    
+    def _retry_delay(self, model: str, reservation: int, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is not retryable"""
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+        self._update(model, reservation, headers)
+        
+        status = getattr(error, 'status_code', None)
+        connection_error = GROQ_AVAILABLE and isinstance(error, APIConnectionError)
+        if not (status == 429 or (status and status >= 500) or connection_error):
+            return None
+        
+        # Full jitter keeps retries from many callers from arriving together
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** min(attempt, 32)))
+        retry_after = _number((headers or {}).get('retry-after'))
+        delay = retry_after + random.uniform(0, self.backoff_base) if retry_after is not None else backoff
+        
+        if status == 429:
+            metrics.incr(f"groq.{model}.throttled")
+            with self._cond:
+                budget = self._budget(model)
+                budget.blocked_until = max(budget.blocked_until, time.monotonic() + delay)
+        return delay
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNITS = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+
+def _duration(value: Optional[str]) -> float:
+    """Seconds in a Groq reset header, e.g. 2m59.56s or 120ms"""
+    if not value:
+        return 0.0
+    if _number(value) is not None:
+        return float(value)
+    return sum(float(amount) * _UNITS[unit] for amount, unit in _DURATION.findall(value))
+
+groq_scheduler = GroqScheduler()
\ No newline at end of file
@@ -0,0 +1,390 @@
+import os
+import hmac
+import json
+import time
+import uuid
+import socket
+import asyncio
+import hashlib
+import sqlite3
+import logging
+import ipaddress
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from core import progress
+from core.metrics import metrics
+from core.security import api_key_id
+from core.usage import usage_meter
+from core.executor import worker_pools
+from core.groq_scheduler import groq_scheduler
+from core.config import (
+    JOBS_DB_PATH, JOB_WORKERS, JOB_POLL_INTERVAL, JOB_MAX_ATTEMPTS, JOB_RESULT_TTL,
+    WEBHOOK_TIMEOUT, WEBHOOK_RETRIES, WEBHOOK_SECRET, WEBHOOK_ALLOW_PRIVATE
+)
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict], Awaitable[Optional[Dict]]]
+
+class JobStore:
+    """
+    Persistent job table (SQLite)
+    
+    Jobs move queued -> running -> done | failed. A job is claimed by one
+    process at a time; jobs left running by a process that no longer
+    exists go back to the queue, so queued work survives restarts. The
+    database is opened on first use, not at import.
+    """
+    
+    def __init__(self, db_path: Path = JOBS_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Job database, opened on first use"""
+        if self._conn is None:
+            with self._open_lock:
+                if self._conn is None:
+                    self._conn = self._init_db()
+        return self._conn
+    
+    def _init_db(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT,
+                result TEXT,
+                error TEXT,
+                webhook_url TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_pid INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, created_at)")
+        return db
+    
+    def create(self, kind: str, api_key: str, payload: Dict, webhook_url: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, owner, payload, status, webhook_url, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, api_key_id(api_key), json.dumps(payload), webhook_url, now, now)
+            )
+        metrics.incr(f"jobs.{kind}.queued")
+        return job_id
+    
+    def get(self, job_id: str, api_key: Optional[str] = None) -> Optional[Dict]:
+        """Public view of a job; None if missing or owned by another key"""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row or (api_key is not None and row['owner'] != api_key_id(api_key)):
+            return None
+        return self._view(row)
+    
+    def claim(self) -> Optional[Dict]:
+        """Atomically take the oldest queued job"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', stage = 'started', attempts = attempts + 1, "
+                        "worker_pid = ?, updated_at = ? WHERE id = ?",
+                        (os.getpid(), time.time(), row['id'])
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        if not row:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['attempts'] += 1
+        return job
+    
+    def set_stage(self, job_id: str, stage: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+                (stage, time.time(), job_id)
+            )
+    
+    def finish(self, job_id: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        status = 'failed' if error else 'done'
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, stage = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+    
+    def requeue_orphans(self) -> int:
+        """Put back running jobs whose worker process is gone (crash or restart)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, worker_pid, attempts FROM jobs WHERE status = 'running'"
+            ).fetchall()
+            orphans = [r for r in rows if not self._alive(r['worker_pid'])]
+            for row in orphans:
+                if row['attempts'] >= JOB_MAX_ATTEMPTS:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'failed', stage = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                        ("Interrupted too many times", time.time(), row['id'])
+                    )
+                else:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'queued', stage = NULL, worker_pid = NULL, updated_at = ? WHERE id = ?",
+                        (time.time(), row['id'])
+                    )
+        if orphans:
+            logger.info(f"Recovered {len(orphans)} interrupted job(s)")
+        return len(orphans)
+    
+    def purge(self) -> None:
+        """Drop finished jobs older than JOB_RESULT_TTL"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - JOB_RESULT_TTL,)
+            )
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+    
+    @staticmethod
+    def _alive(pid: Optional[int]) -> bool:
+        if not pid or pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+    
+    @staticmethod
+    def _view(row: sqlite3.Row) -> Dict:
+        return {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'stage': row['stage'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+
+class JobQueue:
+    """
+    Background runner for queued jobs
+    
+    JOB_WORKERS asyncio workers per process take jobs from the store and
+    run the handler registered for the job kind. Pipeline stages reported
+    through core.progress are written to the job as it runs. The queue is
+    also polled, so jobs submitted to another uvicorn worker are picked up.
+    Store calls from the event loop run on the lookups pool; the queued and
+    running gauges show the counts read by the last poll.
+    """
+    
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS):
+        self.store = store
+        self.workers = workers
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._counts: Dict[str, int] = {}
+        # Latest stage reported by each running job, written on the lookups pool
+        self._stages: Dict[str, str] = {}
+        metrics.register_gauge('jobs.queued', lambda: self._counts.get('queued', 0))
+        metrics.register_gauge('jobs.running', lambda: self._counts.get('running', 0))
+    
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+    
+    async def submit(self, kind: str, api_key: str, payload: Dict, webhook_url: Optional[str] = None) -> str:
+        """Queue a job and return its ID (400 if the webhook URL is not allowed)"""
+        if webhook_url:
+            await worker_pools.run('lookups', check_webhook_url, webhook_url)
+        job_id = await worker_pools.run('lookups', self.store.create, kind, api_key, payload, webhook_url)
+        if self._wakeup:
+            self._wakeup.set()
+        logger.info(f"Queued {kind} job {job_id}")
+        return job_id
+    
+    def start(self) -> None:
+        self.store.requeue_orphans()
+        self.store.purge()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} job workers")
+    
+    async def get(self, job_id: str, api_key: Optional[str] = None) -> Optional[Dict]:
+        """Public view of a job; None if missing or owned by another key"""
+        return await worker_pools.run('lookups', self.store.get, job_id, api_key)
+    
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job = await worker_pools.run('lookups', self.store.claim)
+                self._counts = await worker_pools.run('lookups', self.store.counts)
+            except Exception as e:
+                logger.error(f"Job claim failed: {e}")
+                job = None
+            
+            if not job:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self._run(job)
+    
+    async def _run(self, job: Dict) -> None:
+        job_id, kind = job['id'], job['kind']
+        handler = self._handlers.get(kind)
+        logger.info(f"Running {kind} job {job_id} (attempt {job['attempts']})")
+        start = time.monotonic()
+        
+        result, error = None, None
+        if not handler:
+            error = f"No handler for job kind '{kind}'"
+        else:
+            try:
+                with progress.listen(lambda event, data: self._on_progress(job_id, event, data)), \
+                        usage_meter.attribute(job['owner']), groq_scheduler.background():
+                    result = await handler(job['payload'])
+                if not result:
+                    error = "Extraction failed"
+            except asyncio.CancelledError:
+                # Shutting down: leave the job running so the next start requeues it
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                error = str(e)
+        
+        self._stages.pop(job_id, None)
+        await worker_pools.run('lookups', self.store.finish, job_id, result, error)
+        metrics.incr(f"jobs.{kind}.{'failed' if error else 'done'}")
+        metrics.observe(f"jobs.{kind}", time.monotonic() - start)
+        
+        if job.get('webhook_url'):
+            await self._notify(job['webhook_url'], await self.get(job_id))
+    
+    def _on_progress(self, job_id: str, event: str, data: Dict) -> None:
+        # Reported from any thread, the event loop included, so the write is
+        # handed to the lookups pool; it stores whatever stage is latest then
+        if event == 'stage':
+            self._stages[job_id] = data['stage']
+            worker_pools.submit('lookups', self._write_stage, job_id)
+    
+    def _write_stage(self, job_id: str) -> None:
+        stage = self._stages.get(job_id)
+        if not stage:
+            return
+        try:
+            self.store.set_stage(job_id, stage)
+        except Exception as e:
+            logger.warning(f"Job {job_id} stage update failed: {e}")
+    
+    async def _notify(self, url: str, job: Dict) -> None:
+        """POST the finished job to its webhook, retrying with backoff"""
+        try:
+            # Checked again: the host may resolve differently than at submit time
+            await worker_pools.run('lookups', check_webhook_url, url)
+        except HTTPException as e:
+            logger.warning(f"Webhook {url} refused: {e.detail}")
+            metrics.incr('jobs.webhook.refused')
+            return
+        
+        body = json.dumps(job).encode()
+        headers = {'Content-Type': 'application/json'}
+        if WEBHOOK_SECRET:
+            signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+            headers['X-Signature-SHA256'] = signature
+        
+        # Redirects are not followed, so a public URL can't bounce the POST inward
+        async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT, follow_redirects=False) as client:
+            for attempt in range(1, WEBHOOK_RETRIES + 1):
+                try:
+                    response = await client.post(url, content=body, headers=headers)
+                    if response.status_code < 400:
+                        metrics.incr('jobs.webhook.delivered')
+                        return
+                    logger.warning(f"Webhook {url} returned {response.status_code} (attempt {attempt})")
+                except Exception as e:
+                    logger.warning(f"Webhook {url} failed (attempt {attempt}): {e}")
+                if attempt < WEBHOOK_RETRIES:
+                    await asyncio.sleep(2 ** attempt)
+        
+        metrics.incr('jobs.webhook.failed')
+
+def check_webhook_url(url: str) -> None:
+    """
+    Refuse (400) webhook URLs that are not http(s) or that point into the
+    server's own network (private, loopback, link-local and other
+    non-public addresses), so callers can't use webhooks to reach
+    internal services. Resolves the host, so it blocks.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        parts, port = None, None
+    if not parts or parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise HTTPException(status_code=400, detail="webhook_url must be an http(s) URL")
+    if WEBHOOK_ALLOW_PRIVATE:
+        return
+    
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, UnicodeError):
+        raise HTTPException(status_code=400, detail=f"webhook_url host '{parts.hostname}' does not resolve")
+    
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise HTTPException(
+                status_code=400,
+                detail="webhook_url must not point to a private, loopback or link-local address"
+            )
+
+job_queue = JobQueue(JobStore())
@@ -0,0 +1,118 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class Metrics:
+    """Thread-safe in-process counters, timings and gauges"""
+    
+    def __init__(self):
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+    
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] += value
+    
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration"""
+        with self._lock:
+            timing = self._timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+    
+    def register_gauge(self, name: str, func: Callable[[], float]) -> None:
+        """Register a callable sampled at snapshot time"""
+        with self._lock:
+            self._gauges[name] = func
+    
+    def snapshot(self) -> Dict:
+        """Current values of every metric"""
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {
+                name: {**t, 'avg': round(t['total'] / t['count'], 4) if t['count'] else 0.0}
+                for name, t in self._timings.items()
+            }
+            gauges = dict(self._gauges)
+        
+        return {
+            'counters': counters,
+            'timings': timings,
+            'gauges': {name: func() for name, func in gauges.items()},
+        }
+
+metrics = Metrics()
+
+
+class StageTimer:
+    """
+    Wall-clock timings for pipeline stages that may overlap
+    
+    Busy time is the sum of all stage durations; whatever exceeds the
+    total wall time is time saved by running stages concurrently.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.monotonic()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def stage(self, stage: str):
+        """Time a block as a named stage"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self.stages[stage] = {
+                    'start': round(start - self.started, 3),
+                    'end': round(end - self.started, 3),
+                    'seconds': round(end - start, 3),
+                }
+            metrics.observe(f"{self.name}.stage.{stage}", end - start)
+    
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        """Return func timed as a named stage"""
+        def timed(*args, **kwargs):
+            with self.stage(stage):
+                return func(*args, **kwargs)
+        return timed
+    
+    def report(self) -> Dict:
+        """Per-stage timings plus total wall time and overlap gained"""
+        wall = time.monotonic() - self.started
+        with self._lock:
+            stages = dict(self.stages)
+        busy = sum(s['seconds'] for s in stages.values())
+        return {
+            'stages': stages,
+            'wall_seconds': round(wall, 3),
+            'busy_seconds': round(busy, 3),
+            'overlap_seconds': round(max(0.0, busy - wall), 3),
+        }
+    
+    def log(self) -> Dict:
+        """Log and record the report"""
+        report = self.report()
+        metrics.observe(f"{self.name}.wall", report['wall_seconds'])
+        metrics.incr(f"{self.name}.overlap_seconds", report['overlap_seconds'])
+        summary = ', '.join(
+            f"{name} {s['start']:.1f}-{s['end']:.1f}s" for name, s in report['stages'].items()
+        )
+        logger.info(
+            f"Stage timings: {summary} | wall {report['wall_seconds']:.1f}s, "
+            f"busy {report['busy_seconds']:.1f}s, overlap saved {report['overlap_seconds']:.1f}s"
+        )
+        return report
\ No newline at end of file
@@ -0,0 +1,88 @@
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ProgressListener = Callable[[str, Dict[str, Any]], None]
+
+# Set by whoever wants to follow a pipeline (job runner, ...). Worker pools
+# copy the context into every call, so stages reported from pool threads
+# reach the listener of the request that started them.
+_listener: contextvars.ContextVar[Optional[ProgressListener]] = contextvars.ContextVar(
+    'progress_listener', default=None
+)
+
+def active() -> bool:
+    """Whether anyone is listening (lets callers skip work only a listener needs)"""
+    # A Broadcast is falsy while nobody follows it
+    return bool(_listener.get())
+
+def current() -> Optional[ProgressListener]:
+    """The listener progress reported here would go to"""
+    return _listener.get()
+
+def emit(event: str, **data: Any) -> None:
+    """Send an event (stage change, partial result, ...) to the current listener, if any"""
+    listener = _listener.get()
+    if listener is None:
+        return
+    try:
+        listener(event, data)
+    except Exception as e:
+        logger.warning(f"Progress listener failed: {e}")
+
+def report(stage: str, **data: Any) -> None:
+    """Announce that a pipeline stage started, with any partial data known so far"""
+    emit('stage', stage=stage, **data)
+
+@contextmanager
+def listen(listener: ProgressListener):
+    """Route progress reported inside this block (and calls it starts) to listener"""
+    token = _listener.set(listener)
+    try:
+        yield
+    finally:
+        _listener.reset(token)
+
+class Broadcast:
+    """
+    Listener that fans one pipeline's progress out to several listeners
+    
+    Listeners added late first get the events sent so far, in order, so
+    each of them sees the whole stream.
+    """
+    
+    def __init__(self):
+        self._listeners: List[ProgressListener] = []
+        self._history: List[Tuple[str, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+    
+    def __call__(self, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._history.append((event, data))
+            for listener in self._listeners:
+                self._send(listener, event, data)
+    
+    def __bool__(self) -> bool:
+        return bool(self._listeners)
+    
+    def add(self, listener: ProgressListener) -> None:
+        with self._lock:
+            for event, data in self._history:
+                self._send(listener, event, data)
+            self._listeners.append(listener)
+    
+    def remove(self, listener: ProgressListener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+    
+    @staticmethod
+    def _send(listener: ProgressListener, event: str, data: Dict[str, Any]) -> None:
+        try:
+            listener(event, data)
+        except Exception as e:
+            logger.warning(f"Progress listener failed: {e}")
\ No newline at end of file
@@ -1,26 +1,282 @@
 # ===== core/rate_limit.py =====
+import math
 import time
-from collections import defaultdict
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
 from fastapi import HTTPException
-from core.config import RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW
 
-class RateLimiter:
-    def __init__(self):
-        self.requests = defaultdict(list)
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from core.metrics import metrics
+from core.security import api_key_id
+from core.executor import worker_pools
+from core.config import (
+    RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, RATE_LIMIT_BACKEND, RATE_LIMIT_DB_PATH,
+    RATE_LIMIT_REDIS_URL, RATE_LIMIT_MAX_KEYS
+)
+
+logger = logging.getLogger(__name__)
+
+# (window start, count in that window, count in the previous window)
+WindowState = Tuple[float, float, float]
+Update = Callable[[Optional[WindowState]], Tuple[WindowState, 'RateLimitStatus']]
+
+class RateLimitStatus:
+    """Outcome of one rate-limit check"""
+    
+    def __init__(self, allowed: bool, limit: int, remaining: int, reset: float, retry_after: float = 0):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.retry_after = retry_after
+    
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(math.ceil(self.reset)),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+class SlidingWindow:
+    """
+    Sliding-window counter
+    
+    Keeps only the counts of the current and previous fixed windows and
+    weights the previous one by how much of it still overlaps the sliding
+    window, so every check is O(1) regardless of the limit.
+    """
+    
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+    
+    def update(self, state: Optional[WindowState], now: float, cost: int) -> Tuple[WindowState, RateLimitStatus]:
+        start = now - now % self.window
+        current = previous = 0.0
+        if state:
+            state_start, state_current, state_previous = state
+            if state_start == start:
+                current, previous = state_current, state_previous
+            elif state_start == start - self.window:
+                previous = state_current
+        
+        elapsed = now - start
+        used = previous * (1 - elapsed / self.window) + current
+        reset = self.window - elapsed
+        
+        if used + cost > self.limit:
+            status = RateLimitStatus(
+                False, self.limit, max(0, int(self.limit - used)), reset,
+                self._retry_after(current, previous, elapsed, cost)
+            )
+            return (start, current, previous), status
+        
+        current += cost
+        remaining = max(0, int(self.limit - used - cost))
+        return (start, current, previous), RateLimitStatus(True, self.limit, remaining, reset)
+    
+    def _retry_after(self, current: float, previous: float, elapsed: float, cost: int) -> float:
+        """Seconds until the weighted count leaves room for cost"""
+        if cost > self.limit:
+            return self.window
+        room = self.limit - current - cost
+        if room >= 0 and previous > 0:
+            # Enough of the previous window slides out before this one ends
+            return max(0.0, self.window * (1 - room / previous) - elapsed)
+        # Otherwise wait for this window to become the previous one
+        wait = self.window - elapsed
+        if current > 0:
+            wait += max(0.0, self.window * (1 - (self.limit - cost) / current))
+        return wait
+
+class MemoryBackend:
+    """Per-process state; idle keys are evicted oldest first"""
+    
+    # Updates are in-memory and quick enough to run on the event loop
+    blocking = False
+    
+    def __init__(self, window: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        self._states: 'OrderedDict[str, WindowState]' = OrderedDict()
+        self._lock = threading.Lock()
     
-    def check_rate_limit(self, api_key: str):
+    def update(self, key: str, func: Update) -> RateLimitStatus:
         now = time.time()
-        self.requests[api_key] = [
-            req_time for req_time in self.requests[api_key]
-            if now - req_time < RATE_LIMIT_WINDOW
-        ]
+        with self._lock:
+            state, status = func(self._states.get(key))
+            self._states[key] = state
+            self._states.move_to_end(key)
+            self._evict(now)
+        return status
+    
+    def _evict(self, now: float) -> None:
+        # Least recently used first; a key idle for two windows has no effect left
+        while self._states:
+            key, (start, _, _) = next(iter(self._states.items()))
+            if len(self._states) <= self.max_keys and start > now - 2 * self.window:
+                break
+            del self._states[key]
+
+class SQLiteBackend:
+    """
+    State shared by every worker process through a local SQLite file
+    
+    The database is opened on first use; if it can't be, state is kept
+    per process (MemoryBackend) instead.
+    """
+    
+    EVICT_EVERY = 1000
+    blocking = True
+    
+    def __init__(self, window: float, db_path: Path = RATE_LIMIT_DB_PATH):
+        self.window = window
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._fallback: Optional[MemoryBackend] = None
+        self._checks = 0
+    
+    @property
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Connection, opened on first use (None if unavailable)"""
+        if self._conn is None and self._fallback is None:
+            with self._open_lock:
+                if self._conn is None and self._fallback is None:
+                    try:
+                        self._conn = self._init_db()
+                    except Exception as e:
+                        logger.error(f"SQLite rate limit backend unavailable, using memory: {e}")
+                        self._fallback = MemoryBackend(self.window)
+        return self._conn
+    
+    def _init_db(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                window_start REAL NOT NULL,
+                current REAL NOT NULL,
+                previous REAL NOT NULL
+            )
+        """)
+        return db
+    
+    def update(self, key: str, func: Update) -> RateLimitStatus:
+        if self._db is None:
+            return self._fallback.update(key, func)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT window_start, current, previous FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                state, status = func(tuple(row) if row else None)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?)", (key, *state)
+                )
+                
+                self._checks += 1
+                if self._checks % self.EVICT_EVERY == 0:
+                    self._db.execute(
+                        "DELETE FROM rate_limits WHERE window_start < ?",
+                        (time.time() - 2 * self.window,)
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return status
+
+class RedisBackend:
+    """State in Redis (or any Redis-compatible server); keys expire when idle"""
+    
+    # Optimistic transactions retried this often before giving up (the check then fails open)
+    MAX_ATTEMPTS = 5
+    blocking = True
+    
+    def __init__(self, window: float, url: str = RATE_LIMIT_REDIS_URL):
+        self.window = window
+        self.client = redis.Redis.from_url(url)
+    
+    def update(self, key: str, func: Update) -> RateLimitStatus:
+        name = f"ratelimit:{key}"
+        with self.client.pipeline() as pipe:
+            for _ in range(self.MAX_ATTEMPTS):
+                try:
+                    pipe.watch(name)
+                    raw = pipe.hmget(name, 'start', 'current', 'previous')
+                    state = tuple(float(v) for v in raw) if raw[0] is not None else None
+                    new_state, status = func(state)
+                    
+                    pipe.multi()
+                    pipe.hset(name, mapping=dict(zip(('start', 'current', 'previous'), new_state)))
+                    pipe.expire(name, int(2 * self.window) + 1)
+                    pipe.execute()
+                    return status
+                except redis.WatchError:
+                    continue
+        raise RuntimeError(f"Rate limit state for {key} kept changing ({self.MAX_ATTEMPTS} attempts)")
+
+class RateLimiter:
+    def __init__(self, limit: int = RATE_LIMIT_REQUESTS, window: float = RATE_LIMIT_WINDOW,
+                 backend: str = RATE_LIMIT_BACKEND):
+        self.algorithm = SlidingWindow(limit, window)
+        self.backend = self._init_backend(backend, window)
+    
+    @staticmethod
+    def _init_backend(name: str, window: float):
+        if name == 'redis':
+            if REDIS_AVAILABLE and RATE_LIMIT_REDIS_URL:
+                return RedisBackend(window)
+            logger.warning("Redis rate limit backend unavailable, using SQLite")
+            name = 'sqlite'
+        if name == 'sqlite':
+            return SQLiteBackend(window)
+        return MemoryBackend(window)
+    
+    async def check_rate_limit(self, api_key: str, cost: int = 1) -> RateLimitStatus:
+        """
+        Count cost requests against the key's limit
         
-        if len(self.requests[api_key]) >= RATE_LIMIT_REQUESTS:
+        Returns the status (for X-RateLimit-* headers) or raises 429 with
+        Retry-After. If the shared backend fails, the request is allowed.
+        Shared backends are updated on the lookups pool, off the event loop.
+        """
+        try:
+            # Shared backends persist keys, so store a hash rather than the key itself
+            key = api_key_id(api_key)
+            update = lambda state: self.algorithm.update(state, time.time(), cost)
+            if self.backend.blocking:
+                status = await worker_pools.run('lookups', self.backend.update, key, update)
+            else:
+                status = self.backend.update(key, update)
+        except Exception as e:
+            logger.error(f"Rate limit check failed, allowing request: {e}")
+            return RateLimitStatus(True, self.algorithm.limit, self.algorithm.limit, self.algorithm.window)
+        
+        if not status.allowed:
+            metrics.incr('rate_limit.rejected')
             raise HTTPException(
                 status_code=429,
-                detail="Rate limit exceeded"
+                detail="Rate limit exceeded",
+                headers=status.headers()
             )
-        
-        self.requests[api_key].append(now)
+        return status
 
 rate_limiter = RateLimiter()
\ No newline at end of file
@@ -1,4 +1,5 @@
 # ===== core/security.py =====
+import hashlib
 from fastapi import HTTPException, Security
 from fastapi.security import APIKeyHeader
 from core.config import STATIC_API_TOKEN
@@ -13,4 +14,6 @@ async def verify_api_key(api_key: str = Security(api_key_header)):
         )
     return api_key
 
-
+def api_key_id(api_key: str) -> str:
+    """Stable identifier for an API key, safe to store (jobs, rate limits, usage)"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:32]
\ No newline at end of file
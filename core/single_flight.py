@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from core import progress
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls
+    
+    The first caller for a key starts the work; callers arriving while it
+    is still running await the same task and receive the same result or
+    exception. The shared task is shielded, so a disconnecting client does
+    not cancel the work for everyone else.
+    
+    Progress the task reports (core.progress) goes to the listener of every
+    caller sharing it, including callers that join after it started.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._progress: Dict[str, progress.Broadcast] = {}
+        metrics.register_gauge(f"singleflight.{name}.in_flight", lambda: len(self._calls))
+    
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func() once per key among concurrent callers"""
+        task = self._calls.get(key)
+        
+        if task is not None:
+            metrics.incr(f"singleflight.{self.name}.coalesced")
+            logger.info(f"Joining in-flight {self.name} request: {key}")
+            broadcast = self._progress[key]
+        else:
+            metrics.incr(f"singleflight.{self.name}.leaders")
+            broadcast = progress.Broadcast()
+            task = asyncio.ensure_future(self._run(func, broadcast))
+            self._calls[key] = task
+            self._progress[key] = broadcast
+            task.add_done_callback(lambda t: self._done(key, t))
+        
+        listener = progress.current()
+        if listener is not None:
+            broadcast.add(listener)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if listener is not None:
+                broadcast.remove(listener)
+    
+    @staticmethod
+    async def _run(func: Callable[[], Awaitable[Any]], broadcast: progress.Broadcast) -> Any:
+        with progress.listen(broadcast):
+            return await func()
+    
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._progress[key]
+        if not task.cancelled() and task.exception() is not None:
+            metrics.incr(f"singleflight.{self.name}.failures")
+
+social_flight = SingleFlight('social')
+image_flight = SingleFlight('image')
@@ -0,0 +1,186 @@
+import math
+import time
+import sqlite3
+import logging
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Optional
+from fastapi import HTTPException
+
+from core.metrics import metrics
+from core.security import api_key_id
+from core.config import USAGE_DB_PATH, QUOTA_WINDOW, QUOTA_BUDGETS, QUOTA_KEY_BUDGETS
+
+logger = logging.getLogger(__name__)
+
+# API key (id) the current call's resource usage is charged to. Worker pools
+# copy the context into every call, so usage recorded in pool threads is
+# attributed to the request (or job) that started the work.
+_current_key: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('usage_key', default=None)
+
+class UsageMeter:
+    """
+    Cost-based quotas per API key
+    
+    GroqClient and OCRService record what each call consumed (audio
+    seconds, prompt/completion tokens, vision calls). Totals are kept per
+    key and fixed QUOTA_WINDOW in SQLite (opened on first use), shared by
+    all workers. A key that has used up any budget is refused until the
+    window rolls over.
+    
+    Quotas are checked only for work that will cost something (cache
+    misses), from a worker thread, since the totals are read from SQLite.
+    """
+    
+    RESOURCES = ('audio_seconds', 'prompt_tokens', 'completion_tokens', 'vision_calls')
+    
+    def __init__(self, db_path: Path = USAGE_DB_PATH, window: float = QUOTA_WINDOW,
+                 budgets: Optional[Dict[str, float]] = None,
+                 key_budgets: Optional[Dict[str, Dict[str, float]]] = None):
+        self.db_path = db_path
+        self.window = window
+        self.budgets = budgets if budgets is not None else QUOTA_BUDGETS
+        # Per-key overrides, looked up by key id
+        self.key_budgets = {
+            api_key_id(key): limits
+            for key, limits in (key_budgets if key_budgets is not None else QUOTA_KEY_BUDGETS).items()
+        }
+        self._lock = threading.Lock()
+        self._purged_before = 0.0
+        self._open_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._opened = False
+    
+    @property
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Usage database, opened on first use (None if unavailable)"""
+        if not self._opened:
+            with self._open_lock:
+                if not self._opened:
+                    self._conn = self._init_db()
+                    self._opened = True
+        return self._conn
+    
+    def _init_db(self) -> Optional[sqlite3.Connection]:
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS usage (
+                    key TEXT NOT NULL,
+                    window_start REAL NOT NULL,
+                    resource TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    PRIMARY KEY (key, window_start, resource)
+                )
+            """)
+            db.commit()
+            return db
+        except Exception as e:
+            logger.error(f"Usage database unavailable, quotas disabled: {e}")
+            return None
+    
+    @contextmanager
+    def attribute(self, key_id: str):
+        """Charge usage recorded inside this block (and calls it starts) to key_id"""
+        token = _current_key.set(key_id)
+        try:
+            yield
+        finally:
+            _current_key.reset(token)
+    
+    def record(self, resource: str, amount: float) -> None:
+        """Add usage to the key the current call is attributed to"""
+        if not amount:
+            return
+        metrics.incr(f"usage.{resource}", amount)
+        
+        key = _current_key.get()
+        if key is None or not self._db:
+            return
+        
+        start = self._window_start(time.time())
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT INTO usage VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (key, window_start, resource) DO UPDATE SET amount = amount + excluded.amount",
+                    (key, start, resource, amount)
+                )
+                if start != self._purged_before:
+                    # First write of a new window: older windows are no longer needed
+                    self._db.execute("DELETE FROM usage WHERE window_start < ?", (start,))
+                    self._purged_before = start
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Usage write failed: {e}")
+    
+    def check(self) -> None:
+        """Raise 429 (with Retry-After) if the key the current call is attributed to has used up any budget"""
+        key = _current_key.get()
+        if key is None:
+            return
+        report = self._report(key)
+        exhausted = [
+            resource for resource, left in report['remaining'].items()
+            if left is not None and left <= 0
+        ]
+        if not exhausted:
+            return
+        
+        metrics.incr('usage.rejected')
+        raise HTTPException(
+            status_code=429,
+            detail=f"Quota exceeded: {', '.join(exhausted)}",
+            headers={'Retry-After': str(max(1, math.ceil(report['window_end'] - time.time())))}
+        )
+    
+    def usage(self, api_key: str) -> Dict:
+        """Usage, budgets and what is left in the current window"""
+        return self._report(api_key_id(api_key))
+    
+    def _report(self, key: str) -> Dict:
+        start = self._window_start(time.time())
+        used = {resource: 0.0 for resource in self.RESOURCES}
+        
+        if self._db:
+            with self._lock:
+                try:
+                    rows = self._db.execute(
+                        "SELECT resource, amount FROM usage WHERE key = ? AND window_start = ?",
+                        (key, start)
+                    ).fetchall()
+                except Exception as e:
+                    logger.warning(f"Usage read failed: {e}")
+                    rows = []
+            used.update({resource: amount for resource, amount in rows})
+        
+        budgets = self.budgets_for(key)
+        return {
+            'window_start': start,
+            'window_end': start + self.window,
+            'used': used,
+            'budget': budgets,
+            'remaining': {
+                resource: (budgets[resource] - used[resource]) if budgets.get(resource) else None
+                for resource in self.RESOURCES
+            },
+        }
+    
+    def budgets_for(self, key_id: str) -> Dict[str, Optional[float]]:
+        """Budgets for a key id; 0/None means unlimited"""
+        budgets = {resource: self.budgets.get(resource) or None for resource in self.RESOURCES}
+        budgets.update({
+            resource: limit or None
+            for resource, limit in self.key_budgets.get(key_id, {}).items()
+            if resource in self.RESOURCES
+        })
+        return budgets
+    
+    def _window_start(self, now: float) -> float:
+        return now - now % self.window
+
+usage_meter = UsageMeter()
@@ -1,27 +1,60 @@
 import os
+import re
+import uuid
 import logging
+import tempfile
+from contextlib import closing
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict
 import yt_dlp
+from yt_dlp.networking import Request
+
+from recipe_scraper.models import AudioData
+from core.config import AUDIO_IN_MEMORY, AUDIO_SPOOL_MAX_BYTES
 
 logger = logging.getLogger(__name__)
 
 class AudioHandler:
-    def __init__(self, download_dir: Path):
+    CHUNK_SIZE = 1024 * 1024
+    # Audio is fetched in ranged requests of this size, as yt-dlp does with
+    # http_chunk_size: YouTube throttles long unranged downloads
+    RANGE_SIZE = 10 * 1024 * 1024
+    STREAMABLE_PROTOCOLS = {'http', 'https'}
+    CONTENT_RANGE = re.compile(r'bytes \d+-\d+/(\d+)')
+    
+    # Prioritize m4a (AAC 128k) over webm (Opus) for consistent quality
+    # This ensures transcription quality matches FFmpeg-converted audio
+    DEFAULT_FORMAT = 'bestaudio[ext=m4a]/bestaudio/best'
+    # When audio is re-encoded to 16 kHz mono anyway, the smallest track of
+    # at least 48 kbps carries everything Whisper needs (only used when the
+    # preprocessor can actually run, i.e. ffmpeg is installed)
+    PREPROCESS_FORMAT = 'worstaudio[abr>=48]/bestaudio[ext=m4a]/bestaudio/best'
+    
+    def __init__(self, download_dir: Path, in_memory: bool = AUDIO_IN_MEMORY, preprocess: bool = False):
         self.download_dir = download_dir
         self.download_dir.mkdir(exist_ok=True)
+        self.in_memory = in_memory
+        self.preprocess = preprocess
     
-    def download(self, url: str, item_index: int = 0) -> Optional[str]:
-        """Download audio from video URL"""
+    def download(self, url: str, item_index: int = 0, info: Optional[Dict] = None) -> Optional[AudioData]:
+        """
+        Download audio from video URL
+        
+        When the yt-dlp info dict from the metadata pass is given, formats are
+        selected and downloaded from it directly instead of extracting the
+        page again. Falls back to a fresh extraction if that fails.
+        
+        In memory mode the selected audio stream is read into a spooled
+        buffer that only spills to a temp file above AUDIO_SPOOL_MAX_BYTES;
+        otherwise it is written to a uniquely named file in download_dir.
+        """
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output = str(self.download_dir / f'audio_{timestamp}_item{item_index}.%(ext)s')
+            output = str(self.download_dir / f'audio_{timestamp}_{uuid.uuid4().hex[:8]}_item{item_index}.%(ext)s')
             
-            # Prioritize m4a (AAC 128k) over webm (Opus) for consistent quality
-            # This ensures transcription quality matches FFmpeg-converted audio
             options = {
-                'format': 'bestaudio[ext=m4a]/bestaudio/best',
+                'format': self.PREPROCESS_FORMAT if self.preprocess else self.DEFAULT_FORMAT,
                 'outtmpl': output,
                 'quiet': True,
                 'no_warnings': True,
@@ -30,22 +63,134 @@ class AudioHandler:
             
             logger.info(f"Downloading audio for item {item_index}")
             with yt_dlp.YoutubeDL(options) as ydl:
-                info = ydl.extract_info(url, download=True)
-                audio_path = ydl.prepare_filename(info)
+                if self.in_memory:
+                    selected = self._select_format(ydl, url, info)
+                    audio = self._download_to_buffer(ydl, selected, item_index) if selected else None
+                    if audio:
+                        return audio
+                    info = selected or info
+                
+                result = self._download_from_info(ydl, info) if info else None
+                if not result:
+                    result = ydl.extract_info(url, download=True)
+                audio_path = ydl.prepare_filename(result)
                 
                 if os.path.exists(audio_path):
                     logger.info(f"Audio downloaded: {os.path.basename(audio_path)}")
-                    return audio_path
+                    return AudioData(
+                        name=os.path.basename(audio_path),
+                        file=open(audio_path, 'rb'),
+                        size=os.path.getsize(audio_path),
+                        duration=result.get('duration'),
+                        path=audio_path
+                    )
         except Exception as e:
             logger.error(f"Audio download failed: {e}")
         return None
     
+    def _select_format(self, ydl: 'yt_dlp.YoutubeDL', url: str, info: Optional[Dict]) -> Optional[Dict]:
+        """Resolve the audio format to fetch without downloading it"""
+        try:
+            prepared = self._prepare_info(ydl, info) if info else None
+            if prepared:
+                return ydl.process_ie_result(prepared, download=False)
+            return ydl.extract_info(url, download=False)
+        except Exception as e:
+            logger.warning(f"Audio format selection failed: {e}")
+            return None
+    
+    def _download_to_buffer(self, ydl: 'yt_dlp.YoutubeDL', selected: Dict, item_index: int) -> Optional[AudioData]:
+        """Stream the selected audio format straight into a spooled buffer"""
+        if selected.get('requested_formats') or not selected.get('url'):
+            return None
+        if selected.get('protocol') not in self.STREAMABLE_PROTOCOLS:
+            logger.info(f"Protocol '{selected.get('protocol')}' not streamable, using file download")
+            return None
+        
+        buffer = tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_MAX_BYTES, dir=self.download_dir)
+        try:
+            size = self._fetch_ranges(ydl, selected, buffer)
+        except Exception as e:
+            buffer.close()
+            logger.warning(f"In-memory audio download failed, using file download: {e}")
+            return None
+        
+        buffer.seek(0)
+        ext = selected.get('ext') or 'm4a'
+        logger.info(f"Audio buffered in memory: {size} bytes ({ext})")
+        return AudioData(
+            name=f"audio_item{item_index}.{ext}",
+            file=buffer,
+            size=size,
+            duration=selected.get('duration')
+        )
+    
+    def _fetch_ranges(self, ydl: 'yt_dlp.YoutubeDL', selected: Dict, buffer) -> int:
+        """Read the format's URL into buffer one RANGE_SIZE request at a time; returns the size"""
+        total = selected.get('filesize')
+        size = 0
+        while total is None or size < total:
+            headers = {**(selected.get('http_headers') or {}), 'Range': f"bytes={size}-{size + self.RANGE_SIZE - 1}"}
+            with closing(ydl.urlopen(Request(selected['url'], headers=headers))) as response:
+                ranged = response.status == 206
+                if not ranged and size:
+                    raise IOError("Server stopped honouring byte ranges mid-download")
+                if ranged:
+                    match = self.CONTENT_RANGE.match(response.headers.get('Content-Range') or '')
+                    total = int(match.group(1)) if match else total
+                received = 0
+                while True:
+                    chunk = response.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    buffer.write(chunk)
+                    received += len(chunk)
+            size += received
+            # The server sent everything at once, or this was the last range
+            if not ranged or received < self.RANGE_SIZE:
+                break
+        return size
+    
+    @staticmethod
+    def _prepare_info(ydl: 'yt_dlp.YoutubeDL', info: Dict) -> Optional[Dict]:
+        """Copy of an extracted single-video info dict that yt-dlp can re-process"""
+        if info.get('_type', 'video') != 'video' or not info.get('formats'):
+            return None
+        
+        # Same path as yt-dlp --load-info-json; comments are not needed here
+        return ydl.sanitize_info(
+            {k: v for k, v in info.items() if k != 'comments'},
+            remove_private_keys=True
+        )
+    
+    @staticmethod
+    def _download_from_info(ydl: 'yt_dlp.YoutubeDL', info: Dict) -> Optional[Dict]:
+        """Run format selection and download on an already-extracted video"""
+        try:
+            prepared = AudioHandler._prepare_info(ydl, info)
+            if not prepared:
+                return None
+            
+            logger.info("Downloading audio from cached metadata (no re-extraction)")
+            return ydl.process_ie_result(prepared, download=True)
+        except Exception as e:
+            logger.warning(f"Download from metadata failed, re-extracting: {e}")
+            return None
+    
     @staticmethod
-    def delete(audio_path: str) -> None:
-        """Delete audio file after processing"""
-        if audio_path and os.path.exists(audio_path):
+    def delete(audio: Optional[AudioData]) -> None:
+        """Release the audio buffer and delete its file after processing"""
+        if not audio:
+            return
+        
+        try:
+            audio.file.close()
+        except Exception as e:
+            logger.warning(f"Close failed: {e}")
+        
+        if audio.path and os.path.exists(audio.path):
             try:
-                os.remove(audio_path)
-                logger.info(f"Deleted: {os.path.basename(audio_path)}")
+                os.remove(audio.path)
+                logger.info(f"Deleted: {os.path.basename(audio.path)}")
             except Exception as e:
-                logger.warning(f"Delete failed: {e}")
\ No newline at end of file
+                logger.warning(f"Delete failed: {e}")
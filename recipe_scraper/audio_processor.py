@@ -0,0 +1,256 @@
+import re
+import time
+import shutil
+import logging
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from recipe_scraper.models import AudioData
+from core.metrics import metrics
+from core.config import (
+    AUDIO_PREPROCESS, AUDIO_PREPROCESS_BITRATE, AUDIO_SPOOL_MAX_BYTES,
+    AUDIO_TRIM_SILENCE_DB, AUDIO_TRIM_TAIL_MAX_SECONDS, AUDIO_UPLOAD_BYTES_PER_SEC
+)
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_PATH = shutil.which('ffmpeg')
+
+class AudioProcessor:
+    """Shrink audio before upload: mono, 16 kHz, low-bitrate Opus, silence trimmed"""
+    
+    SAMPLE_RATE = 16000
+    TIMEOUT = 300
+    PIPE_SAFE_EXTS = {'.webm', '.ogg', '.opus', '.mp3', '.wav', '.flac'}
+    
+    # Chunk cut points snap to the nearest silence within this many seconds
+    SILENCE_SEARCH_SECONDS = 30
+    SILENCE_PATTERN = re.compile(r'silence_end: ([\d.]+) \| silence_duration: ([\d.]+)')
+    
+    def __init__(self, download_dir: Path, enabled: bool = AUDIO_PREPROCESS):
+        self.download_dir = download_dir
+        self.enabled = enabled and bool(FFMPEG_PATH)
+        if enabled and not FFMPEG_PATH:
+            logger.warning("ffmpeg not found, audio preprocessing disabled")
+    
+    def preprocess(self, audio: AudioData) -> AudioData:
+        """
+        Re-encode audio for transcription
+        
+        Returns:
+            A new AudioData, or the original one if preprocessing is disabled,
+            fails, or would not make the upload smaller
+        """
+        if not self.enabled:
+            return audio
+        
+        start = time.monotonic()
+        output = self._run_ffmpeg(audio, self._encode_args(audio))
+        elapsed = time.monotonic() - start
+        
+        if not output:
+            return audio
+        
+        processed = AudioData(
+            name=f"{Path(audio.name).stem}.ogg",
+            file=output,
+            size=output.seek(0, 2),
+            duration=audio.duration
+        )
+        output.seek(0)
+        
+        if processed.size >= audio.size:
+            logger.info(f"Preprocessing did not shrink audio ({audio.size} -> {processed.size} bytes), keeping original")
+            output.close()
+            return audio
+        
+        saved = audio.size - processed.size
+        upload_saved = saved / AUDIO_UPLOAD_BYTES_PER_SEC
+        metrics.incr('audio.preprocess.bytes_in', audio.size)
+        metrics.incr('audio.preprocess.bytes_saved', saved)
+        metrics.incr('audio.preprocess.est_seconds_saved', upload_saved - elapsed)
+        metrics.observe('audio.preprocess', elapsed)
+        logger.info(
+            f"Audio preprocessed: {audio.size} -> {processed.size} bytes "
+            f"({saved * 100 // audio.size}% smaller) in {elapsed:.2f}s, "
+            f"~{upload_saved - elapsed:.2f}s upload time saved"
+        )
+        return processed
+    
+    @property
+    def available(self) -> bool:
+        """Whether ffmpeg can be used for preprocessing and splitting"""
+        return bool(FFMPEG_PATH)
+    
+    def split(self, audio: AudioData, chunk_seconds: float, overlap: float) -> List[AudioData]:
+        """
+        Split audio into overlapping segments cut at silences where possible
+        
+        Returns:
+            Segments in order, or an empty list if the audio can't be split
+        """
+        if not self.available or not audio.duration or audio.duration <= chunk_seconds:
+            return []
+        
+        cuts = self._cut_points(audio, chunk_seconds)
+        bounds = [0.0] + cuts + [audio.duration]
+        logger.info(f"Splitting {audio.duration:.0f}s audio into {len(bounds) - 1} segments at {[round(c, 1) for c in cuts]}")
+        
+        segments = []
+        for idx in range(len(bounds) - 1):
+            start = max(0.0, bounds[idx] - overlap)
+            end = min(audio.duration, bounds[idx + 1] + overlap)
+            output = self._run_ffmpeg(
+                audio,
+                self._segment_args(),
+                input_args=['-ss', f"{start:.2f}", '-t', f"{end - start:.2f}"]
+            )
+            if not output:
+                for segment in segments:
+                    segment.file.close()
+                return []
+            
+            size = output.seek(0, 2)
+            output.seek(0)
+            segments.append(AudioData(
+                name=f"{Path(audio.name).stem}_part{idx + 1}.ogg",
+                file=output,
+                size=size,
+                duration=end - start
+            ))
+        return segments
+    
+    def _cut_points(self, audio: AudioData, chunk_seconds: float) -> List[float]:
+        """Target cut every chunk_seconds, moved to the closest silence midpoint"""
+        silences = self._detect_silences(audio)
+        cuts = []
+        target = chunk_seconds
+        while target < audio.duration - chunk_seconds / 4:
+            nearby = [s for s in silences if abs(s - target) <= self.SILENCE_SEARCH_SECONDS]
+            cut = min(nearby, key=lambda s: abs(s - target)) if nearby else target
+            cuts.append(cut)
+            target = cut + chunk_seconds
+        return cuts
+    
+    def _detect_silences(self, audio: AudioData) -> List[float]:
+        """Midpoints (seconds) of silent stretches found by ffmpeg silencedetect"""
+        temp = None
+        try:
+            source = self._ffmpeg_input(audio)
+            if not source:
+                return []
+            input_path, stdin_data, temp = source
+            
+            result = subprocess.run(
+                [FFMPEG_PATH, '-hide_banner', '-i', input_path,
+                 '-af', f"silencedetect=noise={AUDIO_TRIM_SILENCE_DB + 15}dB:d=0.4", '-f', 'null', '-'],
+                input=stdin_data,
+                stdin=None if stdin_data is not None else subprocess.DEVNULL,
+                capture_output=True,
+                timeout=self.TIMEOUT
+            )
+            stderr = result.stderr.decode(errors='ignore')
+            return [
+                float(end) - float(duration) / 2
+                for end, duration in self.SILENCE_PATTERN.findall(stderr)
+            ]
+        except Exception as e:
+            logger.warning(f"Silence detection failed: {e}")
+            return []
+        finally:
+            if temp:
+                temp.close()
+    
+    def _segment_args(self) -> List[str]:
+        """ffmpeg output arguments for one transcription segment"""
+        return [
+            '-vn', '-ac', '1', '-ar', str(self.SAMPLE_RATE),
+            '-c:a', 'libopus', '-b:a', AUDIO_PREPROCESS_BITRATE, '-application', 'voip',
+            '-f', 'ogg',
+        ]
+    
+    def _encode_args(self, audio: AudioData) -> List[str]:
+        """ffmpeg output arguments for the transcription encoding"""
+        trim = (
+            f"silenceremove=start_periods=1:start_silence=0.3:"
+            f"start_threshold={AUDIO_TRIM_SILENCE_DB}dB"
+        )
+        # Trailing silence is trimmed by reversing the stream, which buffers the
+        # whole decoded track; only do that for reasonably short audio
+        if audio.duration and audio.duration <= AUDIO_TRIM_TAIL_MAX_SECONDS:
+            filters = f"{trim},areverse,{trim},areverse"
+        else:
+            filters = trim
+        
+        return [
+            '-vn', '-af', filters,
+            '-ac', '1', '-ar', str(self.SAMPLE_RATE),
+            '-c:a', 'libopus', '-b:a', AUDIO_PREPROCESS_BITRATE, '-application', 'voip',
+            '-f', 'ogg',
+        ]
+    
+    def _ffmpeg_input(self, audio: AudioData):
+        """
+        Input for an ffmpeg run
+        
+        Stream-friendly containers are piped from memory; MP4/M4A may keep
+        their index at the end, so in-memory copies are staged to a temp file.
+        
+        Returns:
+            (input path, stdin bytes or None, temp file to close or None),
+            or None on failure
+        """
+        if audio.path:
+            return audio.path, None, None
+        
+        try:
+            audio.file.seek(0)
+            if Path(audio.name).suffix.lower() in self.PIPE_SAFE_EXTS:
+                return 'pipe:0', audio.file.read(), None
+            
+            temp = tempfile.NamedTemporaryFile(dir=self.download_dir, suffix=Path(audio.name).suffix)
+            shutil.copyfileobj(audio.file, temp)
+            temp.flush()
+            return temp.name, None, temp
+        except Exception as e:
+            logger.warning(f"Could not stage audio for ffmpeg: {e}")
+            return None
+    
+    def _run_ffmpeg(self, audio: AudioData, output_args: List[str],
+                    input_args: Optional[List[str]] = None) -> Optional[tempfile.SpooledTemporaryFile]:
+        """Run ffmpeg on the audio and return its output in a spooled buffer"""
+        temp = None
+        try:
+            source = self._ffmpeg_input(audio)
+            if not source:
+                return None
+            input_path, stdin_data, temp = source
+            
+            command = [
+                FFMPEG_PATH, '-hide_banner', '-loglevel', 'error',
+                *(input_args or []), '-i', input_path, *output_args, 'pipe:1'
+            ]
+            result = subprocess.run(
+                command,
+                input=stdin_data,
+                stdin=None if stdin_data is not None else subprocess.DEVNULL,
+                capture_output=True,
+                timeout=self.TIMEOUT
+            )
+            
+            if result.returncode != 0 or not result.stdout:
+                logger.warning(f"ffmpeg failed: {result.stderr.decode(errors='ignore')[:300]}")
+                return None
+            
+            output = tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_MAX_BYTES, dir=self.download_dir)
+            output.write(result.stdout)
+            output.seek(0)
+            return output
+        except Exception as e:
+            logger.warning(f"Audio preprocessing failed: {e}")
+            return None
+        finally:
+            if temp:
+                temp.close()
@@ -1,81 +1,265 @@
+import re
 import json
+import time
 import logging
-from typing import Dict, Optional, List
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Optional, List, Tuple
+
+import httpx
+
+from core.executor import worker_pools
+from core.metrics import metrics
+from core.config import CAPTION_MAX_PARALLEL, CAPTION_TIMEOUT, CAPTION_MAX_CONNECTIONS
 
 logger = logging.getLogger(__name__)
 
-class YouTubeCaptionExtractor:
+class CaptionExtractor:
+    """
+    Use subtitles/auto-captions exposed by yt-dlp instead of transcribing
+    
+    Each platform lists the caption formats worth trying, best first.
+    Platforms not listed here always go to Whisper.
+    """
     PREFERRED_LANGS = ['en', 'hi', 'gu', 'es', 'fr', 'de', 'ja', 'ko', 'zh']
+    PLATFORM_FORMATS = {
+        'youtube': ['json3', 'srv3', 'vtt', 'ttml'],
+        'tiktok': ['vtt', 'srt', 'json3'],
+        'facebook': ['srt', 'vtt', 'ttml'],
+        'instagram': ['vtt', 'srt'],
+    }
+    
+    VTT_TAG = re.compile(r'<[^>]+>')
+    
+    _client: Optional[httpx.Client] = None
+    _client_lock = threading.Lock()
+    # platform -> [hits, attempts], for the hit rate gauges
+    _stats: Dict[str, List[int]] = {platform: [0, 0] for platform in PLATFORM_FORMATS}
+    _stats_lock = threading.Lock()
+    
+    @staticmethod
+    def platform(info_dict: Dict) -> str:
+        """Platform name from a yt-dlp extractor ('facebook:reel' -> 'facebook')"""
+        extractor = info_dict.get('extractor') or info_dict.get('ie_key') or ''
+        return extractor.split(':')[0].lower()
+    
+    @classmethod
+    def supports(cls, platform: str) -> bool:
+        return platform in cls.PLATFORM_FORMATS
     
     @classmethod
-    def extract(cls, info_dict: Dict) -> Optional[str]:
-        """Extract captions from YouTube video metadata"""
+    def extract(cls, info_dict: Dict, platform: Optional[str] = None) -> Optional[str]:
+        """
+        Extract captions from video metadata
+        
+        Candidate tracks are fetched CAPTION_MAX_PARALLEL at a time, best
+        ranked first. Within a batch, the best-ranked track that parses wins
+        as soon as every track ranked above it has failed; the remaining
+        fetches are cancelled. The next batch is tried only if the whole
+        batch failed.
+        """
+        platform = platform or cls.platform(info_dict)
+        if not cls.supports(platform):
+            return None
+        
+        result = None
         try:
-            logger.info("Extracting YouTube captions")
-            
-            # Try manual captions first
-            caption = cls._try_extract(info_dict.get('subtitles', {}), 'manual')
-            if caption:
-                return caption
+            logger.info(f"Extracting {platform} captions")
             
-            # Fall back to automatic captions
-            caption = cls._try_extract(info_dict.get('automatic_captions', {}), 'auto')
-            if caption:
-                return caption
+            candidates = cls._candidates(info_dict)
+            if candidates:
+                start = time.monotonic()
+                for i in range(0, len(candidates), CAPTION_MAX_PARALLEL):
+                    batch = candidates[i:i + CAPTION_MAX_PARALLEL]
+                    result = cls._fetch_first(batch, cls.PLATFORM_FORMATS[platform])
+                    if result:
+                        break
+                metrics.observe(f'captions.{platform}.fetch', time.monotonic() - start)
             
-            logger.info("No captions found")
+            if not result:
+                logger.info("No captions found")
         except Exception as e:
             logger.error(f"Caption extraction failed: {e}")
-        return None
+        
+        cls._record(platform, bool(result))
+        return result
     
     @classmethod
-    def _try_extract(cls, source: Dict, source_type: str) -> Optional[str]:
-        """Try to extract captions from a source (manual or auto)"""
-        if not source:
-            return None
-        
-        # Try preferred languages first
-        for lang in cls.PREFERRED_LANGS:
+    def _record(cls, platform: str, hit: bool) -> None:
+        metrics.incr(f"captions.{platform}.{'hits' if hit else 'misses'}")
+        with cls._stats_lock:
+            stats = cls._stats[platform]
+            stats[0] += hit
+            stats[1] += 1
+    
+    @classmethod
+    def hit_rate(cls, platform: str) -> float:
+        """Share of caption lookups on a platform that avoided Whisper"""
+        with cls._stats_lock:
+            hits, attempts = cls._stats.get(platform, (0, 0))
+        return round(hits / attempts, 4) if attempts else 0.0
+    
+    @classmethod
+    def _candidates(cls, info_dict: Dict) -> List[Tuple[str, str, List[Dict]]]:
+        """(source type, language, formats) in priority order: manual before auto, preferred languages first"""
+        candidates = []
+        for source_type, key in (('manual', 'subtitles'), ('auto', 'automatic_captions')):
+            source = info_dict.get(key) or {}
+            seen = set()
+            
+            for lang in cls.PREFERRED_LANGS:
+                for available_lang, formats in source.items():
+                    if available_lang.startswith(lang) and available_lang not in seen:
+                        seen.add(available_lang)
+                        candidates.append((source_type, available_lang, formats))
+            
             for available_lang, formats in source.items():
-                if available_lang.startswith(lang):
-                    caption = cls._download(formats)
+                if available_lang not in seen:
+                    seen.add(available_lang)
+                    candidates.append((source_type, available_lang, formats))
+        return candidates
+    
+    @classmethod
+    def _fetch_first(cls, candidates: List[Tuple[str, str, List[Dict]]],
+                     preferred: List[str]) -> Optional[str]:
+        """Download candidates concurrently and return the best-ranked good one"""
+        stop = threading.Event()
+        futures = [
+            worker_pools.submit('captions', cls._download, formats, preferred, stop)
+            for _, _, formats in candidates
+        ]
+        
+        try:
+            pending = set(futures)
+            while True:
+                # Walk down the ranking until a track is still running or has text
+                for (source_type, lang, _), future in zip(candidates, futures):
+                    if not future.done():
+                        break
+                    caption = None if future.cancelled() or future.exception() else future.result()
                     if caption:
-                        logger.info(f"Extracted {source_type} captions: {available_lang}")
+                        logger.info(f"Extracted {source_type} captions: {lang}")
                         return caption
+                else:
+                    return None
+                
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+    
+    @classmethod
+    def _download(cls, formats: List[Dict], preferred: List[str],
+                  stop: Optional[threading.Event] = None) -> Optional[str]:
+        """Download and parse a caption track, trying each supported format"""
+        by_ext = {fmt.get('ext'): fmt for fmt in formats if fmt.get('url')}
         
-        # Try any available language
-        for lang, formats in source.items():
-            caption = cls._download(formats)
-            if caption:
-                logger.info(f"Extracted {source_type} captions: {lang}")
-                return caption
+        for ext in preferred:
+            fmt = by_ext.get(ext)
+            if not fmt or (stop and stop.is_set()):
+                continue
+            
+            try:
+                response = cls._http().get(fmt['url'])
+                response.raise_for_status()
+                caption = cls._parse(ext, response.text)
+                if caption:
+                    return caption
+            except Exception as e:
+                logger.debug(f"Caption download failed ({ext}): {e}")
         return None
     
+    @classmethod
+    def _http(cls) -> httpx.Client:
+        """Shared keep-alive client for caption downloads"""
+        with cls._client_lock:
+            if cls._client is None:
+                cls._client = httpx.Client(
+                    headers={'User-Agent': 'Mozilla/5.0'},
+                    timeout=CAPTION_TIMEOUT,
+                    follow_redirects=True,
+                    limits=httpx.Limits(
+                        max_connections=CAPTION_MAX_CONNECTIONS,
+                        max_keepalive_connections=CAPTION_MAX_CONNECTIONS
+                    )
+                )
+            return cls._client
+    
+    @classmethod
+    def _parse(cls, ext: str, body: str) -> Optional[str]:
+        """Turn a caption file into plain text lines"""
+        parser = {
+            'json3': cls._parse_json3,
+            'srv3': cls._parse_xml,
+            'ttml': cls._parse_xml,
+            'vtt': cls._parse_vtt,
+            'srt': cls._parse_vtt,
+        }[ext]
+        segments = parser(body)
+        return '\n'.join(segments) if segments else None
+    
+    @staticmethod
+    def _parse_json3(body: str) -> List[str]:
+        data = json.loads(body)
+        
+        segments = []
+        for event in data.get('events', []):
+            if 'segs' in event:
+                text = ''.join(
+                    seg.get('utf8', '') for seg in event['segs']
+                ).strip()
+                if text:
+                    segments.append(text)
+        return segments
+    
     @staticmethod
-    def _download(formats: List[Dict]) -> Optional[str]:
-        """Download and parse caption file"""
-        import urllib.request
+    def _parse_xml(body: str) -> List[str]:
+        """srv3 (<timedtext><body><p>) and TTML (<tt><body><div><p>) cues"""
+        root = ET.fromstring(body)
         
-        opener = urllib.request.build_opener()
-        opener.addheaders = [('User-Agent', 'Mozilla/5.0')]
-        urllib.request.install_opener(opener)
+        segments = []
+        for element in root.iter():
+            # TTML tags are namespaced ({http://www.w3.org/ns/ttml}p)
+            if element.tag.rsplit('}', 1)[-1] != 'p':
+                continue
+            text = ' '.join(' '.join(element.itertext()).split())
+            if text:
+                segments.append(text)
+        return segments
+    
+    @classmethod
+    def _parse_vtt(cls, body: str) -> List[str]:
+        """WebVTT cues; also handles SRT, which differs only in header and numbering"""
+        segments = []
+        skipping = False
+        lines = [line.strip() for line in body.splitlines()]
         
-        for fmt in formats:
-            if fmt.get('ext') == 'json3':
-                try:
-                    response = urllib.request.urlopen(fmt['url'], timeout=8)
-                    data = json.loads(response.read().decode('utf-8'))
-                    
-                    segments = []
-                    for event in data.get('events', []):
-                        if 'segs' in event:
-                            text = ''.join(
-                                seg.get('utf8', '') for seg in event['segs']
-                            ).strip()
-                            if text:
-                                segments.append(text)
-                    
-                    return '\n'.join(segments) if segments else None
-                except Exception:
-                    continue
-        return None
\ No newline at end of file
+        for idx, line in enumerate(lines):
+            if not line:
+                skipping = False
+                continue
+            # A cue identifier (SRT's sequence number) is the line right before
+            # the timing line; other lines, digit-only ones included, are text
+            if skipping or (idx + 1 < len(lines) and '-->' in lines[idx + 1]):
+                continue
+            # Header (Kind:, Language:) and comment/style blocks run to the next blank line
+            if line.startswith(('WEBVTT', 'NOTE', 'STYLE', 'REGION')):
+                skipping = True
+                continue
+            if '-->' in line:
+                continue
+            
+            text = cls.VTT_TAG.sub('', line).strip()
+            # Auto-generated VTT repeats the previous line as each cue scrolls
+            if text and (not segments or segments[-1] != text):
+                segments.append(text)
+        return segments
+
+
+for _platform in CaptionExtractor.PLATFORM_FORMATS:
+    metrics.register_gauge(
+        f"captions.{_platform}.hit_rate",
+        lambda platform=_platform: CaptionExtractor.hit_rate(platform)
+    )
@@ -1,25 +1,45 @@
-import os
 import re
 import json
+import time
+import hashlib
 import logging
-from typing import Optional, Dict
+from typing import Callable, Dict, List, Optional, Tuple
 
 try:
-    from groq import Groq
+    import httpx
+    from groq import Groq, DefaultHttpxClient
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
 
-from core.config import GROQ_API_KEY, WHISPER_MODEL, LLAMA_MODEL
+from recipe_scraper.recipe_prompt import RecipePromptBuilder
+from recipe_scraper.models import AudioData
+from recipe_scraper.recipe_stream import RecipeStreamParser
+from core.cache import CachePolicy, llm_cache
+from core.metrics import metrics
+from core.usage import usage_meter
+from core.admission import admission, Overloaded
+from core.groq_scheduler import groq_scheduler
+from core.config import (
+    GROQ_API_KEY, WHISPER_MODEL, LLAMA_MODEL,
+    GROQ_MAX_CONNECTIONS, GROQ_KEEPALIVE_EXPIRY
+)
 
 logger = logging.getLogger(__name__)
 
 class GroqClient:
-    def __init__(self):
-        self.client = self._init_client()
+    RECIPE_SYSTEM_PROMPT = "You are a professional recipe extraction AI. Extract recipes and return ONLY valid JSON. No markdown, no explanations."
+    RECIPE_PARAMS = {
+        'temperature': 0.1,
+        'max_tokens': 8000,
+        'top_p': 0.95,
+    }
     
-    def _init_client(self) -> Optional[Groq]:
-        """Initialize Groq client"""
+    def __init__(self, client: Optional['Groq'] = None):
+        self.client = client if client is not None else self._init_client()
+    
+    def _init_client(self) -> Optional['Groq']:
+        """Initialize Groq client with a keep-alive connection pool"""
         if not GROQ_AVAILABLE:
             logger.warning("Groq library not available")
             return None
@@ -29,58 +49,214 @@ class GroqClient:
             return None
         
         try:
-            return Groq(api_key=GROQ_API_KEY)
+            http_client = DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+                    keepalive_expiry=GROQ_KEEPALIVE_EXPIRY
+                )
+            )
+            # Retries are left to the shared scheduler, which paces them across callers
+            return Groq(api_key=GROQ_API_KEY, http_client=http_client, max_retries=0)
         except Exception as e:
             logger.error(f"Groq init failed: {e}")
             return None
     
-    def transcribe_audio(self, audio_path: str) -> Optional[str]:
-        """Transcribe audio file using Whisper"""
+    def warm_up(self) -> bool:
+        """Open a TLS connection to Groq so the first real call is fast"""
         if not self.client:
-            return None
+            return False
         
         try:
-            logger.info(f"Transcribing: {os.path.basename(audio_path)}")
-            with open(audio_path, "rb") as f:
-                result = self.client.audio.transcriptions.create(
-                    file=(os.path.basename(audio_path), f.read()),
+            self.client.models.list(timeout=10)
+            logger.info("Groq connection warmed up")
+            return True
+        except Exception as e:
+            logger.warning(f"Groq warm-up failed: {e}")
+            return False
+    
+    def transcribe_audio(self, audio: AudioData) -> Optional[str]:
+        """Transcribe audio using Whisper"""
+        if not self.client:
+            return None
+        
+        with admission.slot('transcription'):
+            try:
+                logger.info(f"Transcribing: {audio.name} ({audio.size} bytes)")
+                
+                # Upload bytes, not the buffer: httpx asks a file object for its
+                # fileno(), which rolls an in-memory spool over to download_dir
+                audio.file.seek(0)
+                content = audio.file.read()
+                
+                result = groq_scheduler.call(
+                    self.client.audio.transcriptions.with_raw_response.create,
+                    file=(audio.name, content),
                     model=WHISPER_MODEL,
                     response_format="verbose_json",
                     temperature=0.0
                 )
-            logger.info(f"Transcription complete: {len(result.text)} chars")
-            return result.text.strip()
-        except Exception as e:
-            logger.error(f"Transcription failed: {e}")
-            return None
+                usage_meter.record('audio_seconds', getattr(result, 'duration', None) or audio.duration or 0)
+                logger.info(f"Transcription complete: {len(result.text)} chars")
+                return result.text.strip()
+            except Overloaded:
+                raise
+            except Exception as e:
+                logger.error(f"Transcription failed: {e}")
+                return None
     
-    def extract_recipes(self, prompt: str) -> Optional[Dict]:
-        """Extract recipes using Llama"""
+    def extract_recipes(self, prompt: str, cache_policy: Optional[CachePolicy] = None,
+                        on_recipe: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
+        """
+        Extract recipes using Llama, memoized on model, parameters and prompt
+        
+        cache_policy controls reading and writing the memo; results without
+        recipes are never memoized. With on_recipe the response is streamed
+        and on_recipe is called with each recipe as soon as it has been
+        generated. The complete response is still parsed (and cached) as
+        usual at the end. If the stream breaks off (or can't be parsed) after
+        recipes were handed out, those are returned, flagged partial_recipes
+        and not memoized.
+        """
         if not self.client:
             return None
         
-        try:
-            logger.info("Extracting recipes with Llama")
-            response = self.client.chat.completions.create(
-                model=LLAMA_MODEL,
-                messages=[
+        cache_policy = cache_policy or CachePolicy()
+        cache_key = self._recipe_cache_key(prompt)
+        if cache_policy.read:
+            cached = self.cached(prompt)
+            if cached is not None:
+                return cached
+        
+        with admission.slot('llm'):
+            try:
+                logger.info("Extracting recipes with Llama" + (" (streaming)" if on_recipe else ""))
+                messages = [
                     {
                         "role": "system", 
-                        "content": "You are a professional recipe extraction AI. Extract recipes and return ONLY valid JSON. No markdown, no explanations."
+                        "content": self.RECIPE_SYSTEM_PROMPT
                     },
                     {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=8000,
-                top_p=0.95
-            )
-            
-            result = self._parse_json(response.choices[0].message.content.strip())
-            logger.info("Recipe extraction " + ("successful" if result else "failed"))
-            return result
+                ]
+                
+                tokens = groq_scheduler.estimate_tokens(
+                    self.RECIPE_SYSTEM_PROMPT + prompt, self.RECIPE_PARAMS['max_tokens']
+                )
+                streamed, complete = [], True
+                if on_recipe:
+                    content, streamed, complete = self._stream_recipes(messages, on_recipe, tokens)
+                else:
+                    response = groq_scheduler.call(
+                        self.client.chat.completions.with_raw_response.create,
+                        tokens=tokens,
+                        model=LLAMA_MODEL,
+                        messages=messages,
+                        **self.RECIPE_PARAMS
+                    )
+                    content = response.choices[0].message.content
+                    self.record_usage(response.usage)
+                
+                result = self._parse_json(content.strip()) if complete else None
+                if streamed and not (result and result.get('recipes')):
+                    # The recipes already went out; don't follow them with an empty result
+                    result = {'recipes': streamed, 'total_recipes': len(streamed), 'partial_recipes': True}
+                logger.info("Recipe extraction " + ("successful" if result else "failed"))
+                if cache_policy.write and result and result.get('recipes') and not result.get('partial_recipes'):
+                    llm_cache.set(cache_key, result)
+                return result
+            except Overloaded:
+                raise
+            except Exception as e:
+                logger.error(f"Recipe extraction failed: {e}")
+                return None
+    
+    def cached(self, prompt: str) -> Optional[Dict]:
+        """Memoized extraction for the prompt, without calling the LLM"""
+        cached = llm_cache.get(self._recipe_cache_key(prompt))
+        if cached is not None:
+            logger.info("Recipe extraction served from LLM memo")
+        return cached
+    
+    def _stream_recipes(self, messages: List[Dict], on_recipe: Callable[[Dict], None],
+                        tokens: int = 0) -> Tuple[str, List[Dict], bool]:
+        """
+        Stream the completion, handing each finished recipe to on_recipe
+        
+        Returns the text received, the recipes handed out and whether the
+        stream ran to the end. A stream that fails before its first recipe
+        raises.
+        """
+        parser = RecipeStreamParser()
+        start = time.monotonic()
+        first = None
+        streamed: List[Dict] = []
+        
+        stream = groq_scheduler.call(
+            self.client.chat.completions.with_raw_response.create,
+            tokens=tokens,
+            model=LLAMA_MODEL,
+            messages=messages,
+            stream=True,
+            **self.RECIPE_PARAMS
+        )
+        try:
+            for chunk in stream:
+                # Groq reports token usage on the final chunk
+                x_groq = getattr(chunk, 'x_groq', None)
+                self.record_usage(getattr(chunk, 'usage', None) or getattr(x_groq, 'usage', None))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                
+                for recipe in parser.feed(delta):
+                    if first is None:
+                        first = time.monotonic() - start
+                        metrics.observe('llm.first_recipe', first)
+                        logger.info(f"First recipe streamed after {first:.2f}s")
+                    streamed.append(recipe)
+                    try:
+                        on_recipe(recipe)
+                    except Exception as e:
+                        logger.warning(f"Recipe callback failed: {e}")
         except Exception as e:
-            logger.error(f"Recipe extraction failed: {e}")
-            return None
+            if not streamed:
+                raise
+            metrics.incr('llm.stream_broken')
+            logger.warning(f"Recipe stream broke off after {len(streamed)} recipe(s): {e}")
+            return parser.buffer, streamed, False
+        finally:
+            stream.close()
+        
+        metrics.observe('llm.stream', time.monotonic() - start)
+        return parser.buffer, streamed, True
+    
+    @staticmethod
+    def record_usage(usage) -> None:
+        """Charge a completion's token counts to the calling API key"""
+        if not usage:
+            return
+        usage_meter.record('prompt_tokens', getattr(usage, 'prompt_tokens', 0) or 0)
+        usage_meter.record('completion_tokens', getattr(usage, 'completion_tokens', 0) or 0)
+    
+    @classmethod
+    def _recipe_cache_key(cls, prompt: str) -> str:
+        """
+        Memo key for a recipe extraction call
+        
+        Includes the prompt template version so bumping
+        RecipePromptBuilder.TEMPLATE_VERSION invalidates old answers.
+        """
+        payload = json.dumps({
+            'model': LLAMA_MODEL,
+            'params': cls.RECIPE_PARAMS,
+            'system': cls.RECIPE_SYSTEM_PROMPT,
+            'template': RecipePromptBuilder.TEMPLATE_VERSION,
+        }, sort_keys=True)
+        digest = hashlib.sha256(payload.encode('utf-8'))
+        digest.update(prompt.encode('utf-8'))
+        return digest.hexdigest()
     
     @staticmethod
     def _parse_json(content: str) -> Optional[Dict]:
@@ -1,5 +1,7 @@
 import re
 import logging
+import threading
+from itertools import islice
 from typing import Optional, Tuple, List, Dict
 
 try:
@@ -16,6 +18,8 @@ logger = logging.getLogger(__name__)
 class InstagramScraper:
     def __init__(self):
         self.loader = self._init_loader()
+        # Instaloader keeps session state on its context and is not thread-safe
+        self._lock = threading.Lock()
     
     def _init_loader(self) -> Optional['instaloader.Instaloader']:
         """Initialize instaloader client"""
@@ -27,11 +31,16 @@ class InstagramScraper:
         loader.context.quiet = True
         return loader
     
-    def scrape(self, url: str) -> Optional[ScrapedContent]:
+    def scrape(self, url: str, include_comments: bool = True) -> Optional[ScrapedContent]:
         """Scrape Instagram post metadata"""
         if not self.loader:
             return None
         
+        with self._lock:
+            return self._scrape(url, include_comments)
+    
+    def _scrape(self, url: str, include_comments: bool = True) -> Optional[ScrapedContent]:
+        """Fetch post, comments and carousel items (caller holds the lock)"""
         try:
             shortcode = self._extract_shortcode(url)
             if not shortcode:
@@ -41,7 +50,7 @@ class InstagramScraper:
             logger.info(f"Fetching Instagram post: {shortcode}")
             post = instaloader.Post.from_shortcode(self.loader.context, shortcode)
             
-            comments, publisher_comment = self._extract_comments(post)
+            comments, publisher_comment = self._extract_comments(post) if include_comments else ([], "")
             is_carousel = post.typename == 'GraphSidecar'
             carousel_items = self._extract_carousel(post) if is_carousel else []
             
@@ -60,7 +69,8 @@ class InstagramScraper:
                 publisher_comment=publisher_comment,
                 is_video=post.is_video,
                 is_carousel=is_carousel,
-                carousel_items=carousel_items
+                carousel_items=carousel_items,
+                media_id=post.shortcode
             )
         except Exception as e:
             logger.error(f"Instagram scraping failed: {e}")
@@ -73,31 +83,31 @@ class InstagramScraper:
         return match.group(1) if match else None
     
     def _extract_comments(self, post) -> Tuple[List[Dict], str]:
-        """Extract comments and find publisher comment"""
+        """
+        Extract comments and find publisher comment
+        
+        Comments are paged in lazily and iteration stops at the publisher
+        comment or after MAX_COMMENTS, whichever comes first.
+        """
         comments = []
         publisher_comment = ""
         
         try:
             publisher_username = post.owner_username
-            all_comments = list(post.get_comments())
-            
-            logger.info(f"Found {len(all_comments)} comments")
-            
-            # Find publisher comment
-            for comment in all_comments:
-                if comment.owner.username == publisher_username and not publisher_comment:
-                    publisher_comment = comment.text
-                    logger.info(f"Publisher comment found: {len(comment.text)} chars")
-                    break
             
-            # Extract top comments
-            for comment in all_comments[:MAX_COMMENTS]:
+            for comment in islice(post.get_comments(), MAX_COMMENTS):
                 comments.append({
                     'author': comment.owner.username,
                     'author_id': str(comment.owner.userid),
                     'text': comment.text,
                 })
+                
+                if comment.owner.username == publisher_username and comment.text:
+                    publisher_comment = comment.text
+                    logger.info(f"Publisher comment found at position {len(comments) - 1}: {len(comment.text)} chars")
+                    break
             
+            logger.info(f"Fetched {len(comments)} comments")
             if not publisher_comment:
                 logger.warning("Publisher comment not found")
         except Exception as e:
@@ -110,9 +120,12 @@ class InstagramScraper:
         """Extract carousel items metadata"""
         items = []
         for node in post.get_sidecar_nodes():
+            # instaloader exposes no per-item media ID, so carousel items get
+            # none and their transcripts are not stored (TranscriptStore skips '')
             items.append({
                 'is_video': node.is_video,
                 'url': node.video_url if node.is_video else node.display_url,
+                'media_id': '',
             })
         logger.info(f"Carousel items: {len(items)}")
         return items
\ No newline at end of file
@@ -1,77 +1,193 @@
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import Future
 from typing import Optional, Dict, List
 
 from recipe_scraper.groq_client import GroqClient
 from recipe_scraper.audio_handler import AudioHandler
+from recipe_scraper.audio_processor import AudioProcessor
+from recipe_scraper.transcriber import ChunkedTranscriber, PartialTranscript
 from recipe_scraper.instagram_scraper import InstagramScraper, INSTALOADER_AVAILABLE
 from recipe_scraper.video_scraper import VideoScraper
 from recipe_scraper.recipe_prompt import RecipePromptBuilder
 from recipe_scraper.helpers import URLHelper
 from recipe_scraper.models import ScrapedContent
-from core.config import DOWNLOAD_DIR
+from recipe_scraper.transcript_store import TranscriptStore
+from services.url_canonicalizer import URLCanonicalizer
+from core import progress
+from core.executor import worker_pools
+from core.cache import CachePolicy
+from core.admission import admission, Overloaded
+from core.metrics import StageTimer
+from core.config import DOWNLOAD_DIR, CAROUSEL_MAX_PARALLEL, SPECULATIVE_INSTALOADER
 
 logger = logging.getLogger(__name__)
 
 class RecipeScraper:
-    def __init__(self, download_dir: Path = DOWNLOAD_DIR):
+    def __init__(self, download_dir: Path = DOWNLOAD_DIR, groq: Optional[GroqClient] = None):
         self.download_dir = download_dir
         self.download_dir.mkdir(exist_ok=True)
-        self.groq = GroqClient()
-        self.audio = AudioHandler(self.download_dir)
+        self.groq = groq or GroqClient()
+        self.audio_processor = AudioProcessor(self.download_dir)
+        # Low-bitrate tracks only when they will be re-encoded
+        self.audio = AudioHandler(self.download_dir, preprocess=self.audio_processor.enabled)
+        self.transcriber = ChunkedTranscriber(self.groq, self.audio_processor)
         self.instagram = InstagramScraper()
         self.video = VideoScraper()
         logger.info("Recipe scraper initialized")
     
-    def scrape(self, url: str) -> Optional[Dict]:
-        """Main scraping orchestrator"""
+    def scrape(self, url: str, cache_policy: Optional[CachePolicy] = None,
+               include_comments: bool = True) -> Optional[Dict]:
+        """
+        Main scraping orchestrator
+        
+        Independent stages overlap: comments, the instaloader fallback and
+        audio download/transcription all start as soon as the yt-dlp
+        metadata pass says what kind of media the post is.
+        
+        With include_comments=False no comments are fetched at all, so the
+        publisher comment is left out of the recipe prompt.
+        
+        Side stages still queued when the extraction ends (fails, is shed,
+        or no longer needs them) are cancelled, and a running media stage
+        stops before its Whisper upload.
+        """
         logger.info("="*80)
-        logger.info(f"Starting extraction: {url}")
+        logger.info(f"Starting extraction: {url} [{URLCanonicalizer.key(url)}]")
         logger.info("="*80)
         
-        base_url = URLHelper.remove_img_index(url)
+        side_stages: List[Future] = []
+        stop = threading.Event()
+        try:
+            return self._scrape(URLHelper.remove_img_index(url), cache_policy, include_comments, side_stages, stop)
+        finally:
+            stop.set()
+            for future in side_stages:
+                future.cancel()
+    
+    def _scrape(self, base_url: str, cache_policy: Optional[CachePolicy], include_comments: bool,
+                side_stages: List[Future], stop: threading.Event) -> Optional[Dict]:
+        timer = StageTimer('scrape')
         
         logger.info("STAGE 1/4: Extracting metadata")
-        content = self._extract_metadata(base_url)
+        progress.report('metadata')
+        fallback = None
+        if self._uses_instaloader(base_url) and SPECULATIVE_INSTALOADER:
+            fallback = worker_pools.submit(
+                'stages', timer.wrap('instaloader', admission.wrap('metadata', self.instagram.scrape)),
+                base_url, include_comments
+            )
+            side_stages.append(fallback)
+        
+        logger.info("Using yt-dlp as primary scraper")
+        with timer.stage('metadata'), admission.slot('metadata'):
+            content = self.video.scrape(base_url, extract_comments=include_comments, defer_comments=True)
+        
+        comments = media = None
+        if content:
+            if content.comment_fetch:
+                comments = worker_pools.submit(
+                    'stages', timer.wrap('comments', admission.wrap('metadata', content.comment_fetch.fetch))
+                )
+                # Runs or cancelled, the pass's YoutubeDL is released afterwards
+                comments.add_done_callback(lambda _, fetch=content.comment_fetch: fetch.close())
+                side_stages.append(comments)
+            if content.is_video and not content.is_carousel:
+                logger.info("STAGE 3/4: Processing media (started early)")
+                media = worker_pools.submit(
+                    'stages', timer.wrap('media', self._process_single), base_url, content, stop
+                )
+                side_stages.append(media)
+            
+        if comments:
+            try:
+                content.comments, content.publisher_comment = comments.result()
+            except Overloaded:
+                # Comments are optional: carry on without them
+                logger.warning("Comment fetch shed under load, continuing without comments")
+            logger.info(f"Comments: {len(content.comments)}, Publisher: {'FOUND' if content.publisher_comment else 'NOT FOUND'}")
+        
+        content = self._apply_fallback(base_url, content, fallback, timer, include_comments)
         if not content:
             logger.error("Metadata extraction failed")
+            timer.log()
             return None
         
         logger.info("STAGE 2/4: Checking captions")
         logger.info(f"Captions: {len(content.caption_text) if content.caption_text else 0} chars")
+        progress.report(
+            'captions',
+            title=content.title,
+            thumbnail=content.thumbnail,
+            publisher=content.uploader,
+            platform=content.platform,
+            is_carousel=content.is_carousel,
+            total_items=len(content.carousel_items) if content.is_carousel else 1,
+            has_captions=bool(content.caption_text),
+            has_publisher_comment=bool(content.publisher_comment)
+        )
         
-        logger.info("STAGE 3/4: Processing media")
-        items = (self._process_carousel(base_url, content) if content.is_carousel 
-                else self._process_single(base_url, content))
+        progress.report('media')
+        if media:
+            items = media.result()
+        else:
+            logger.info("STAGE 3/4: Processing media")
+            with timer.stage('media'):
+                items = (self._process_carousel(base_url, content) if content.is_carousel 
+                        else self._process_single(base_url, content))
         
         complete_data = self._build_data(base_url, content, items)
         
         logger.info("STAGE 4/4: Extracting recipes")
-        recipes = self.groq.extract_recipes(RecipePromptBuilder.build(complete_data))
+        progress.report('recipes')
+        with timer.stage('recipes'):
+            # Stream recipes out as they are generated when someone follows progress
+            on_recipe = (lambda recipe: progress.emit('recipe', recipe=recipe)) if progress.active() else None
+            recipes = self.groq.extract_recipes(RecipePromptBuilder.build(complete_data), cache_policy, on_recipe)
+        timer.log()
         
         if not recipes:
             logger.warning("No recipes extracted")
             return {"recipes": [], "total_recipes": 0}
         
+        if any(isinstance(item.get('transcript'), PartialTranscript) for item in items):
+            # Flagged so the result is not cached either
+            recipes = {**recipes, 'partial_transcript': True}
+        
         logger.info("Extraction complete")
         logger.info("="*80)
         return recipes
     
-    def _extract_metadata(self, url: str) -> Optional[ScrapedContent]:
-        """Extract metadata using yt-dlp and fallback to instaloader if needed"""
-        logger.info("Using yt-dlp as primary scraper")
-        content = self.video.scrape(url, extract_comments=True)
-        
-        if URLHelper.is_instagram(url) and INSTALOADER_AVAILABLE:
+    @staticmethod
+    def _uses_instaloader(url: str) -> bool:
+        return URLHelper.is_instagram(url) and INSTALOADER_AVAILABLE
+    
+    def _apply_fallback(self, url: str, content: Optional[ScrapedContent],
+                        fallback: Optional[Future], timer: StageTimer,
+                        include_comments: bool = True) -> Optional[ScrapedContent]:
+        """Fill gaps in yt-dlp data with instaloader (started speculatively if enabled)"""
+        if self._uses_instaloader(url):
             needs_fallback = (not content or 
                             (not content.description and not content.is_video) or 
-                            not content.publisher_comment)
+                            (include_comments and not content.publisher_comment))
             
             if needs_fallback:
                 reason = "yt-dlp failed" if not content else "missing caption/comment"
                 logger.info(f"Trying instaloader: {reason}")
-                fallback = self.instagram.scrape(url)
+                try:
+                    if fallback:
+                        fallback = fallback.result()
+                    else:
+                        with timer.stage('instaloader'), admission.slot('metadata'):
+                            fallback = self.instagram.scrape(url, include_comments)
+                except Overloaded:
+                    # Only needed outright when yt-dlp got nothing
+                    if not content:
+                        raise
+                    logger.warning("Instaloader fallback shed under load, using yt-dlp data only")
+                    fallback = None
                 
                 if fallback:
                     if content:
@@ -92,13 +208,15 @@ class RecipeScraper:
         logger.error("All scraping failed")
         return None
     
-    def _process_single(self, url: str, content: ScrapedContent) -> List[Dict]:
+    def _process_single(self, url: str, content: ScrapedContent,
+                        stop: Optional[threading.Event] = None) -> List[Dict]:
         """Process single media item"""
         media_type = 'VIDEO' if content.is_video else 'IMAGE'
         logger.info(f"Processing single {media_type}")
         
         transcript = (content.caption_text if content.caption_text 
-                     else (self._transcribe(url) if content.is_video else None))
+                     else (self._transcribe(url, 0, content.platform, content.media_id, content.info, stop)
+                           if content.is_video else None))
         
         return [{
             'position': 1, 
@@ -108,38 +226,86 @@ class RecipeScraper:
         }]
     
     def _process_carousel(self, base_url: str, content: ScrapedContent) -> List[Dict]:
-        """Process carousel items"""
-        logger.info(f"Processing carousel: {len(content.carousel_items)} items")
+        """Process carousel items concurrently, keeping their original order"""
+        total = len(content.carousel_items)
+        logger.info(f"Processing carousel: {total} items (up to {CAROUSEL_MAX_PARALLEL} at once)")
         
-        results = []
-        for idx, item in enumerate(content.carousel_items, 1):
-            logger.info(f"Processing item {idx}/{len(content.carousel_items)}")
+        def process_item(entry) -> Dict:
+            idx, item = entry
+            logger.info(f"Processing item {idx}/{total}")
             
             transcript = None
             if item.get('is_video'):
                 transcript = self._transcribe(
                     URLHelper.add_img_index(base_url, idx), 
-                    idx
+                    idx,
+                    content.platform,
+                    item.get('media_id', '')
                 )
             
-            results.append({
+            return {
                 'position': idx,
                 'is_video': item.get('is_video', False),
                 'transcript': transcript,
                 'url': URLHelper.add_img_index(base_url, idx),
-            })
+            }
+        
+        entries = list(enumerate(content.carousel_items, 1))
+        outcomes = worker_pools.map_bounded('carousel', process_item, entries, CAROUSEL_MAX_PARALLEL)
+        
+        results = []
+        for (idx, item), outcome in zip(entries, outcomes):
+            if isinstance(outcome, Overloaded):
+                raise outcome
+            if isinstance(outcome, Exception):
+                # A failed item keeps its slot so positions stay aligned
+                logger.error(f"Carousel item {idx} failed: {outcome}")
+                outcome = {
+                    'position': idx,
+                    'is_video': item.get('is_video', False),
+                    'transcript': None,
+                    'url': URLHelper.add_img_index(base_url, idx),
+                }
+            results.append(outcome)
         
         logger.info(f"Carousel complete: {len(results)} items")
         return results
     
-    def _transcribe(self, url: str, item_index: int = 0) -> Optional[str]:
-        """Download audio and transcribe"""
-        audio_path = self.audio.download(url, item_index)
-        if not audio_path:
+    def _transcribe(self, url: str, item_index: int = 0, platform: str = '',
+                    media_id: str = '', info: Optional[Dict] = None,
+                    stop: Optional[threading.Event] = None) -> Optional[str]:
+        """
+        Download audio and transcribe, unless a transcript is already stored
+        
+        Gives up (returning None) once `stop` is set, so an abandoned
+        extraction does not go on to upload audio to Whisper.
+        """
+        cached = TranscriptStore.get(platform, media_id)
+        if cached:
+            return cached
+        
+        if stop and stop.is_set():
+            return None
+        with admission.slot('download'):
+            audio = self.audio.download(url, item_index, info)
+        if not audio:
             return None
         
-        transcript = self.groq.transcribe_audio(audio_path)
-        self.audio.delete(audio_path)
+        processed = self.audio_processor.preprocess(audio)
+        try:
+            if stop and stop.is_set():
+                logger.info("Extraction ended, skipping transcription")
+                return None
+            transcript = self.transcriber.transcribe(processed)
+        finally:
+            self.audio.delete(audio)
+            if processed is not audio:
+                self.audio.delete(processed)
+        if isinstance(transcript, PartialTranscript):
+            # Gaps from failed segments: a later run should try again
+            logger.warning("Transcript is partial, not storing it")
+        else:
+            TranscriptStore.put(platform, media_id, transcript, 'whisper')
         return transcript
     
     def _build_data(self, url: str, content: ScrapedContent, items: List[Dict]) -> Dict:
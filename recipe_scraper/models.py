@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Dict, Optional, List
+from typing import IO, Any, Dict, Optional, List
 
 @dataclass
 class ScrapedContent:
@@ -15,4 +15,18 @@ class ScrapedContent:
     is_video: bool
     is_carousel: bool = False
     carousel_items: List[Dict] = field(default_factory=list)
-    caption_text: Optional[str] = None
\ No newline at end of file
+    caption_text: Optional[str] = None
+    media_id: str = ''
+    # Raw yt-dlp info dict, reused by the audio stage to skip a second extraction
+    info: Optional[Dict] = field(default=None, repr=False)
+    # Deferred comment download of the yt-dlp pass (video_scraper.CommentFetch)
+    comment_fetch: Optional[Any] = field(default=None, repr=False)
+
+@dataclass
+class AudioData:
+    name: str
+    file: IO[bytes]
+    size: int = 0
+    duration: Optional[float] = None
+    # Set when the audio lives in download_dir rather than an in-memory buffer
+    path: Optional[str] = None
\ No newline at end of file
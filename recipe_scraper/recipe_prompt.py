@@ -5,6 +5,9 @@ from core.config import MAX_TRANSCRIPT_LENGTH
 logger = logging.getLogger(__name__)
 
 class RecipePromptBuilder:
+    # Bump when the template or output format changes; invalidates memoized LLM answers
+    TEMPLATE_VERSION = 1
+    
     @staticmethod
     def build(data: Dict) -> str:
         """Build prompt for recipe extraction"""
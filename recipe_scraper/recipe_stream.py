@@ -0,0 +1,84 @@
+import re
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class RecipeStreamParser:
+    """
+    Incremental parser for a streamed recipe response
+    
+    Fed the LLM output chunk by chunk, it returns each recipe object as
+    soon as its closing brace arrives. Recipes are the objects directly
+    inside the top-level "recipes" array (or inside a top-level array).
+    Text before the JSON (markdown fences) is ignored.
+    """
+    
+    ARRAY_KEY = re.compile(r'"(\w+)"\s*:\s*$')
+    
+    def __init__(self, array_key: str = 'recipes'):
+        self.array_key = array_key
+        self.buffer = ''
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        # Stack depth of the array whose elements are recipes, once found
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+    
+    def feed(self, chunk: str) -> List[Dict]:
+        """Add text and return the recipes it completed"""
+        self.buffer += chunk
+        completed = []
+        
+        for i in range(self._pos, len(self.buffer)):
+            char = self.buffer[i]
+            
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            
+            if char == '"' and self._stack:
+                self._in_string = True
+            elif char in '{[':
+                if char == '[' and self._array_depth is None and self._is_recipe_array(i):
+                    self._array_depth = len(self._stack) + 1
+                if char == '{' and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = i
+                self._stack.append(char)
+            elif char in '}]' and self._stack:
+                self._stack.pop()
+                if char == '}' and self._item_start is not None and len(self._stack) == self._array_depth:
+                    recipe = self._load(self.buffer[self._item_start:i + 1])
+                    if recipe is not None:
+                        completed.append(recipe)
+                    self._item_start = None
+                elif char == ']' and self._array_depth is not None and len(self._stack) < self._array_depth:
+                    self._array_depth = None
+        
+        self._pos = len(self.buffer)
+        return completed
+    
+    def _is_recipe_array(self, index: int) -> bool:
+        if not self._stack:
+            return True
+        if self._stack != ['{']:
+            return False
+        match = self.ARRAY_KEY.search(self.buffer[:index])
+        return bool(match) and match.group(1) == self.array_key
+    
+    @staticmethod
+    def _load(text: str) -> Optional[Dict]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.debug(f"Skipping unparseable streamed recipe: {e}")
+            return None
+        return value if isinstance(value, dict) else None
@@ -0,0 +1,107 @@
+import re
+import time
+import logging
+from difflib import SequenceMatcher
+from typing import List, Optional
+
+from recipe_scraper.groq_client import GroqClient
+from recipe_scraper.audio_processor import AudioProcessor
+from recipe_scraper.models import AudioData
+from core.executor import worker_pools
+from core.admission import Overloaded
+from core.metrics import metrics
+from core.config import (
+    WHISPER_MAX_UPLOAD_BYTES, TRANSCRIBE_CHUNK_SECONDS,
+    TRANSCRIBE_CHUNK_OVERLAP, TRANSCRIBE_MAX_PARALLEL
+)
+
+logger = logging.getLogger(__name__)
+
+class PartialTranscript(str):
+    """Stitched transcript with gaps where segments failed: usable now, but not stored"""
+
+class ChunkedTranscriber:
+    """Transcribe long audio as overlapping segments in parallel"""
+    
+    # Words compared at each seam when removing the overlap
+    SEAM_WORDS = 60
+    MIN_SEAM_MATCH = 3
+    
+    def __init__(self, groq: GroqClient, processor: AudioProcessor):
+        self.groq = groq
+        self.processor = processor
+    
+    def transcribe(self, audio: AudioData) -> Optional[str]:
+        """
+        Transcribe audio, splitting it when it is long or over the upload limit
+        
+        If some segments fail, the rest is returned as a PartialTranscript.
+        """
+        if not self._should_split(audio):
+            return self.groq.transcribe_audio(audio)
+        
+        segments = self.processor.split(audio, TRANSCRIBE_CHUNK_SECONDS, TRANSCRIBE_CHUNK_OVERLAP)
+        if not segments:
+            return self.groq.transcribe_audio(audio)
+        
+        start = time.monotonic()
+        try:
+            results = worker_pools.map_bounded(
+                'transcription', self.groq.transcribe_audio, segments, TRANSCRIBE_MAX_PARALLEL
+            )
+        finally:
+            for segment in segments:
+                segment.file.close()
+        
+        for result in results:
+            if isinstance(result, Overloaded):
+                raise result
+        
+        texts = [r if isinstance(r, str) else None for r in results]
+        failed = sum(1 for t in texts if not t)
+        if failed:
+            logger.warning(f"{failed}/{len(segments)} segments failed to transcribe")
+        
+        metrics.observe('transcription.chunked', time.monotonic() - start)
+        logger.info(f"Chunked transcription: {len(segments)} segments in {time.monotonic() - start:.1f}s")
+        text = self.stitch(texts)
+        return PartialTranscript(text) if text and failed else text
+    
+    def _should_split(self, audio: AudioData) -> bool:
+        if not self.processor.available or not audio.duration:
+            return False
+        return (audio.duration > TRANSCRIBE_CHUNK_SECONDS * 1.5
+                or audio.size > WHISPER_MAX_UPLOAD_BYTES)
+    
+    @classmethod
+    def stitch(cls, texts: List[Optional[str]]) -> Optional[str]:
+        """Join segment transcripts in order, dropping text repeated in the overlaps"""
+        merged: List[str] = []
+        for text in texts:
+            words = (text or '').split()
+            if not words:
+                continue
+            if merged:
+                words = cls._drop_overlap(merged, words)
+            merged.extend(words)
+        return ' '.join(merged) or None
+    
+    @classmethod
+    def _drop_overlap(cls, previous: List[str], current: List[str]) -> List[str]:
+        """Remove the head of current that repeats the tail of previous"""
+        tail = previous[-cls.SEAM_WORDS:]
+        head = current[:cls.SEAM_WORDS]
+        match = SequenceMatcher(
+            None, [cls._norm(w) for w in tail], [cls._norm(w) for w in head], autojunk=False
+        ).find_longest_match(0, len(tail), 0, len(head))
+        
+        if match.size < cls.MIN_SEAM_MATCH:
+            return current
+        
+        # Keep previous up to the start of the shared run and continue from it in current
+        del previous[len(previous) - len(tail) + match.a:]
+        return current[match.b:]
+    
+    @staticmethod
+    def _norm(word: str) -> str:
+        return re.sub(r'[^\w]', '', word.lower())
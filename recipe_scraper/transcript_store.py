@@ -0,0 +1,37 @@
+import logging
+from typing import Optional
+
+from core.cache import transcript_cache
+
+logger = logging.getLogger(__name__)
+
+class TranscriptStore:
+    """Transcripts and captions keyed by (platform, media_id)"""
+    
+    @staticmethod
+    def key(platform: str, media_id: str) -> Optional[str]:
+        """Cache key, or None when the media cannot be identified"""
+        if not platform or not media_id:
+            return None
+        # yt-dlp extractor names look like 'youtube' or 'facebook:reel'
+        return f"{platform.split(':')[0].lower()}:{media_id}"
+    
+    @classmethod
+    def get(cls, platform: str, media_id: str) -> Optional[str]:
+        """Return a stored transcript or None"""
+        key = cls.key(platform, media_id)
+        if not key:
+            return None
+        
+        entry = transcript_cache.get(key)
+        if entry:
+            logger.info(f"Transcript cache hit: {key} ({entry.get('source')}, {len(entry['text'])} chars)")
+            return entry['text']
+        return None
+    
+    @classmethod
+    def put(cls, platform: str, media_id: str, text: Optional[str], source: str) -> None:
+        """Store a transcript; source is 'whisper' or 'captions'"""
+        key = cls.key(platform, media_id)
+        if key and text:
+            transcript_cache.set(key, {'text': text, 'source': source})
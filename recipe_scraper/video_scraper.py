@@ -1,69 +1,113 @@
 import logging
-from typing import Optional, List
+import threading
+from typing import Callable, Optional, List, Dict, Tuple
 import yt_dlp
 
 from recipe_scraper.models import ScrapedContent
-from recipe_scraper.caption_extractor import YouTubeCaptionExtractor
+from recipe_scraper.caption_extractor import CaptionExtractor
+from recipe_scraper.transcript_store import TranscriptStore
 from core.config import MAX_COMMENTS
 
 logger = logging.getLogger(__name__)
 
 class VideoScraper:
+    # Only the top MAX_COMMENTS threads are requested and replies are skipped;
+    # top sort puts a pinned (usually publisher) comment first
+    COMMENT_EXTRACTOR_ARGS = {
+        'youtube': {
+            'max_comments': [str(MAX_COMMENTS), str(MAX_COMMENTS), '0', '0'],
+            'comment_sort': ['top'],
+        },
+    }
+    
     @staticmethod
-    def scrape(url: str, extract_comments: bool = True) -> Optional[ScrapedContent]:
-        """Scrape video metadata using yt-dlp"""
+    def scrape(url: str, extract_comments: bool = True, defer_comments: bool = False) -> Optional[ScrapedContent]:
+        """
+        Scrape video metadata using yt-dlp
+        
+        With defer_comments the comment download (the slowest part of
+        metadata extraction) is split off this pass: the result's
+        comment_fetch runs it later, e.g. alongside audio download and
+        transcription, without extracting the post a second time.
+        """
+        options = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'ignoreerrors': True,
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'allsubtitles': True,
+            'getcomments': extract_comments,
+            'extractor_args': VideoScraper.COMMENT_EXTRACTOR_ARGS,
+        }
+        ydl = None
+        comment_fetch = None
         try:
-            options = {
-                'quiet': True,
-                'no_warnings': True,
-                'skip_download': True,
-                'ignoreerrors': True,
-                'writesubtitles': True,
-                'writeautomaticsub': True,
-                'allsubtitles': True,
-                'getcomments': extract_comments,
-            }
-            
             logger.info("Extracting metadata with yt-dlp")
-            with yt_dlp.YoutubeDL(options) as ydl:
+            ydl = yt_dlp.YoutubeDL(options)
+            if extract_comments and defer_comments:
+                # Raw extraction leaves the comments in the __post_extractor
+                # hook, which processing would otherwise run right away
+                info = ydl.extract_info(url, download=False, process=False)
+                post_extractor = info.pop('__post_extractor', None) if info else None
+                info = ydl.process_ie_result(info, download=False) if info else None
+                if info and post_extractor:
+                    comment_fetch = CommentFetch(ydl, post_extractor, info)
+            else:
                 info = ydl.extract_info(url, download=False)
-                
-                if not info:
-                    logger.error("No metadata extracted")
-                    return None
-                
-                platform = info.get('extractor', '').lower()
-                
-                # Extract captions for YouTube videos
-                caption_text = None
-                if 'youtube' in platform or 'youtu.be' in url.lower():
-                    caption_text = YouTubeCaptionExtractor.extract(info)
-                
-                comments = info.get('comments', [])
-                publisher_comment = VideoScraper._find_publisher_comment(
-                    comments, 
-                    info.get('uploader_id', ''), 
-                    info.get('channel_id', '')
-                )
-                
-                logger.info(f"Platform: {platform}, Comments: {len(comments)}, Publisher: {'FOUND' if publisher_comment else 'NOT FOUND'}")
-                
-                return ScrapedContent(
-                    title=info.get('title', ''),
-                    description=info.get('description', ''),
-                    platform=platform,
-                    uploader=info.get('uploader', info.get('channel', '')),
-                    uploader_id=info.get('uploader_id', info.get('channel_id', '')),
-                    thumbnail=info.get('thumbnail', ''),
-                    hashtags=info.get('hashtags', []),
-                    comments=comments[:MAX_COMMENTS],
-                    publisher_comment=publisher_comment,
-                    is_video=True,
-                    caption_text=caption_text
-                )
+            
+            if not info:
+                logger.error("No metadata extracted")
+                return None
+            
+            platform = info.get('extractor', '').lower()
+            media_id = info.get('id', '')
+            
+            # Reuse a stored transcript/captions before fetching captions again
+            caption_text = TranscriptStore.get(platform, media_id)
+            
+            # Use platform-provided subtitles before falling back to Whisper
+            if not caption_text and info.get('_type', 'video') == 'video':
+                caption_text = CaptionExtractor.extract(info)
+                TranscriptStore.put(platform, media_id, caption_text, 'captions')
+            
+            # Carousels carry the post's comments on each entry instead
+            entries = [entry for entry in info.get('entries') or [] if entry]
+            comments = (info.get('comments') or (entries[0].get('comments') if entries else None) or [])[:MAX_COMMENTS]
+            publisher_comment = VideoScraper._find_publisher_comment(
+                comments, 
+                info.get('uploader_id', ''), 
+                info.get('channel_id', '')
+            )
+            
+            logger.info(f"Platform: {platform}, Comments: {'deferred' if comment_fetch else len(comments)}, Publisher: {'FOUND' if publisher_comment else 'NOT FOUND'}")
+            
+            content = ScrapedContent(
+                title=info.get('title', ''),
+                description=info.get('description', ''),
+                platform=platform,
+                uploader=info.get('uploader', info.get('channel', '')),
+                uploader_id=info.get('uploader_id', info.get('channel_id', '')),
+                thumbnail=info.get('thumbnail', ''),
+                hashtags=info.get('hashtags', []),
+                comments=comments,
+                publisher_comment=publisher_comment,
+                is_video=True,
+                caption_text=caption_text,
+                media_id=media_id,
+                info=info,
+                comment_fetch=comment_fetch
+            )
+            # The comment fetch now owns the YoutubeDL and closes it when done
+            ydl = None if comment_fetch else ydl
+            return content
         except Exception as e:
             logger.error(f"Video scraping failed: {e}")
             return None
+        finally:
+            if ydl:
+                ydl.close()
     
     @staticmethod
     def _find_publisher_comment(comments: List, uploader_id: str, channel_id: str) -> str:
@@ -82,4 +126,40 @@ class VideoScraper:
                     return text
         
         logger.warning("Publisher comment not found")
-        return ""
\ No newline at end of file
+        return ""
+
+class CommentFetch:
+    """
+    The comment download of a finished metadata pass
+    
+    Keeps the pass's YoutubeDL open until close(), since yt-dlp's comment
+    hook downloads through it.
+    """
+    
+    def __init__(self, ydl, post_extractor: Callable[[], Dict], info: Dict):
+        self._ydl = ydl
+        self._post_extractor = post_extractor
+        self._uploader_id = info.get('uploader_id', '')
+        self._channel_id = info.get('channel_id', '')
+        self._lock = threading.Lock()
+    
+    def fetch(self) -> Tuple[List[Dict], str]:
+        """
+        Download the comments
+        
+        Returns:
+            (top comments, publisher comment)
+        """
+        try:
+            logger.info("Fetching comments with yt-dlp")
+            comments = ((self._post_extractor() or {}).get('comments') or [])[:MAX_COMMENTS]
+        except Exception as e:
+            logger.warning(f"Comment fetch failed: {e}")
+            return [], ""
+        return comments, VideoScraper._find_publisher_comment(comments, self._uploader_id, self._channel_id)
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._ydl:
+                self._ydl.close()
+                self._ydl = None
\ No newline at end of file
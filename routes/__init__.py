@@ -1,5 +1,7 @@
 from routes.social.router import router as social_router
 from routes.article.router import router as article_router
 from routes.image.router import router as image_router
+from routes.jobs.router import router as jobs_router
+from routes.batch.router import router as batch_router
 
-__all__ = ['social_router', 'article_router', 'image_router']
\ No newline at end of file
+__all__ = ['social_router', 'article_router', 'image_router', 'jobs_router', 'batch_router']
\ No newline at end of file
@@ -5,14 +5,21 @@ from typing import Optional, Dict
 
 from recipe_scraper.groq_client import GroqClient
 from recipe_scraper.recipe_prompt import RecipePromptBuilder
+from core.admission import Overloaded
 
 logger = logging.getLogger(__name__)
 
 class ArticleController:
     """Controller for article/text recipe extraction"""
     
-    def __init__(self):
-        self.groq = GroqClient()
+    def __init__(self, groq: Optional[GroqClient] = None):
+        self.groq = groq or GroqClient()
+    
+    def cached(self, text: str) -> Optional[Dict]:
+        """Memoized extraction for the text, if there is one"""
+        if not text or len(text.strip()) == 0:
+            return None
+        return self.groq.cached(self._prompt(text))
     
     def process(self, text: str) -> Optional[Dict]:
         """
@@ -38,20 +45,9 @@ class ArticleController:
                 "error": "Empty text provided"
             }
         
-        # Build data structure similar to social media scraping
-        data = {
-            'title': 'Article',
-            'publisher_name': 'Unknown',
-            'caption': text,
-            'transcript': '',
-            'platform': 'article',
-            'is_carousel': False,
-            'publisher_comment': ''
-        }
-        
         # Extract recipes
         try:
-            prompt = RecipePromptBuilder.build(data)
+            prompt = self._prompt(text)
             result = self.groq.extract_recipes(prompt)
             
             if not result:
@@ -63,10 +59,26 @@ class ArticleController:
             
             return result
         
+        except Overloaded:
+            raise
         except Exception as e:
             logger.error(f"Error processing article: {e}")
             return {
                 "recipes": [],
                 "total_recipes": 0,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+    
+    @staticmethod
+    def _prompt(text: str) -> str:
+        # Build data structure similar to social media scraping
+        data = {
+            'title': 'Article',
+            'publisher_name': 'Unknown',
+            'caption': text,
+            'transcript': '',
+            'platform': 'article',
+            'is_carousel': False,
+            'publisher_comment': ''
+        }
+        return RecipePromptBuilder.build(data)
\ No newline at end of file
@@ -1,12 +1,16 @@
 # /article/router.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, Optional
 
-from core.security import verify_api_key
+from core.security import verify_api_key, api_key_id
 from core.rate_limit import rate_limiter
+from core.usage import usage_meter
+from core.executor import worker_pools
+from core.admission import admission
 from routes.article.controller import ArticleController
+from routes.dependencies import get_article_controller
 
 router = APIRouter(prefix="/extract-recipe/article", tags=["article"])
 
@@ -18,22 +22,33 @@ class ArticleScrapeResponse(BaseModel):
     data: Dict
     message: str = ""
 
+async def extract_article(controller: ArticleController, text: str) -> Optional[Dict]:
+    """Extract recipes from text; only uncached work is charged against quotas (429) or shed (503)"""
+    cached = await worker_pools.run('lookups', controller.cached, text)
+    if cached is not None:
+        return cached
+    await worker_pools.run('lookups', usage_meter.check)
+    admission.check('llm', backlog=worker_pools.queued('article'))
+    return await worker_pools.run('article', controller.process, text)
+
 @router.post("", response_model=ArticleScrapeResponse)
 async def scrape_article(
     request: ArticleScrapeRequest,
-    api_key: str = Depends(verify_api_key)
+    response: Response,
+    api_key: str = Depends(verify_api_key),
+    controller: ArticleController = Depends(get_article_controller)
 ):
     """
     Extract recipe from article URL or text content
     """
-    # Rate limiting
-    rate_limiter.check_rate_limit(api_key)
-    
-    controller = ArticleController()
+    # Rate limiting (quotas are checked once the result turns out not to be cached)
+    rate_limit = await rate_limiter.check_rate_limit(api_key)
+    response.headers.update(rate_limit.headers())
     
     try:
         # Handle both URL and direct text
-        result = controller.process(request.url)
+        with usage_meter.attribute(api_key_id(api_key)), admission.deadline():
+            result = await extract_article(controller, request.url)
         
         if not result:
             raise HTTPException(
@@ -47,6 +62,9 @@ async def scrape_article(
             message="Recipe extracted successfully"
         )
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
         raise HTTPException(
             status_code=500,
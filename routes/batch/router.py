@@ -0,0 +1,121 @@
+# /batch/router.py
+
+import json
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Dict, List, Literal, Optional
+
+from core.security import verify_api_key, api_key_id
+from core.rate_limit import rate_limiter
+from core.usage import usage_meter
+from core.admission import admission
+from core.groq_scheduler import groq_scheduler
+from core.cache import CachePolicy
+from core.config import BATCH_MAX_ITEMS, BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY
+from routes.social.controller import SocialController
+from routes.social.router import extract_social
+from routes.article.controller import ArticleController
+from routes.article.router import extract_article
+from routes.dependencies import get_social_controller, get_article_controller
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/extract-recipe/batch", tags=["batch"])
+
+class BatchItem(BaseModel):
+    url: str  # Social URL, or article URL/text when type is "article"
+    type: Literal['social', 'article'] = 'social'
+
+class BatchScrapeRequest(BaseModel):
+    items: List[BatchItem] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    include_comments: bool = True
+    concurrency: Optional[int] = Field(None, ge=1)
+
+@router.post("")
+async def scrape_batch(
+    request: BatchScrapeRequest,
+    api_key: str = Depends(verify_api_key),
+    social: SocialController = Depends(get_social_controller),
+    article: ArticleController = Depends(get_article_controller),
+    cache_control: Optional[str] = Header(None)
+):
+    """
+    Extract recipes from many social URLs and/or article texts
+    
+    Items run concurrently (`concurrency`, capped at BATCH_MAX_CONCURRENCY)
+    and each result is streamed back as one NDJSON line as soon as it
+    finishes, so lines arrive out of order; `index` is the item's position
+    in the request. Repeated items are extracted once.
+    """
+    # One rate-limit charge per item, in a single check; a batch larger than
+    # the whole limit could never be admitted, so say so instead of a 429
+    max_items = min(BATCH_MAX_ITEMS, rate_limiter.algorithm.limit)
+    if len(request.items) > max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {max_items} items per request "
+                   f"(each item counts against the rate limit of {rate_limiter.algorithm.limit} "
+                   f"per {int(rate_limiter.algorithm.window)}s)"
+        )
+    rate_limit = await rate_limiter.check_rate_limit(api_key, cost=len(request.items))
+    
+    cache_policy = CachePolicy.from_header(cache_control)
+    fan_out = min(request.concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    
+    # Deduplicate: social URLs by canonical post, articles by exact text
+    groups: Dict[str, List[int]] = {}
+    for idx, item in enumerate(request.items):
+        key = (f"social:{SocialController.cache_key(item.url, request.include_comments)}"
+               if item.type == 'social' else f"article:{item.url}")
+        groups.setdefault(key, []).append(idx)
+    
+    logger.info(f"Batch: {len(request.items)} items, {len(groups)} unique, fan-out {fan_out}")
+    
+    slots = asyncio.Semaphore(fan_out)
+    
+    async def run(key: str, item: BatchItem):
+        async with slots:
+            try:
+                # Batch items yield Groq budget to interactive requests
+                with usage_meter.attribute(api_key_id(api_key)), admission.deadline(), groq_scheduler.background():
+                    if item.type == 'social':
+                        result = await extract_social(social, item.url, cache_policy, request.include_comments)
+                    else:
+                        result = await extract_article(article, item.url)
+                return key, result, None
+            except HTTPException as e:
+                # Items are shed (503) or refused over quota (429) one by one;
+                # cache hits never are
+                return key, None, e.detail
+            except Exception as e:
+                logger.error(f"Batch item failed: {e}")
+                return key, None, str(e)
+    
+    async def stream() -> AsyncIterator[str]:
+        tasks = [
+            asyncio.create_task(run(key, request.items[indices[0]]))
+            for key, indices in groups.items()
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, result, error = await next_done
+                error = error or (result or {}).get('error') or (None if result else "Extraction failed")
+                
+                for idx in groups[key]:
+                    yield json.dumps({
+                        "index": idx,
+                        "type": request.items[idx].type,
+                        "url": request.items[idx].url,
+                        "success": error is None,
+                        "data": result if error is None else None,
+                        "error": error,
+                    }) + "\n"
+        finally:
+            # Client went away: stop items that haven't started
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson", headers=rate_limit.headers())
\ No newline at end of file
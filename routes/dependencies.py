@@ -0,0 +1,38 @@
+# routes/dependencies.py
+
+import logging
+from fastapi import Request
+
+from recipe_scraper import RecipeScraper
+from recipe_scraper.groq_client import GroqClient
+from services.ocr import OCRService
+from routes.social.controller import SocialController
+from routes.article.controller import ArticleController
+from routes.image.controller import ImageController
+
+logger = logging.getLogger(__name__)
+
+def init_controllers(state) -> None:
+    """
+    Build the scraper, Groq and OCR clients once per process
+    
+    All controllers share a single Groq client (and its keep-alive
+    connection pool). The controllers are stateless between calls, so one
+    instance of each serves every concurrent request.
+    """
+    logger.info("Initializing shared controllers")
+    groq = GroqClient()
+    state.groq = groq
+    state.social_controller = SocialController(RecipeScraper(groq=groq))
+    state.article_controller = ArticleController(groq=groq)
+    state.image_controller = ImageController(ocr=OCRService(client=groq.client), groq=groq)
+    logger.info("Shared controllers ready")
+
+def get_social_controller(request: Request) -> SocialController:
+    return request.app.state.social_controller
+
+def get_article_controller(request: Request) -> ArticleController:
+    return request.app.state.article_controller
+
+def get_image_controller(request: Request) -> ImageController:
+    return request.app.state.image_controller
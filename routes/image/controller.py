@@ -6,41 +6,71 @@ from typing import Optional, Dict
 from services.ocr import OCRService
 from recipe_scraper.groq_client import GroqClient
 from recipe_scraper.recipe_prompt import RecipePromptBuilder
-from core.config import MAX_OCR_TEXT_LENGTH
+from services.image_hash import ImageHasher
+from core.cache import CachePolicy, ocr_cache, image_result_cache
+from core.admission import Overloaded
+from core.config import MAX_OCR_TEXT_LENGTH, IMAGE_PERCEPTUAL_HASH
 
 logger = logging.getLogger(__name__)
 
 class ImageController:
     """Controller for image recipe extraction"""
     
-    def __init__(self):
+    def __init__(self, ocr: Optional[OCRService] = None, groq: Optional[GroqClient] = None):
         logger.info("Initializing Image Controller")
-        self.ocr = OCRService()
-        self.groq = GroqClient()
+        self.ocr = ocr or OCRService()
+        self.groq = groq or GroqClient()
         logger.info("Image Controller initialized successfully")
     
-    def process(self, image_bytes: bytes) -> Optional[Dict]:
+    def cached(self, image_bytes: bytes, cache_policy: Optional[CachePolicy] = None) -> Optional[Dict]:
+        """Cached result for this image (or a verified resized copy), if the policy allows reading it"""
+        if not (cache_policy or CachePolicy()).read:
+            return None
+        cached = self._cache_lookup(image_result_cache, self._cache_keys(image_bytes))
+        if cached is not None:
+            logger.info("Image result cache hit")
+        return cached
+    
+    def process(self, image_bytes: bytes, cache_policy: Optional[CachePolicy] = None) -> Optional[Dict]:
         """
         Extract recipes from image
         
         Flow:
-        1. OCR to extract text from image (Groq Vision)
-        2. Pass extracted text to LLM (Groq Llama)
-        3. Parse and return structured recipe JSON
+        1. Return cached result if this image (or a verified resized copy) was seen
+        2. OCR to extract text from image (Groq Vision)
+        3. Pass extracted text to LLM (Groq Llama)
+        4. Parse and return structured recipe JSON
         
         Args:
             image_bytes: Raw image bytes
+            cache_policy: Per-request cache bypass/refresh
             
         Returns:
             Dict containing recipes and metadata
         """
         logger.info(f"Processing image: {len(image_bytes)} bytes")
         
+        cache_policy = cache_policy or CachePolicy()
+        cache_keys = self._cache_keys(image_bytes)
+        
+        if cache_policy.read:
+            cached = self._cache_lookup(image_result_cache, cache_keys)
+            if cached is not None:
+                logger.info("Image result cache hit")
+                return cached
+        
         # Step 1: OCR Text Extraction
         logger.info("Step 1/3: Starting OCR text extraction")
         
         try:
-            extracted_text = self.ocr.extract_text(image_bytes)
+            extracted_text = self._cache_lookup(ocr_cache, cache_keys) if cache_policy.read else None
+            
+            if extracted_text:
+                logger.info("OCR cache hit")
+            else:
+                extracted_text = self.ocr.extract_text(image_bytes)
+                if extracted_text and cache_policy.write:
+                    self._cache_store(ocr_cache, cache_keys, extracted_text)
             
             if not extracted_text or len(extracted_text.strip()) == 0:
                 logger.warning("No text extracted from image")
@@ -57,6 +87,8 @@ class ImageController:
                 logger.warning(f"Text truncated from {len(extracted_text)} to {MAX_OCR_TEXT_LENGTH} characters")
                 extracted_text = extracted_text[:MAX_OCR_TEXT_LENGTH] + "\n\n[Text truncated]"
         
+        except Overloaded:
+            raise
         except Exception as e:
             logger.error(f"OCR extraction failed: {str(e)}")
             return {
@@ -88,7 +120,7 @@ class ImageController:
             logger.info(f"Recipe extraction prompt built: {len(prompt)} characters")
             
             logger.info("Calling LLM for recipe extraction")
-            result = self.groq.extract_recipes(prompt)
+            result = self.groq.extract_recipes(prompt, cache_policy)
             
             if not result:
                 logger.warning("No recipes extracted from image")
@@ -105,12 +137,48 @@ class ImageController:
                 for idx, recipe in enumerate(result.get('recipes', []), 1):
                     logger.info(f"Recipe {idx}: {recipe.get('name', 'Unnamed')} - {len(recipe.get('ingrediants', {}))} ingredients, {len(recipe.get('steps', []))} steps")
             
+            if cache_policy.write and result.get('recipes'):
+                self._cache_store(image_result_cache, cache_keys, result)
+            
             return result
         
+        except Overloaded:
+            raise
         except Exception as e:
             logger.error(f"Recipe extraction failed: {type(e).__name__} - {str(e)}")
             return {
                 "recipes": [],
                 "total_recipes": 0,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+    
+    @staticmethod
+    def _cache_keys(image_bytes: bytes) -> Dict:
+        """Exact content hash, plus a perceptual fingerprint for near-duplicates"""
+        return {
+            'exact': f"sha256:{ImageHasher.content_hash(image_bytes)}",
+            'fingerprint': ImageHasher.fingerprint(image_bytes) if IMAGE_PERCEPTUAL_HASH else None,
+        }
+    
+    @staticmethod
+    def _cache_lookup(cache, keys: Dict):
+        value = cache.get(keys['exact'])
+        fingerprint = keys['fingerprint']
+        if value is not None or not fingerprint:
+            return value
+        
+        # A dHash match only names a candidate; its entry is served only if
+        # the fine hash and the aspect ratio agree as well
+        candidate = cache.get(f"phash:{fingerprint['dhash']}")
+        if candidate and ImageHasher.same_image(fingerprint, candidate['fingerprint']):
+            return cache.get(candidate['key'])
+        return None
+    
+    @staticmethod
+    def _cache_store(cache, keys: Dict, value) -> None:
+        cache.set(keys['exact'], value)
+        if keys['fingerprint']:
+            cache.set(f"phash:{keys['fingerprint']['dhash']}", {
+                'key': keys['exact'],
+                'fingerprint': keys['fingerprint'],
+            })
\ No newline at end of file
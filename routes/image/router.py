@@ -1,20 +1,45 @@
 # /image/router.py
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Header, Response
+from typing import Dict, Optional
 
-from core.security import verify_api_key
+from core.security import verify_api_key, api_key_id
 from core.rate_limit import rate_limiter
+from core.usage import usage_meter
+from core.executor import worker_pools
+from core.admission import admission
+from core.cache import CachePolicy
+from core.single_flight import image_flight
+from services.image_hash import ImageHasher
 from routes.image.controller import ImageController
+from routes.dependencies import get_image_controller
 
 router = APIRouter(prefix="/extract-recipe/image", tags=["image"])
 logger = logging.getLogger(__name__)
 
+async def extract_image(controller: ImageController, image_bytes: bytes,
+                        cache_policy: CachePolicy) -> Optional[Dict]:
+    """Run one extraction, sharing it with identical concurrent uploads"""
+    async def extract() -> Optional[Dict]:
+        cached = await worker_pools.run('lookups', controller.cached, image_bytes, cache_policy)
+        if cached is not None:
+            return cached
+        # Only cache misses are charged against quotas (429) or shed (503);
+        # hits and coalesced uploads never are
+        await worker_pools.run('lookups', usage_meter.check)
+        admission.check('ocr', backlog=worker_pools.queued('image'))
+        return await worker_pools.run('image', controller.process, image_bytes, cache_policy)
+    
+    return await image_flight.do(ImageHasher.content_hash(image_bytes), extract)
+
 @router.post("")
 async def scrape_image(
+    response: Response,
     file: UploadFile = File(...),
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    controller: ImageController = Depends(get_image_controller),
+    cache_control: Optional[str] = Header(None)
 ):
     """
     Extract recipe from image using OCR + LLM
@@ -24,12 +49,17 @@ async def scrape_image(
     2. Extract text using Groq Vision (OCR)
     3. Parse recipe using Groq Llama
     4. Return structured JSON
+    
+    Repeat uploads (and, with IMAGE_PERCEPTUAL_HASH, verified re-encoded or
+    resized copies) are served from cache; `Cache-Control: no-cache` /
+    `no-store` refresh or bypass it.
     """
     logger.info(f"Image scraping request received: {file.filename} ({file.content_type})")
     
     # Rate limiting
     try:
-        rate_limiter.check_rate_limit(api_key)
+        rate_limit = await rate_limiter.check_rate_limit(api_key)
+        response.headers.update(rate_limit.headers())
         logger.debug("Rate limit check passed")
     except HTTPException as e:
         logger.warning(f"Rate limit exceeded for API key")
@@ -46,8 +76,6 @@ async def scrape_image(
     
     logger.info(f"File type validated: {file.content_type}")
     
-    controller = ImageController()
-    
     try:
         # Read image bytes
         logger.debug("Reading image bytes from upload")
@@ -64,7 +92,11 @@ async def scrape_image(
         
         # Process image
         logger.info("Starting image processing pipeline")
-        result = controller.process(image_bytes)
+        cache_policy = CachePolicy.from_header(cache_control)
+        
+        # Identical concurrent uploads share one extraction
+        with usage_meter.attribute(api_key_id(api_key)), admission.deadline():
+            result = await extract_image(controller, image_bytes, cache_policy)
         
         if not result:
             logger.error("Recipe extraction returned no result")
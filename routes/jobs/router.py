@@ -0,0 +1,22 @@
+# /jobs/router.py
+
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict
+
+from core.security import verify_api_key
+from core.jobs import job_queue
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, api_key: str = Depends(verify_api_key)) -> Dict:
+    """
+    Status of an asynchronous extraction
+    
+    `status` is queued, running, done or failed; `stage` is the pipeline
+    stage currently running; `result` is set once the job is done.
+    """
+    job = await job_queue.get(job_id, api_key)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
\ No newline at end of file
@@ -5,35 +5,60 @@ from typing import Optional, Dict
 
 from recipe_scraper import RecipeScraper
 from services.platform_detection import PlatformDetector
+from services.url_canonicalizer import URLCanonicalizer
+from core.cache import CachePolicy, result_cache
+from core.admission import Overloaded
 
 logger = logging.getLogger(__name__)
 
 class SocialController:
     """Controller for social media recipe extraction"""
     
-    def __init__(self):
-        self.scraper = RecipeScraper()
+    def __init__(self, scraper: Optional[RecipeScraper] = None):
+        self.scraper = scraper or RecipeScraper()
     
-    def process(self, url: str) -> Optional[Dict]:
+    @staticmethod
+    def cache_key(url: str, include_comments: bool = True) -> str:
+        """Result cache key; results built without comments are kept apart"""
+        key = URLCanonicalizer.key(url)
+        return key if include_comments else f"{key}:no-comments"
+    
+    def cached(self, url: str, cache_policy: Optional[CachePolicy] = None,
+               include_comments: bool = True) -> Optional[Dict]:
+        """Cached result for the URL, if the policy allows reading it"""
+        if not (cache_policy or CachePolicy()).read or not PlatformDetector.is_supported(url):
+            return None
+        cache_key = self.cache_key(url, include_comments)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Result cache hit: {cache_key}")
+        return cached
+    
+    def process(self, url: str, cache_policy: Optional[CachePolicy] = None,
+                include_comments: bool = True) -> Optional[Dict]:
         """
         Process social media URL and extract recipes
         
         Flow:
         1. Detect platform
-        2. Fetch metadata (yt-dlp / instaloader)
-        3. Download and transcribe audio (if video)
-        4. Extract recipes with LLM
+        2. Return cached result if available
+        3. Fetch metadata (yt-dlp / instaloader)
+        4. Download and transcribe audio (if video)
+        5. Extract recipes with LLM
         
         Args:
             url: Social media post URL
+            cache_policy: Per-request cache bypass/refresh
+            include_comments: Fetch comments (and the publisher comment)
             
         Returns:
             Dict containing recipes and metadata
         """
-        logger.info(f"Processing social media URL: {url}")
+        canonical = URLCanonicalizer.canonicalize(url)
+        logger.info(f"Processing social media URL: {url} [{canonical.key}]")
         
         # Detect platform
-        platform = PlatformDetector.detect(url)
+        platform = canonical.platform
         logger.info(f"Detected platform: {platform}")
         
         if not PlatformDetector.is_supported(url):
@@ -44,10 +69,26 @@ class SocialController:
                 "error": f"Platform '{platform}' is not supported"
             }
         
+        cache_policy = cache_policy or CachePolicy()
+        cache_key = self.cache_key(url, include_comments)
+        
+        cached = self.cached(url, cache_policy, include_comments)
+        if cached is not None:
+            return cached
+        
         # Scrape and extract recipes
         try:
-            result = self.scraper.scrape(url)
+            result = self.scraper.scrape(url, cache_policy, include_comments=include_comments)
+            
+            # Only successful extractions are cached; empty results and partial
+            # ones (transcript or recipe stream cut short) may be transient failures
+            partial = result and (result.get('partial_transcript') or result.get('partial_recipes'))
+            if cache_policy.write and result and result.get('recipes') and not partial:
+                result_cache.set(cache_key, result)
             return result
+        except Overloaded:
+            # Shed under load: surfaces as 503 with Retry-After
+            raise
         except Exception as e:
             logger.error(f"Error processing social media URL: {e}")
             return {
@@ -1,40 +1,116 @@
 # /social/router.py
 
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from typing import Dict
+from typing import AsyncIterator, Dict, Optional
 
-from core.security import verify_api_key
+from core.security import verify_api_key, api_key_id
 from core.rate_limit import rate_limiter
+from core.usage import usage_meter
+from core.executor import worker_pools
+from core.cache import CachePolicy
+from core.single_flight import social_flight
+from core.jobs import job_queue
+from core.admission import admission
+from core import progress
+from core.config import SSE_KEEPALIVE_SECONDS
+from services.url_canonicalizer import URLCanonicalizer
 from routes.social.controller import SocialController
+from routes.dependencies import get_social_controller
 
 router = APIRouter(prefix="/extract-recipe/social", tags=["social"])
 
 class SocialScrapeRequest(BaseModel):
     url: HttpUrl
+    include_comments: bool = True
+    webhook_url: Optional[HttpUrl] = None
 
 class SocialScrapeResponse(BaseModel):
     success: bool
     data: Dict
     message: str = ""
 
+async def extract_social(controller: SocialController, url: str,
+                         cache_policy: CachePolicy, include_comments: bool = True) -> Optional[Dict]:
+    """Run one extraction, sharing it with identical concurrent requests"""
+    async def extract() -> Optional[Dict]:
+        cached = await worker_pools.run('lookups', controller.cached, url, cache_policy, include_comments)
+        if cached is not None:
+            return cached
+        # Only cache misses are charged against quotas (429) or shed (503);
+        # hits and coalesced requests never are
+        await worker_pools.run('lookups', usage_meter.check)
+        admission.check('metadata', backlog=worker_pools.queued('social'))
+        return await worker_pools.run('social', controller.process, url, cache_policy, include_comments)
+    
+    return await social_flight.do(SocialController.cache_key(url, include_comments), extract)
+
+async def run_social_job(controller: SocialController, payload: Dict) -> Optional[Dict]:
+    """Job handler for queued (?async=true) social extractions"""
+    return await extract_social(
+        controller,
+        payload['url'],
+        CachePolicy.from_header(payload.get('cache_control')),
+        payload.get('include_comments', True)
+    )
+
 @router.post("", response_model=SocialScrapeResponse)
 async def scrape_social(
     request: SocialScrapeRequest,
-    api_key: str = Depends(verify_api_key)
+    response: Response,
+    run_async: bool = Query(False, alias="async"),
+    api_key: str = Depends(verify_api_key),
+    controller: SocialController = Depends(get_social_controller),
+    cache_control: Optional[str] = Header(None)
 ):
     """
     Scrape recipe from social media URL
     
     Supports: YouTube, Instagram, TikTok, Facebook
+    
+    Send `Cache-Control: no-cache` to refresh a cached result, or
+    `Cache-Control: no-store` to bypass the cache entirely.
+    
+    Set `include_comments` to false to skip comment fetching (faster on
+    large posts, but the publisher comment is not used).
+    
+    With `?async=true` the extraction is queued and a job ID is returned
+    immediately; poll `GET /jobs/{job_id}` or pass `webhook_url` to be
+    called when it finishes.
     """
-    # Rate limiting
-    rate_limiter.check_rate_limit(api_key)
+    # Rate limiting (quotas are checked once the result turns out not to be cached)
+    rate_limit = await rate_limiter.check_rate_limit(api_key)
+    response.headers.update(rate_limit.headers())
     
-    controller = SocialController()
+    url = str(request.url)
+    
+    if run_async:
+        job_id = await job_queue.submit(
+            'social',
+            api_key,
+            {
+                'url': url,
+                'include_comments': request.include_comments,
+                'cache_control': cache_control,
+            },
+            webhook_url=str(request.webhook_url) if request.webhook_url else None
+        )
+        response.status_code = 202
+        return SocialScrapeResponse(
+            success=True,
+            data={"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"},
+            message="Extraction queued"
+        )
     
     try:
-        result = controller.process(str(request.url))
+        cache_policy = CachePolicy.from_header(cache_control)
+        
+        # Identical concurrent requests share one extraction
+        with usage_meter.attribute(api_key_id(api_key)), admission.deadline():
+            result = await extract_social(controller, url, cache_policy, request.include_comments)
         
         if not result:
             raise HTTPException(
@@ -48,8 +124,115 @@ async def scrape_social(
             message="Recipe extracted successfully"
         )
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def scrape_social_stream(
+    request: SocialScrapeRequest,
+    api_key: str = Depends(verify_api_key),
+    controller: SocialController = Depends(get_social_controller),
+    cache_control: Optional[str] = Header(None)
+):
+    """
+    Scrape recipe from social media URL, streaming progress as Server-Sent Events
+    
+    Events:
+    - `accepted`: platform and post ID, sent immediately
+    - `stage`: a pipeline stage started (metadata, captions, media, recipes);
+      the captions event carries title, thumbnail and publisher
+    - `recipe`: one extracted recipe, sent as soon as the LLM has written it
+    - `done`: the full result, as returned by the regular endpoint
+    - `error`: extraction failed
+    
+    Cached results skip straight to `recipe`/`done`. A request that joins an
+    identical extraction already running gets that extraction's events,
+    including the ones sent before it joined.
+    """
+    # Rate limiting (quotas are checked once the result turns out not to be cached)
+    rate_limit = await rate_limiter.check_rate_limit(api_key)
+    
+    url = str(request.url)
+    cache_policy = CachePolicy.from_header(cache_control)
+    canonical = URLCanonicalizer.canonicalize(url)
+    
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def listener(event: str, data: Dict) -> None:
+        # Called from worker threads
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+    
+    async def run() -> Optional[Dict]:
+        with progress.listen(listener), usage_meter.attribute(api_key_id(api_key)), admission.deadline():
+            return await extract_social(controller, url, cache_policy, request.include_comments)
+    
+    streamed = 0
+    
+    def render(event: str, data: Dict) -> str:
+        nonlocal streamed
+        if event == 'recipe':
+            streamed += 1
+            data = data['recipe']
+        return _sse(event, data)
+    
+    async def stream() -> AsyncIterator[str]:
+        task = asyncio.create_task(run())
+        try:
+            yield _sse('accepted', {"platform": canonical.platform, "id": canonical.content_id})
+            
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait(
+                    {getter, task}, timeout=SSE_KEEPALIVE_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter in done:
+                    yield render(*getter.result())
+                    continue
+                getter.cancel()
+                if task in done:
+                    break
+                yield ": keep-alive\n\n"
+            
+            while not events.empty():
+                yield render(*events.get_nowait())
+            
+            try:
+                result = task.result()
+            except HTTPException as e:
+                # Shed (503) or over quota (429)
+                error = {"detail": e.detail}
+                if e.headers and 'Retry-After' in e.headers:
+                    error['retry_after'] = int(e.headers['Retry-After'])
+                yield _sse('error', error)
+                return
+            except Exception as e:
+                yield _sse('error', {"detail": f"Internal server error: {str(e)}"})
+                return
+            
+            if not result or result.get('error'):
+                yield _sse('error', {"detail": (result or {}).get('error') or "Failed to extract recipe from social media post"})
+                return
+            
+            # Recipes not already streamed from the LLM (cached results, single-recipe output)
+            for recipe in result.get('recipes', [])[streamed:]:
+                yield _sse('recipe', recipe)
+            yield _sse('done', result)
+        finally:
+            # The extraction itself is shared and shielded; this only stops waiting
+            task.cancel()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **rate_limit.headers()}
+    )
\ No newline at end of file
@@ -0,0 +1,89 @@
+import io
+import hashlib
+import logging
+from typing import Dict, Optional
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class ImageHasher:
+    """Exact and perceptual hashes for uploaded images"""
+    
+    HASH_SIZE = 8
+    # The 1024-bit hash sees text-level detail the 64-bit one averages away;
+    # a near-duplicate may differ from the original in only a few bits
+    FINE_HASH_SIZE = 32
+    MAX_FINE_DISTANCE = 4
+    MAX_ASPECT_DIFF = 0.02
+    # Brightness steps (0-255) below these are not edges: on a flat background
+    # recompression noise would otherwise flip bits between copies
+    EDGE_MARGIN = 2
+    FINE_EDGE_MARGIN = 4
+    # Fine hashes with fewer set (or unset) bits come from flat images
+    MIN_FINE_BITS = 16
+    
+    @staticmethod
+    def content_hash(image_bytes: bytes) -> str:
+        """SHA-256 of the raw bytes (exact duplicates)"""
+        return hashlib.sha256(image_bytes).hexdigest()
+    
+    @classmethod
+    def fingerprint(cls, image_bytes: bytes) -> Optional[Dict]:
+        """
+        Coarse dHash (lookup key), fine dHash and size of the image
+        
+        Re-encoded, recompressed or resized copies of a picture usually share
+        the coarse hash, but so do different pictures with the same layout;
+        it only finds candidates for same_image(). Returns None if the image
+        cannot be decoded or is too flat for its hash to mean anything
+        (uniform images all hash to about 0).
+        """
+        if not PIL_AVAILABLE:
+            return None
+        
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                width, height = image.size
+                image.draft('L', (cls.FINE_HASH_SIZE * 8, cls.FINE_HASH_SIZE * 8))
+                gray = image.convert('L')
+                coarse = cls._dhash(gray, cls.HASH_SIZE, cls.EDGE_MARGIN)
+                fine = cls._dhash(gray, cls.FINE_HASH_SIZE, cls.FINE_EDGE_MARGIN)
+        except Exception as e:
+            logger.warning(f"Perceptual hash failed: {e}")
+            return None
+        
+        # Judged on the fine hash: a card with a few lines of text on a plain
+        # background has only a handful of edges at 8x8
+        ones = bin(fine).count('1')
+        if not cls.MIN_FINE_BITS <= ones <= cls.FINE_HASH_SIZE ** 2 - cls.MIN_FINE_BITS:
+            return None
+        
+        return {
+            'dhash': f"{coarse:0{cls.HASH_SIZE ** 2 // 4}x}",
+            'fine': f"{fine:0{cls.FINE_HASH_SIZE ** 2 // 4}x}",
+            'size': [width, height],
+        }
+    
+    @classmethod
+    def same_image(cls, a: Dict, b: Dict) -> bool:
+        """Whether two fingerprints with the same coarse hash are really one picture"""
+        (aw, ah), (bw, bh) = a['size'], b['size']
+        if not (aw and ah and bw and bh) or abs(aw / ah - bw / bh) > cls.MAX_ASPECT_DIFF * (aw / ah):
+            return False
+        distance = bin(int(a['fine'], 16) ^ int(b['fine'], 16)).count('1')
+        return distance <= cls.MAX_FINE_DISTANCE
+    
+    @staticmethod
+    def _dhash(gray: 'Image.Image', size: int, margin: int = 0) -> int:
+        pixels = list(gray.resize((size + 1, size), Image.LANCZOS).getdata())
+        bits = 0
+        for row in range(size):
+            offset = row * (size + 1)
+            for col in range(size):
+                bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1] + margin)
+        return bits
\ No newline at end of file
@@ -8,6 +8,9 @@ try:
 except ImportError:
     GROQ_AVAILABLE = False
 
+from core.usage import usage_meter
+from core.admission import admission, Overloaded
+from core.groq_scheduler import groq_scheduler
 from core.config import GROQ_API_KEY, VISION_MODEL
 
 logger = logging.getLogger(__name__)
@@ -15,12 +18,16 @@ logger = logging.getLogger(__name__)
 class OCRService:
     """OCR service using Groq Vision API"""
     
-    def __init__(self):
-        self.client = self._init_client()
+    # Also what a call reserves from the token budget; image tokens are
+    # accounted for once Groq's response headers come back
+    MAX_COMPLETION_TOKENS = 2000
+    
+    def __init__(self, client: Optional['Groq'] = None):
+        self.client = client if client is not None else self._init_client()
         if self.client:
             logger.info("OCR Service initialized successfully")
     
-    def _init_client(self) -> Optional[Groq]:
+    def _init_client(self) -> Optional['Groq']:
         """Initialize Groq client"""
         if not GROQ_AVAILABLE:
             logger.error("Groq library not available. Install with: pip install groq")
@@ -31,7 +38,7 @@ class OCRService:
             return None
         
         try:
-            client = Groq(api_key=GROQ_API_KEY)
+            client = Groq(api_key=GROQ_API_KEY, max_retries=0)
             logger.info("Groq client initialized for OCR")
             return client
         except Exception as e:
@@ -52,6 +59,11 @@ class OCRService:
             logger.error("Groq client not available for OCR")
             return None
         
+        with admission.slot('ocr'):
+            return self._call_vision(image_bytes)
+    
+    def _call_vision(self, image_bytes: bytes) -> Optional[str]:
+        """Run the vision call; failures are logged and return None"""
         try:
             logger.info(f"Starting OCR extraction for image ({len(image_bytes)} bytes)")
             
@@ -67,7 +79,9 @@ class OCRService:
             logger.info(f"Calling Groq Vision API with model: {VISION_MODEL}")
             
             # Call Groq Vision API
-            completion = self.client.chat.completions.create(
+            completion = groq_scheduler.call(
+                self.client.chat.completions.with_raw_response.create,
+                tokens=self.MAX_COMPLETION_TOKENS,
                 model=VISION_MODEL,
                 messages=[
                     {
@@ -97,11 +111,16 @@ Format the output clearly with proper line breaks between sections."""
                     }
                 ],
                 temperature=1,
-                max_completion_tokens=2000,
+                max_completion_tokens=self.MAX_COMPLETION_TOKENS,
                 top_p=1,
                 stream=False
             )
             
+            usage_meter.record('vision_calls', 1)
+            if completion.usage:
+                usage_meter.record('prompt_tokens', completion.usage.prompt_tokens or 0)
+                usage_meter.record('completion_tokens', completion.usage.completion_tokens or 0)
+            
             extracted_text = completion.choices[0].message.content.strip()
             
             logger.info(f"OCR extraction successful. Extracted {len(extracted_text)} characters")
@@ -109,6 +128,9 @@ Format the output clearly with proper line breaks between sections."""
             
             return extracted_text
         
+        except Overloaded:
+            raise
+        
         except Exception as e:
             logger.error(f"OCR extraction failed: {type(e).__name__} - {str(e)}")
             return None
@@ -0,0 +1,122 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+from services.platform_detection import PlatformDetector
+
+@dataclass(frozen=True)
+class CanonicalURL:
+    platform: str
+    content_id: str
+    url: str
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used for caching, deduplication and logging"""
+        return f"{self.platform}:{self.content_id}"
+
+class URLCanonicalizer:
+    """Map equivalent social media links to one (platform, content_id) key"""
+
+    HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'music.', 'web.')
+
+    TRACKING_PARAMS = {
+        'si', 'feature', 'pp', 'igsh', 'igshid', 'img_index', 'fbclid', 'gclid',
+        'mibextid', 'rdid', 'ref', 'ref_src', 'ref_url', 'is_from_webapp',
+        'sender_device', 'share_app_id', 'share_link_id', '_r', '_t', 's', 't',
+        '__cft__', '__tn__', 'app', 'source',
+    }
+
+    # (platform, pattern on "host/path", canonical URL template)
+    PATTERNS = [
+        ('youtube', re.compile(r'^youtu\.be/([A-Za-z0-9_-]{11})'),
+         'https://www.youtube.com/watch?v={id}'),
+        ('youtube', re.compile(r'^youtube(?:-nocookie)?\.com/(?:shorts|embed|live|v)/([A-Za-z0-9_-]{11})'),
+         'https://www.youtube.com/watch?v={id}'),
+        ('instagram', re.compile(r'^instagram\.com/(?:[A-Za-z0-9_.]+/)?(?:p|reels?|tv)/([A-Za-z0-9_-]+)'),
+         'https://www.instagram.com/p/{id}/'),
+        ('tiktok', re.compile(r'^tiktok\.com/(?:@[^/]+/)?(?:video|photo)/(\d+)'),
+         'https://www.tiktok.com/video/{id}'),
+        ('tiktok', re.compile(r'^tiktok\.com/v/(\d+)'),
+         'https://www.tiktok.com/video/{id}'),
+        ('facebook', re.compile(r'^facebook\.com/(?:[^/]+/)?(?:videos|reel)/(?:[^/]+/)?(\d+)'),
+         'https://www.facebook.com/watch/?v={id}'),
+        ('pinterest', re.compile(r'^pinterest\.[a-z.]+/pin/(?:[^/]*--)?(\d+)'),
+         'https://www.pinterest.com/pin/{id}/'),
+        ('twitter', re.compile(r'^(?:twitter|x)\.com/[^/]+/status/(\d+)'),
+         'https://x.com/i/status/{id}'),
+    ]
+
+    # Query-string IDs (youtube.com/watch?v=ID, facebook.com/watch/?v=ID)
+    QUERY_IDS = {
+        'youtube': ('v', re.compile(r'^[A-Za-z0-9_-]{11}$'), 'https://www.youtube.com/watch?v={id}'),
+        'facebook': ('v', re.compile(r'^\d+$'), 'https://www.facebook.com/watch/?v={id}'),
+    }
+
+    @classmethod
+    def canonicalize(cls, url: str) -> CanonicalURL:
+        """
+        Canonicalize a post URL
+
+        Returns:
+            CanonicalURL whose key is identical for equivalent links
+        """
+        return cls._canonicalize(url.strip())
+
+    @classmethod
+    def key(cls, url: str) -> str:
+        """Shortcut for canonicalize(url).key"""
+        return cls.canonicalize(url).key
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _canonicalize(cls, url: str) -> CanonicalURL:
+        platform = PlatformDetector.detect(url)
+        parsed = urlparse(url if '://' in url else f'https://{url}')
+        host = cls._normalize_host(parsed.hostname or '')
+        target = f"{host}{parsed.path}"
+
+        for name, pattern, template in cls.PATTERNS:
+            match = pattern.match(target)
+            if match:
+                content_id = match.group(1)
+                return CanonicalURL(name, content_id, template.format(id=content_id))
+
+        query_id = cls._query_id(platform, parsed.query)
+        if query_id:
+            return query_id
+
+        clean = cls._strip_tracking(host, parsed)
+        return CanonicalURL(platform, clean.split('://', 1)[1], clean)
+
+    @classmethod
+    def _normalize_host(cls, host: str) -> str:
+        host = host.lower()
+        for prefix in cls.HOST_PREFIXES:
+            if host.startswith(prefix):
+                return host[len(prefix):]
+        return host
+
+    @classmethod
+    def _query_id(cls, platform: str, query: str) -> Optional[CanonicalURL]:
+        spec = cls.QUERY_IDS.get(platform)
+        if not spec:
+            return None
+
+        param, pattern, template = spec
+        value = dict(parse_qsl(query)).get(param, '')
+        if pattern.match(value):
+            return CanonicalURL(platform, value, template.format(id=value))
+        return None
+
+    @classmethod
+    def _strip_tracking(cls, host: str, parsed) -> str:
+        """Fallback: normalized URL without tracking parameters or fragment"""
+        params = sorted(
+            (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+            if k.lower() not in cls.TRACKING_PARAMS and not k.lower().startswith('utm_')
+        )
+        path = parsed.path.rstrip('/') or '/'
+        return urlunparse(('https', host, path, '', urlencode(params), ''))
@@ -0,0 +1,74 @@
+import time
+import threading
+
+import pytest
+
+from core.admission import AdmissionControl, StageGate, Overloaded
+
+def test_estimated_wait():
+    gate = StageGate('test-estimate', limit=2, max_queue=5)
+    assert gate.estimated_wait() == 0.0
+    gate.active = 2
+    assert gate.estimated_wait() == 0.0
+    gate.service_time = 4.0
+    # Every slot busy: one frees up every 2s, and the new arrival is behind 3
+    assert gate.estimated_wait(3) == pytest.approx(8.0)
+
+def test_check_sheds_when_queue_is_full():
+    gate = StageGate('test-queue', limit=1, max_queue=2)
+    gate.active = 1
+    gate.check(time.monotonic() + 60, backlog=1)
+    with pytest.raises(Overloaded) as info:
+        gate.check(time.monotonic() + 60, backlog=2)
+    assert info.value.status_code == 503
+    assert info.value.stage == 'test-queue'
+
+def test_check_sheds_past_deadline():
+    gate = StageGate('test-deadline', limit=1, max_queue=10)
+    gate.active = 1
+    gate.service_time = 10.0
+    with pytest.raises(Overloaded) as info:
+        gate.check(time.monotonic() + 5)
+    assert info.value.headers['Retry-After'] == '10'
+    gate.check(time.monotonic() + 30)
+
+def test_check_without_deadline_never_sheds():
+    gate = StageGate('test-no-deadline', limit=1, max_queue=0)
+    gate.active = 1
+    gate.service_time = 10.0
+    gate.check(None, backlog=100)
+
+def test_slot_records_service_time():
+    gate = StageGate('test-slot', limit=1, max_queue=1)
+    with gate.slot():
+        assert gate.active == 1
+    assert gate.active == 0
+    assert gate.service_time is not None
+
+def test_queued_caller_is_admitted_when_slot_frees():
+    gate = StageGate('test-handoff', limit=1, max_queue=1)
+    admitted = threading.Event()
+    
+    def waiter():
+        with gate.slot(time.monotonic() + 5):
+            admitted.set()
+    
+    with gate.slot():
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        assert not admitted.wait(0.1)
+        assert gate.waiting == 1
+    thread.join(5)
+    assert admitted.is_set()
+
+def test_released_gives_up_the_slot():
+    control = AdmissionControl(limits={'test-released': 1}, max_queue=1, deadline=5)
+    gate = control.gates['test-released']
+    with control.deadline():
+        with control.slot('test-released'):
+            with control.released():
+                assert gate.active == 0
+                with control.slot('test-released'):
+                    assert gate.active == 1
+            assert gate.active == 1
+    assert gate.active == 0
\ No newline at end of file
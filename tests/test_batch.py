@@ -0,0 +1,132 @@
+import json
+import time
+import threading
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from core.security import verify_api_key
+from core.rate_limit import RateLimiter
+from core.usage import usage_meter
+from routes.batch import router as batch
+
+class FakeSocial:
+    def __init__(self):
+        self.processed = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+    
+    def cached(self, url, cache_policy, include_comments=True):
+        return None
+    
+    def process(self, url, cache_policy, include_comments=True):
+        with self._lock:
+            self.processed.append(url)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        if 'broken' in url:
+            raise RuntimeError('download failed')
+        return {'recipes': [{'title': url}], 'total_recipes': 1}
+
+class FakeArticle:
+    def cached(self, text):
+        return {'recipes': [{'title': 'cached'}], 'total_recipes': 1} if text == 'cached text' else None
+    
+    def process(self, text):
+        return {'recipes': [{'title': text}], 'total_recipes': 1}
+
+@pytest.fixture
+def social():
+    return FakeSocial()
+
+@pytest.fixture
+def client(social, monkeypatch):
+    monkeypatch.setattr(batch, 'rate_limiter', RateLimiter(limit=10, window=60, backend='memory'))
+    monkeypatch.setattr(usage_meter, 'check', lambda: None)
+    app = FastAPI()
+    app.include_router(batch.router)
+    app.state.social_controller = social
+    app.state.article_controller = FakeArticle()
+    app.dependency_overrides[verify_api_key] = lambda: 'test-key'
+    return TestClient(app)
+
+def post(client, items, **options):
+    response = client.post('/extract-recipe/batch', json={'items': items, **options})
+    lines = [json.loads(line) for line in response.text.splitlines()] if response.status_code == 200 else []
+    return response, sorted(lines, key=lambda line: line['index'])
+
+def test_one_line_per_item(client):
+    response, lines = post(client, [
+        {'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'},
+        {'url': 'Mix the flour and water', 'type': 'article'},
+        {'url': 'cached text', 'type': 'article'},
+    ])
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    assert response.headers['X-RateLimit-Remaining'] == '7'
+    assert [line['index'] for line in lines] == [0, 1, 2]
+    assert all(line['success'] and line['error'] is None for line in lines)
+    assert lines[0]['type'] == 'social'
+    assert lines[1]['data']['recipes'] == [{'title': 'Mix the flour and water'}]
+    assert lines[2]['data']['recipes'] == [{'title': 'cached'}]
+
+def test_equivalent_urls_are_extracted_once(client, social):
+    _, lines = post(client, [
+        {'url': 'https://youtu.be/dQw4w9WgXcQ?si=share'},
+        {'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'},
+        {'url': 'https://www.youtube.com/shorts/dQw4w9WgXcQ'},
+    ])
+    assert len(social.processed) == 1
+    assert [line['url'] for line in lines] == [
+        'https://youtu.be/dQw4w9WgXcQ?si=share',
+        'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+        'https://www.youtube.com/shorts/dQw4w9WgXcQ',
+    ]
+    assert all(line['data'] == lines[0]['data'] for line in lines)
+
+def test_failed_item_does_not_fail_the_batch(client):
+    _, lines = post(client, [
+        {'url': 'https://www.tiktok.com/@chef/video/1'},
+        {'url': 'https://www.tiktok.com/@broken/video/2'},
+    ])
+    assert lines[0]['success']
+    assert lines[1] == {
+        'index': 1, 'type': 'social', 'url': 'https://www.tiktok.com/@broken/video/2',
+        'success': False, 'data': None, 'error': 'download failed',
+    }
+
+def test_item_over_quota_is_refused_alone(client, monkeypatch):
+    def check():
+        raise HTTPException(status_code=429, detail='Quota exceeded: audio_seconds')
+    monkeypatch.setattr(usage_meter, 'check', check)
+    _, lines = post(client, [
+        {'url': 'cached text', 'type': 'article'},
+        {'url': 'new text', 'type': 'article'},
+    ])
+    assert lines[0]['success']
+    assert lines[1]['error'] == 'Quota exceeded: audio_seconds'
+
+def test_fan_out_is_limited(client, social):
+    items = [{'url': f'https://www.tiktok.com/@chef/video/{i}'} for i in range(6)]
+    _, lines = post(client, items, concurrency=2)
+    assert len(lines) == 6
+    assert social.peak == 2
+
+def test_batch_larger_than_rate_limit_is_refused(client, social):
+    items = [{'url': f'https://www.tiktok.com/@chef/video/{i}'} for i in range(11)]
+    response, _ = post(client, items)
+    assert response.status_code == 413
+    assert 'at most 10 items' in response.json()['detail']
+    assert social.processed == []
+
+def test_batch_over_remaining_budget_is_rate_limited(client):
+    items = [{'url': f'text {i}', 'type': 'article'} for i in range(6)]
+    assert post(client, items)[0].status_code == 200
+    response, _ = post(client, items)
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
\ No newline at end of file
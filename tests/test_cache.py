@@ -0,0 +1,70 @@
+import time
+
+from core.cache import CachePolicy, TieredCache
+from core.rate_limit import SQLiteBackend, SlidingWindow
+from core.usage import UsageMeter
+from core.jobs import JobStore
+
+def cache(db_path, **kwargs):
+    options = dict(ttl=3600, memory_entries=10, disk_entries=100, db_path=db_path)
+    options.update(kwargs)
+    return TieredCache('test', **options)
+
+def test_cache_policy_from_header():
+    assert (CachePolicy.from_header(None).read, CachePolicy.from_header(None).write) == (True, True)
+    refresh = CachePolicy.from_header('max-age=0, No-Cache')
+    assert (refresh.read, refresh.write) == (False, True)
+    bypass = CachePolicy.from_header('no-store')
+    assert (bypass.read, bypass.write) == (False, False)
+
+def test_round_trip_and_delete(tmp_path):
+    results = cache(tmp_path / 'cache.db')
+    results.set('a', {'recipes': [1]})
+    assert results.get('a') == {'recipes': [1]}
+    results.delete('a')
+    assert results.get('a') is None
+
+def test_disk_tier_is_shared(tmp_path):
+    cache(tmp_path / 'cache.db').set('a', 1)
+    assert cache(tmp_path / 'cache.db').get('a') == 1
+
+def test_refresh_in_another_worker_replaces_memory_copy(tmp_path):
+    worker_a = cache(tmp_path / 'cache.db', memory_ttl=0.05)
+    worker_b = cache(tmp_path / 'cache.db', memory_ttl=0.05)
+    worker_a.set('a', 'old')
+    assert worker_a.get('a') == 'old'
+    worker_b.set('a', 'new')
+    time.sleep(0.1)
+    assert worker_a.get('a') == 'new'
+
+def test_memory_only_cache_keeps_full_ttl(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    results = cache(blocker / 'cache.db', memory_ttl=0.01)
+    results.set('a', 1)
+    time.sleep(0.05)
+    assert results.get('a') == 1
+
+def test_expired_entries_are_dropped(tmp_path):
+    results = cache(tmp_path / 'cache.db')
+    results.set('a', 1, ttl=0.05)
+    time.sleep(0.1)
+    assert results.get('a') is None
+
+def test_databases_open_on_first_use(tmp_path):
+    results = cache(tmp_path / 'cache.db')
+    SQLiteBackend(60, db_path=tmp_path / 'rate_limit.db')
+    UsageMeter(db_path=tmp_path / 'usage.db')
+    JobStore(db_path=tmp_path / 'jobs.db')
+    assert list(tmp_path.iterdir()) == []
+    results.get('a')
+    assert (tmp_path / 'cache.db').exists()
+
+def test_rate_limit_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    backend = SQLiteBackend(60, db_path=blocker / 'rate_limit.db')
+    limiter = SlidingWindow(1, 60)
+    update = lambda state: limiter.update(state, time.time(), 1)
+    assert backend.update('key', update).allowed
+    assert not backend.update('key', update).allowed
\ No newline at end of file
@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+
+from recipe_scraper import caption_extractor
+from recipe_scraper.caption_extractor import CaptionExtractor
+
+def youtube_info(*langs):
+    return {
+        'extractor': 'youtube',
+        'subtitles': {lang: [{'ext': 'vtt', 'url': f'https://example.com/{lang}.vtt'}] for lang in langs},
+    }
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Fake caption downloads: tracks listed in `good` return text, the rest fail"""
+    monkeypatch.setattr(caption_extractor, 'CAPTION_MAX_PARALLEL', 2)
+    fetched = []
+    good = {}
+    lock = threading.Lock()
+    
+    def download(formats, preferred, stop=None):
+        url = formats[0]['url']
+        with lock:
+            fetched.append(url)
+        return good.get(url)
+    
+    monkeypatch.setattr(CaptionExtractor, '_download', download)
+    return fetched, good
+
+def test_candidates_rank_manual_and_preferred_languages_first():
+    info = youtube_info('it', 'fr', 'en-GB')
+    info['automatic_captions'] = {'en': []}
+    ranked = [(source, lang) for source, lang, _ in CaptionExtractor._candidates(info)]
+    assert ranked == [('manual', 'en-GB'), ('manual', 'fr'), ('manual', 'it'), ('auto', 'en')]
+
+def test_track_past_the_first_batch_is_found(downloads):
+    fetched, good = downloads
+    langs = ['en', 'es', 'fr', 'de', 'it', 'pt']
+    good['https://example.com/pt.vtt'] = 'mix the flour'
+    assert CaptionExtractor.extract(youtube_info(*langs)) == 'mix the flour'
+    assert len(fetched) == 6
+
+def test_later_batches_are_not_fetched_after_a_hit(downloads):
+    fetched, good = downloads
+    good['https://example.com/es.vtt'] = 'mix the flour'
+    assert CaptionExtractor.extract(youtube_info('en', 'es', 'fr', 'de', 'it')) == 'mix the flour'
+    assert sorted(fetched) == ['https://example.com/en.vtt', 'https://example.com/es.vtt']
+
+def test_better_ranked_track_wins_within_a_batch(downloads):
+    _, good = downloads
+    good['https://example.com/en.vtt'] = 'english'
+    good['https://example.com/es.vtt'] = 'spanish'
+    assert CaptionExtractor.extract(youtube_info('es', 'en')) == 'english'
+
+def test_no_usable_track(downloads):
+    fetched, _ = downloads
+    assert CaptionExtractor.extract(youtube_info('en', 'es', 'fr')) is None
+    assert len(fetched) == 3
+
+def test_unsupported_platform_is_skipped(downloads):
+    fetched, _ = downloads
+    assert CaptionExtractor.extract({'extractor': 'vimeo', 'subtitles': {'en': []}}) is None
+    assert fetched == []
+
+JSON3 = '''{"events": [
+    {"tStartMs": 0, "segs": [{"utf8": "Preheat the "}, {"utf8": "oven"}]},
+    {"tStartMs": 1500},
+    {"tStartMs": 2000, "segs": [{"utf8": "\\n"}]},
+    {"tStartMs": 3000, "segs": [{"utf8": "350"}]}
+]}'''
+
+SRV3 = '''<?xml version="1.0" encoding="utf-8" ?>
+<timedtext format="3"><body>
+<p t="0" d="1500"><s>Preheat</s><s> the oven</s></p>
+<p t="1500" d="500"></p>
+<p t="2000" d="1000">350</p>
+</body></timedtext>'''
+
+TTML = '''<?xml version="1.0" encoding="utf-8"?>
+<tt xmlns="http://www.w3.org/ns/ttml" xml:lang="en"><body><div>
+<p begin="00:00:00.000" end="00:00:01.500">Preheat the<br/>oven</p>
+<p begin="00:00:02.000" end="00:00:03.000">350</p>
+</div></body></tt>'''
+
+VTT = '''WEBVTT
+Kind: captions
+Language: en
+
+NOTE a comment
+spanning lines
+
+1
+00:00:00.000 --> 00:00:01.500 align:start
+<c>Preheat</c> the oven
+
+00:00:01.500 --> 00:00:02.000
+Preheat the oven
+
+intro
+00:00:02.000 --> 00:00:03.000
+350
+degrees
+'''
+
+SRT = '''1
+00:00:00,000 --> 00:00:01,500
+Preheat the oven
+
+2
+00:00:02,000 --> 00:00:03,000
+350
+
+3
+00:00:03,000 --> 00:00:04,000
+to 180
+'''
+
+@pytest.mark.parametrize('ext, body, expected', [
+    ('json3', JSON3, 'Preheat the oven\n350'),
+    ('srv3', SRV3, 'Preheat the oven\n350'),
+    ('ttml', TTML, 'Preheat the oven\n350'),
+    ('vtt', VTT, 'Preheat the oven\n350\ndegrees'),
+    ('srt', SRT, 'Preheat the oven\n350\nto 180'),
+])
+def test_parse(ext, body, expected):
+    assert CaptionExtractor._parse(ext, body) == expected
+
+def test_digit_only_cue_is_text():
+    srt = '7\n00:00:05,000 --> 00:00:06,000\n350\n\n8\n00:00:06,000 --> 00:00:07,000\n2\n'
+    assert CaptionExtractor._parse('srt', srt) == '350\n2'
+
+def test_empty_track_is_none():
+    assert CaptionExtractor._parse('vtt', 'WEBVTT\n\n') is None
+    assert CaptionExtractor._parse('json3', '{"events": []}') is None
\ No newline at end of file
@@ -0,0 +1,102 @@
+import tempfile
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from core.cache import TieredCache
+from recipe_scraper import groq_client
+from recipe_scraper.groq_client import GroqClient
+from recipe_scraper.models import AudioData
+
+class FakeTranscriptions:
+    """Builds the multipart upload the way the Groq SDK does, then answers"""
+    
+    def __init__(self):
+        self.uploads = []
+    
+    def create(self, file, **kwargs):
+        request = httpx.Request('POST', 'https://api.groq.com/openai/v1/audio/transcriptions', files={'file': file})
+        self.uploads.append(request.read())
+        result = SimpleNamespace(text=' chop the onions ', duration=1.5)
+        return SimpleNamespace(headers={}, parse=lambda: result)
+
+def fake_client():
+    transcriptions = FakeTranscriptions()
+    client = SimpleNamespace(audio=SimpleNamespace(
+        transcriptions=SimpleNamespace(with_raw_response=transcriptions)
+    ))
+    return client, transcriptions
+
+def test_transcribe_uploads_in_memory_buffer_without_rollover(tmp_path):
+    client, transcriptions = fake_client()
+    buffer = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, dir=tmp_path)
+    buffer.write(b'audio-bytes' * 100)
+    audio = AudioData(name='clip.m4a', file=buffer, size=1100)
+    
+    assert GroqClient(client=client).transcribe_audio(audio) == 'chop the onions'
+    assert not buffer._rolled
+    assert list(tmp_path.iterdir()) == []
+    assert b'audio-bytes' * 100 in transcriptions.uploads[0]
+
+def test_transcribe_sends_whole_file_after_partial_read(tmp_path):
+    client, transcriptions = fake_client()
+    buffer = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, dir=tmp_path)
+    buffer.write(b'0123456789')
+    audio = AudioData(name='clip.m4a', file=buffer, size=10)
+    
+    GroqClient(client=client).transcribe_audio(audio)
+    assert b'0123456789' in transcriptions.uploads[0]
+
+class FakeStream:
+    def __init__(self, deltas, error=None):
+        self.deltas = deltas
+        self.error = error
+        self.closed = False
+    
+    def __iter__(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+        if self.error:
+            raise self.error
+    
+    def close(self):
+        self.closed = True
+
+def streaming_client(stream):
+    create = lambda **kwargs: SimpleNamespace(headers={}, parse=lambda: stream)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        with_raw_response=SimpleNamespace(create=create)
+    )))
+
+@pytest.fixture
+def memo(tmp_path, monkeypatch):
+    memo = TieredCache('llm', ttl=60, memory_entries=10, disk_entries=10, db_path=tmp_path / 'cache.db')
+    monkeypatch.setattr(groq_client, 'llm_cache', memo)
+    return memo
+
+RESPONSE = ['{"recipes": [{"title": "Pasta"}', ', {"title": "Soup"}', ']}']
+
+def test_streamed_recipes_are_memoized(memo):
+    stream = FakeStream(RESPONSE)
+    seen = []
+    result = GroqClient(client=streaming_client(stream)).extract_recipes('prompt', on_recipe=seen.append)
+    assert [r['title'] for r in seen] == ['Pasta', 'Soup']
+    assert result == {'recipes': [{'title': 'Pasta'}, {'title': 'Soup'}]}
+    assert stream.closed
+    assert memo.get(GroqClient._recipe_cache_key('prompt')) == result
+
+def test_broken_stream_returns_recipes_already_sent(memo):
+    stream = FakeStream([RESPONSE[0], ', {"title": "So'], error=ConnectionError('reset'))
+    seen = []
+    result = GroqClient(client=streaming_client(stream)).extract_recipes('prompt', on_recipe=seen.append)
+    assert [r['title'] for r in seen] == ['Pasta']
+    assert result == {'recipes': [{'title': 'Pasta'}], 'total_recipes': 1, 'partial_recipes': True}
+    assert stream.closed
+    assert memo.get(GroqClient._recipe_cache_key('prompt')) is None
+
+def test_stream_failing_before_any_recipe_fails(memo):
+    stream = FakeStream(['{"recipes": [{"ti'], error=ConnectionError('reset'))
+    result = GroqClient(client=streaming_client(stream)).extract_recipes('prompt', on_recipe=lambda recipe: None)
+    assert result is None
+    assert stream.closed
\ No newline at end of file
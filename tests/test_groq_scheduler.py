@@ -0,0 +1,175 @@
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from core.admission import admission, Overloaded
+from core.groq_scheduler import GroqScheduler, ModelBudget, _duration
+
+HEADERS = {
+    'x-ratelimit-limit-requests': '100',
+    'x-ratelimit-remaining-requests': '50',
+    'x-ratelimit-reset-requests': '30s',
+    'x-ratelimit-limit-tokens': '6000',
+    'x-ratelimit-remaining-tokens': '4000',
+    'x-ratelimit-reset-tokens': '2m',
+}
+
+class GroqError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+def raw(result='ok'):
+    return SimpleNamespace(headers={}, parse=lambda: result)
+
+def scheduler():
+    return GroqScheduler(max_retries=1, backoff_base=0.01, backoff_max=0.05)
+
+def test_duration():
+    assert _duration('2m59.56s') == pytest.approx(179.56)
+    assert _duration('120ms') == pytest.approx(0.12)
+    assert _duration('7.5') == 7.5
+    assert _duration(None) == 0.0
+
+def test_unknown_budget_does_not_hold_calls_back():
+    budget = ModelBudget('m', rpm=0)
+    assert budget.wait_time(10_000, 100.0) == 0.0
+
+def test_update_applies_headers():
+    budget = ModelBudget('m', rpm=0)
+    reservation = budget.reserve(100, 100.0)
+    budget.update(reservation, HEADERS, 100.0)
+    assert budget.requests_remaining == 50
+    assert budget.tokens_remaining == 4000
+    assert budget.requests_reset == pytest.approx(130.0)
+    assert budget.tokens_reset == pytest.approx(220.0)
+    assert budget.in_flight == {}
+
+def test_update_subtracts_later_calls_still_in_flight():
+    budget = ModelBudget('m', rpm=0)
+    first = budget.reserve(100, 100.0)
+    budget.reserve(300, 100.0)
+    budget.reserve(200, 100.0)
+    budget.update(first, HEADERS, 101.0)
+    assert budget.requests_remaining == 48
+    assert budget.tokens_remaining == 3500
+
+def test_stale_headers_are_ignored():
+    budget = ModelBudget('m', rpm=0)
+    first = budget.reserve(100, 100.0)
+    second = budget.reserve(100, 100.0)
+    budget.update(second, HEADERS, 101.0)
+    budget.update(first, dict(HEADERS, **{'x-ratelimit-remaining-requests': '90'}), 102.0)
+    assert budget.requests_remaining == 50
+    assert budget.in_flight == {}
+
+def test_exhausted_budget_waits_for_reset_then_refills():
+    budget = ModelBudget('m', rpm=0)
+    reservation = budget.reserve(100, 100.0)
+    budget.update(reservation, dict(HEADERS, **{'x-ratelimit-remaining-requests': '0'}), 100.0)
+    assert budget.wait_time(100, 110.0) == pytest.approx(20.0)
+    assert budget.wait_time(100, 130.0) == 0.0
+    assert budget.requests_remaining == 100
+
+def test_token_shortfall_waits_for_token_reset():
+    budget = ModelBudget('m', rpm=0)
+    reservation = budget.reserve(100, 100.0)
+    budget.update(reservation, HEADERS, 100.0)
+    assert budget.wait_time(4000, 100.0) == 0.0
+    assert budget.wait_time(4001, 100.0) == pytest.approx(120.0)
+
+def test_rpm_spaces_calls():
+    budget = ModelBudget('m', rpm=60)
+    budget.reserve(0, 100.0)
+    assert budget.wait_time(0, 100.0) == pytest.approx(1.0)
+
+def test_retry_delay_honors_retry_after_and_pauses_model():
+    groq = scheduler()
+    reservation = groq.acquire('m-429')
+    before = time.monotonic()
+    delay = groq._retry_delay('m-429', reservation, GroqError(429, {'retry-after': '2'}), 0)
+    assert 2.0 <= delay <= 2.01
+    budget = groq._budgets['m-429']
+    assert budget.blocked_until >= before + 2.0
+    assert budget.wait_time(0, time.monotonic()) > 1.9
+    assert budget.in_flight == {}
+
+def test_retry_delay_backs_off_on_server_errors():
+    groq = scheduler()
+    reservation = groq.acquire('m-5xx')
+    delay = groq._retry_delay('m-5xx', reservation, GroqError(503), 10)
+    assert 0.0 <= delay <= 0.05
+    assert groq._budgets['m-5xx'].blocked_until == 0.0
+
+def test_retry_delay_gives_up_on_client_errors():
+    groq = scheduler()
+    reservation = groq.acquire('m-400')
+    assert groq._retry_delay('m-400', reservation, GroqError(400), 0) is None
+
+def test_interactive_callers_go_before_background():
+    groq = scheduler()
+    budget = groq._budget('m-priority')
+    budget.blocked_until = time.monotonic() + 0.3
+    order = []
+    
+    def call(name, background):
+        if background:
+            with groq.background():
+                groq.acquire('m-priority')
+        else:
+            groq.acquire('m-priority')
+        order.append(name)
+    
+    threads = [threading.Thread(target=call, args=('background', True))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=call, args=('interactive', False)))
+    threads[1].start()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['interactive', 'background']
+
+def test_wait_past_request_limit_is_shed():
+    groq = scheduler()
+    groq._budget('m-shed').blocked_until = time.monotonic() + 5
+    with admission.deadline(0.1):
+        with pytest.raises(Overloaded):
+            groq.acquire('m-shed')
+
+def test_throttled_request_fails_after_last_retry():
+    groq = scheduler()
+    calls = []
+    
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise GroqError(429, {'retry-after': '0'})
+    
+    with admission.deadline(5):
+        with pytest.raises(Overloaded):
+            groq.call(create, model='m-deadline')
+    assert len(calls) == 2
+
+def test_throttled_background_call_keeps_retrying():
+    groq = scheduler()
+    calls = []
+    
+    def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) < 5:
+            raise GroqError(429, {'retry-after': '0'})
+        return raw('parsed')
+    
+    assert groq.call(create, model='m-background') == 'parsed'
+    assert len(calls) == 5
+
+def test_server_errors_still_give_up_without_deadline():
+    groq = scheduler()
+    
+    def create(**kwargs):
+        raise GroqError(500)
+    
+    with pytest.raises(GroqError):
+        groq.call(create, model='m-500')
\ No newline at end of file
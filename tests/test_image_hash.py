@@ -0,0 +1,73 @@
+import io
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from services.image_hash import ImageHasher
+
+PANCAKES = ['2 cups flour', '1 tsp salt', '3 eggs', '1 cup milk', 'Whisk everything', 'Rest 30 minutes', 'Fry in butter']
+PASTA = ['500 g pasta', '2 tbsp olive oil', '4 garlic cloves', 'Chili flakes', 'Boil the pasta', 'Fry the garlic', 'Toss and serve']
+
+def card(lines, size=(800, 1000)):
+    """A recipe card: border and title from a template, then the recipe's lines"""
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([20, 20, size[0] - 20, size[1] - 20], outline=(200, 120, 60), width=4)
+    draw.text((60, 50), 'Recipe Card', fill='black', font=ImageFont.load_default(size=28))
+    font = ImageFont.load_default(size=20)
+    for i, line in enumerate(lines):
+        draw.text((60, 130 + 34 * i), line, fill=(40, 40, 40), font=font)
+    return image
+
+def encode(image, fmt='PNG', **options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+@pytest.fixture(scope='module')
+def original():
+    return card(PANCAKES)
+
+@pytest.mark.parametrize('copy', [
+    lambda image: encode(image, 'JPEG', quality=95),
+    lambda image: encode(image, 'JPEG', quality=30),
+    lambda image: encode(image.resize((400, 500)), 'JPEG', quality=60),
+    lambda image: encode(image.resize((1200, 1500)), 'JPEG', quality=80),
+    lambda image: encode(image.resize((600, 750)), 'WEBP', quality=50),
+])
+def test_resized_or_recompressed_copy_matches(original, copy):
+    a = ImageHasher.fingerprint(encode(original))
+    b = ImageHasher.fingerprint(copy(original))
+    assert a['dhash'] == b['dhash']
+    assert ImageHasher.same_image(a, b)
+
+def test_different_card_from_same_template_does_not_match(original):
+    a = ImageHasher.fingerprint(encode(original))
+    b = ImageHasher.fingerprint(encode(card(PASTA)))
+    # Same layout, so the lookup finds it as a candidate, but it is another recipe
+    assert a['dhash'] == b['dhash']
+    assert not ImageHasher.same_image(a, b)
+
+def test_different_aspect_ratio_does_not_match(original):
+    a = ImageHasher.fingerprint(encode(original))
+    b = ImageHasher.fingerprint(encode(original.resize((800, 900))))
+    assert not ImageHasher.same_image(a, b)
+
+def test_sparse_card_is_hashed():
+    fingerprint = ImageHasher.fingerprint(encode(card([])))
+    assert fingerprint is not None
+    assert fingerprint['size'] == [800, 1000]
+    assert len(fingerprint['dhash']) == 16
+    assert len(fingerprint['fine']) == 256
+
+@pytest.mark.parametrize('color', ['white', 'black', (128, 90, 40)])
+def test_flat_image_is_skipped(color):
+    assert ImageHasher.fingerprint(encode(Image.new('RGB', (800, 1000), color), 'JPEG')) is None
+
+def test_undecodable_image_is_skipped():
+    assert ImageHasher.fingerprint(b'not an image') is None
+
+def test_content_hash_is_exact(original):
+    data = encode(original)
+    assert ImageHasher.content_hash(data) == ImageHasher.content_hash(bytes(data))
+    assert ImageHasher.content_hash(data) != ImageHasher.content_hash(encode(original, 'JPEG'))
\ No newline at end of file
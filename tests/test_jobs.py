@@ -0,0 +1,115 @@
+import os
+import socket
+
+import pytest
+from fastapi import HTTPException
+
+import core.jobs
+from core.jobs import JobStore, check_webhook_url
+
+def resolve_to(monkeypatch, *addresses):
+    monkeypatch.setattr(socket, 'getaddrinfo', lambda host, port, **kwargs: [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port)) for address in addresses
+    ])
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1/hook',
+    'http://localhost:8000/hook',
+    'http://10.1.2.3/hook',
+    'http://192.168.0.10/hook',
+    'http://169.254.169.254/latest/meta-data',
+    'http://[::1]/hook',
+    'http://[::ffff:127.0.0.1]/hook',
+    'http://[::ffff:10.0.0.1]/hook',
+    'http://2130706433/hook',
+    'http://0x7f.1/hook',
+    'http://0.0.0.0/hook',
+])
+def test_webhook_to_internal_address_is_refused(url):
+    with pytest.raises(HTTPException) as info:
+        check_webhook_url(url)
+    assert info.value.status_code == 400
+
+@pytest.mark.parametrize('url', ['ftp://example.com/hook', 'example.com/hook', 'http:///hook', 'http://host:port/'])
+def test_webhook_must_be_http_url(url):
+    with pytest.raises(HTTPException) as info:
+        check_webhook_url(url)
+    assert 'http(s)' in info.value.detail
+
+def test_public_webhook_is_allowed():
+    check_webhook_url('https://8.8.8.8/hook')
+
+def test_webhook_host_with_any_private_address_is_refused(monkeypatch):
+    resolve_to(monkeypatch, '93.184.216.34', '10.0.0.7')
+    with pytest.raises(HTTPException):
+        check_webhook_url('https://hooks.example.com/recipe')
+
+def test_unresolvable_webhook_host_is_refused(monkeypatch):
+    def fail(*args, **kwargs):
+        raise socket.gaierror('no such host')
+    monkeypatch.setattr(socket, 'getaddrinfo', fail)
+    with pytest.raises(HTTPException) as info:
+        check_webhook_url('https://missing.example.com/hook')
+    assert 'does not resolve' in info.value.detail
+
+def test_private_webhooks_can_be_allowed(monkeypatch):
+    monkeypatch.setattr(core.jobs, 'WEBHOOK_ALLOW_PRIVATE', True)
+    check_webhook_url('http://127.0.0.1/hook')
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(db_path=tmp_path / 'jobs.db')
+
+def test_claim_takes_oldest_queued_job(store):
+    first = store.create('social', 'key', {'url': 'a'})
+    second = store.create('social', 'key', {'url': 'b'})
+    
+    job = store.claim()
+    assert job['id'] == first
+    assert job['payload'] == {'url': 'a'}
+    assert job['attempts'] == 1
+    assert store.get(first)['status'] == 'running'
+    
+    assert store.claim()['id'] == second
+    assert store.claim() is None
+    assert store.counts() == {'running': 2}
+
+def test_get_hides_other_keys_jobs(store):
+    job_id = store.create('social', 'key', {'url': 'a'})
+    assert store.get(job_id, 'key')['status'] == 'queued'
+    assert store.get(job_id, 'other') is None
+
+def test_stage_is_not_written_after_finish(store):
+    job_id = store.create('social', 'key', {'url': 'a'})
+    store.claim()
+    store.set_stage(job_id, 'transcription')
+    assert store.get(job_id)['stage'] == 'transcription'
+    store.finish(job_id, {'recipes': []})
+    store.set_stage(job_id, 'llm')
+    assert store.get(job_id)['stage'] == 'done'
+
+def test_orphaned_jobs_are_requeued(store):
+    job_id = store.create('social', 'key', {'url': 'a'})
+    store.claim()
+    # Claimed by this process: at startup that means a previous run of it
+    assert store.requeue_orphans() == 1
+    job = store.get(job_id)
+    assert (job['status'], job['stage']) == ('queued', None)
+    assert store.claim()['attempts'] == 2
+
+def test_jobs_of_live_workers_are_left_running(store):
+    job_id = store.create('social', 'key', {'url': 'a'})
+    store.claim()
+    store._db.execute("UPDATE jobs SET worker_pid = ? WHERE id = ?", (os.getppid(), job_id))
+    assert store.requeue_orphans() == 0
+    assert store.get(job_id)['status'] == 'running'
+
+def test_jobs_interrupted_too_often_fail(store, monkeypatch):
+    monkeypatch.setattr(core.jobs, 'JOB_MAX_ATTEMPTS', 2)
+    job_id = store.create('social', 'key', {'url': 'a'})
+    for _ in range(2):
+        store.claim()
+        store.requeue_orphans()
+    job = store.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'Interrupted too many times'
\ No newline at end of file
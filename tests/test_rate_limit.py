@@ -0,0 +1,90 @@
+import pytest
+
+from core.rate_limit import SlidingWindow, RateLimitStatus
+
+LIMIT, WINDOW = 10, 60.0
+
+def fill(limiter, now, count):
+    state = None
+    for _ in range(count):
+        state, status = limiter.update(state, now, 1)
+        assert status.allowed
+    return state
+
+def test_counts_down_within_window():
+    limiter = SlidingWindow(LIMIT, WINDOW)
+    state, status = limiter.update(None, 125.0, 1)
+    assert status.allowed
+    assert status.remaining == LIMIT - 1
+    assert status.reset == pytest.approx(55.0)
+    assert state == (120.0, 1, 0)
+
+def test_denies_over_limit_without_charging():
+    limiter = SlidingWindow(LIMIT, WINDOW)
+    state = fill(limiter, 120.0, LIMIT)
+    denied_state, status = limiter.update(state, 120.0, 1)
+    assert not status.allowed
+    assert status.remaining == 0
+    assert denied_state == state
+
+def test_previous_window_is_weighted_by_overlap():
+    limiter = SlidingWindow(LIMIT, WINDOW)
+    # 10 calls in the previous window, a quarter of the way into this one: 7.5 still count
+    _, status = limiter.update((60.0, 10, 0), 135.0, 2)
+    assert status.allowed
+    assert status.remaining == 0
+    _, status = limiter.update((60.0, 10, 0), 135.0, 3)
+    assert not status.allowed
+
+def test_stale_state_is_ignored():
+    limiter = SlidingWindow(LIMIT, WINDOW)
+    state, status = limiter.update((0.0, LIMIT, LIMIT), 125.0, 1)
+    assert status.allowed
+    assert state == (120.0, 1, 0)
+
+def test_retry_after_when_previous_window_slides_out():
+    limiter = SlidingWindow(LIMIT, WINDOW)
+    _, status = limiter.update((60.0, LIMIT, 0), 120.0, 1)
+    assert not status.allowed
+    # One of ten previous calls has to slide out: a tenth of the window
+    assert status.retry_after == pytest.approx(6.0)
+
+def test_retry_after_when_current_window_is_full():
+    limiter = SlidingWindow(LIMIT, WINDOW)
+    state = fill(limiter, 120.0, LIMIT)
+    _, status = limiter.update(state, 120.0, 1)
+    # The rest of this window, then a tenth of the next while these calls slide out
+    assert status.retry_after == pytest.approx(66.0)
+
+@pytest.mark.parametrize('state, now, cost', [
+    ((60.0, LIMIT, 0), 120.0, 1),
+    ((60.0, 6, 0), 130.0, 6),
+    ((120.0, LIMIT, 0), 120.0, 1),
+    ((120.0, 4, 8), 150.0, 3),
+    ((120.0, 8, 3), 170.0, 2),
+])
+def test_retry_after_is_exact(state, now, cost):
+    limiter = SlidingWindow(LIMIT, WINDOW)
+    _, status = limiter.update(state, now, cost)
+    assert not status.allowed
+    assert status.retry_after > 0
+    _, early = limiter.update(state, now + status.retry_after - 0.5, cost)
+    assert not early.allowed
+    _, retry = limiter.update(state, now + status.retry_after + 0.01, cost)
+    assert retry.allowed
+
+def test_cost_over_limit_waits_a_full_window():
+    limiter = SlidingWindow(LIMIT, WINDOW)
+    _, status = limiter.update(None, 120.0, LIMIT + 1)
+    assert not status.allowed
+    assert status.retry_after == WINDOW
+
+def test_headers():
+    allowed = RateLimitStatus(True, LIMIT, 4, 12.2)
+    assert allowed.headers() == {
+        'X-RateLimit-Limit': '10',
+        'X-RateLimit-Remaining': '4',
+        'X-RateLimit-Reset': '13',
+    }
+    denied = RateLimitStatus(False, LIMIT, 0, 12.2, retry_after=0.3)
+    assert denied.headers()['Retry-After'] == '1'
\ No newline at end of file
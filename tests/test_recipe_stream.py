@@ -0,0 +1,44 @@
+from recipe_scraper.recipe_stream import RecipeStreamParser
+
+RESPONSE = (
+    '```json\n'
+    '{"recipes": [\n'
+    '  {"title": "Pasta", "ingredients": [{"name": "salt"}], "notes": "use a \\"big\\" pot {not a pan}"},\n'
+    '  {"title": "Soup", "ingredients": []}\n'
+    ']}\n'
+    '```'
+)
+
+def feed_all(parser, chunks):
+    recipes = []
+    for chunk in chunks:
+        recipes.extend(parser.feed(chunk))
+    return recipes
+
+def test_recipes_complete_as_they_arrive():
+    parser = RecipeStreamParser()
+    first_end = RESPONSE.index('}"},') + 3
+    assert parser.feed(RESPONSE[:first_end - 1]) == []
+    recipes = parser.feed(RESPONSE[first_end - 1:first_end])
+    assert [r['title'] for r in recipes] == ['Pasta']
+    assert recipes[0]['notes'] == 'use a "big" pot {not a pan}'
+    assert [r['title'] for r in parser.feed(RESPONSE[first_end:])] == ['Soup']
+
+def test_chunking_does_not_matter():
+    whole = RecipeStreamParser().feed(RESPONSE)
+    by_char = feed_all(RecipeStreamParser(), RESPONSE)
+    assert whole == by_char
+    assert [r['title'] for r in whole] == ['Pasta', 'Soup']
+
+def test_top_level_array():
+    recipes = RecipeStreamParser().feed('[{"title": "A"}, {"title": "B"}]')
+    assert [r['title'] for r in recipes] == ['A', 'B']
+
+def test_other_arrays_are_ignored():
+    text = '{"tags": [{"title": "not a recipe"}], "recipes": [{"title": "A"}]}'
+    assert RecipeStreamParser().feed(text) == [{'title': 'A'}]
+
+def test_buffer_keeps_full_text():
+    parser = RecipeStreamParser()
+    feed_all(parser, [RESPONSE[:10], RESPONSE[10:]])
+    assert parser.buffer == RESPONSE
\ No newline at end of file
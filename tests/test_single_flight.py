@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from core import progress
+from core.metrics import metrics
+from core.single_flight import SingleFlight
+
+def counter(name):
+    return metrics.snapshot()['counters'].get(name, 0)
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight('test-shared')
+    calls = []
+    
+    async def extract():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'recipes': ['pasta']}
+    
+    async def main():
+        return await asyncio.gather(*(flight.do('post', extract) for _ in range(5)))
+    
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [{'recipes': ['pasta']}] * 5
+    assert counter('singleflight.test-shared.leaders') == 1
+    assert counter('singleflight.test-shared.coalesced') == 4
+
+def test_failure_reaches_every_caller():
+    flight = SingleFlight('test-failure')
+    
+    async def extract():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('download failed')
+    
+    async def main():
+        return await asyncio.gather(*(flight.do('post', extract) for _ in range(3)), return_exceptions=True)
+    
+    results = asyncio.run(main())
+    assert [str(r) for r in results] == ['download failed'] * 3
+    assert counter('singleflight.test-failure.failures') == 1
+
+def test_keys_run_separately_and_finished_calls_run_again():
+    flight = SingleFlight('test-keys')
+    calls = []
+    
+    async def extract(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+    
+    async def main():
+        first = await asyncio.gather(flight.do('a', lambda: extract('a')), flight.do('b', lambda: extract('b')))
+        again = await flight.do('a', lambda: extract('a'))
+        return first, again
+    
+    assert asyncio.run(main()) == (['a', 'b'], 'a')
+    assert calls == ['a', 'b', 'a']
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight('test-cancel')
+    
+    async def extract():
+        await asyncio.sleep(0.05)
+        return 'done'
+    
+    async def main():
+        leaving = asyncio.ensure_future(flight.do('post', extract))
+        staying = asyncio.ensure_future(flight.do('post', extract))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+    
+    assert asyncio.run(main()) == 'done'
+
+def test_progress_reaches_callers_that_join_late():
+    flight = SingleFlight('test-progress')
+    
+    async def main():
+        reported = asyncio.Event()
+        
+        async def extract():
+            progress.report('metadata')
+            reported.set()
+            await asyncio.sleep(0.02)
+            progress.report('recipes')
+            return 'done'
+        
+        async def follow(events):
+            with progress.listen(lambda event, data: events.append(data['stage'])):
+                return await flight.do('post', extract)
+        
+        first, late = [], []
+        leader = asyncio.ensure_future(follow(first))
+        await reported.wait()
+        await asyncio.gather(leader, follow(late))
+        return first, late
+    
+    first, late = asyncio.run(main())
+    assert first == ['metadata', 'recipes']
+    assert late == ['metadata', 'recipes']
\ No newline at end of file
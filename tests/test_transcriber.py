@@ -0,0 +1,22 @@
+from recipe_scraper.transcriber import ChunkedTranscriber
+
+stitch = ChunkedTranscriber.stitch
+
+def test_overlap_is_removed():
+    texts = [
+        'preheat the oven and add the salt',
+        'add the salt and pepper to the pot',
+        'to the pot then stir well',
+    ]
+    assert stitch(texts) == 'preheat the oven and add the salt and pepper to the pot then stir well'
+
+def test_overlap_ignores_case_and_punctuation():
+    texts = ['Chop the onions. Add the Garlic,', 'add the garlic and cook']
+    assert stitch(texts) == 'Chop the onions. add the garlic and cook'
+
+def test_short_matches_are_kept():
+    assert stitch(['whisk the eggs', 'the eggs go in']) == 'whisk the eggs the eggs go in'
+
+def test_failed_segments_are_skipped():
+    assert stitch([None, 'first part', '', 'second part']) == 'first part second part'
+    assert stitch([None, '']) is None
\ No newline at end of file
@@ -0,0 +1,41 @@
+import pytest
+
+from services.url_canonicalizer import URLCanonicalizer
+
+@pytest.mark.parametrize('url, key', [
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'youtube:dQw4w9WgXcQ'),
+    ('https://youtu.be/dQw4w9WgXcQ?si=abc123', 'youtube:dQw4w9WgXcQ'),
+    ('https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ', 'youtube:dQw4w9WgXcQ'),
+    ('https://www.youtube.com/shorts/dQw4w9WgXcQ?feature=share', 'youtube:dQw4w9WgXcQ'),
+    ('youtube.com/embed/dQw4w9WgXcQ', 'youtube:dQw4w9WgXcQ'),
+    ('https://www.instagram.com/p/C1a2B3c4D5e/?igsh=xyz', 'instagram:C1a2B3c4D5e'),
+    ('https://instagram.com/reel/C1a2B3c4D5e/', 'instagram:C1a2B3c4D5e'),
+    ('https://www.instagram.com/chef.name/reels/C1a2B3c4D5e', 'instagram:C1a2B3c4D5e'),
+    ('https://www.tiktok.com/@chef/video/7312345678901234567?is_from_webapp=1', 'tiktok:7312345678901234567'),
+    ('https://m.tiktok.com/v/7312345678901234567.html', 'tiktok:7312345678901234567'),
+    ('https://www.facebook.com/chef/videos/123456789/', 'facebook:123456789'),
+    ('https://www.facebook.com/watch/?v=123456789&mibextid=abc', 'facebook:123456789'),
+    ('https://www.pinterest.co.uk/pin/easy-pasta--987654321/', 'pinterest:987654321'),
+    ('https://twitter.com/chef/status/1700000000000000000?s=20', 'twitter:1700000000000000000'),
+    ('https://x.com/chef/status/1700000000000000000', 'twitter:1700000000000000000'),
+])
+def test_equivalent_links_share_a_key(url, key):
+    assert URLCanonicalizer.key(url) == key
+
+def test_canonical_url():
+    canonical = URLCanonicalizer.canonicalize('  https://youtu.be/dQw4w9WgXcQ?t=42  ')
+    assert canonical.platform == 'youtube'
+    assert canonical.content_id == 'dQw4w9WgXcQ'
+    assert canonical.url == 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+def test_fallback_strips_tracking_and_sorts_params():
+    a = URLCanonicalizer.canonicalize('http://www.example.com/recipes/pasta/?utm_source=x&b=2&a=1#top')
+    b = URLCanonicalizer.canonicalize('https://example.com/recipes/pasta?a=1&fbclid=y&b=2')
+    assert a == b
+    assert a.platform == 'unknown'
+    assert a.url == 'https://example.com/recipes/pasta?a=1&b=2'
+    assert a.key == 'unknown:example.com/recipes/pasta?a=1&b=2'
+
+def test_invalid_query_id_falls_back():
+    canonical = URLCanonicalizer.canonicalize('https://www.youtube.com/watch?v=short')
+    assert canonical.content_id == 'youtube.com/watch?v=short'
\ No newline at end of file